@@ -8,6 +8,8 @@ from app.api.products import router as products
 from app.api.imports import router as imports
 from app.api.exports import router as exports
 from app.api.settings import router as settings
+from app.api.sync import router as sync
+from app.api.reports import router as reports
 
 __all__ = [
     "jobs",
@@ -17,4 +19,6 @@ __all__ = [
     "imports",
     "exports",
     "settings",
+    "sync",
+    "reports",
 ]
@@ -2,21 +2,37 @@
 Exports API router - Export BOM and estimates
 """
 from datetime import datetime
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse, FileResponse, JSONResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from starlette.background import BackgroundTask
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+import asyncio
 import json
 import csv
 import io
+import os
+import re
+import uuid
+import zipfile
 
-from app.db.database import get_db
+from app.core.cache import LRUCache
+from app.core.config import settings as app_settings
+from app.db.database import get_db, async_session
 from app.db.models import Job, Room, JobLineItem
+from app.services.archive import load_archive
+from app.services.bom import BOMAggregate, aggregate_bom, bom_totals, build_bom_summary, summarize_line_items
+from app.services.pdf import get_estimate_pdf
+from app.services.parquet_export import run_parquet_export
 from app.schemas.schemas import (
     JobResponse, RoomResponse, LineItemResponse,
-    BOMSummary, EstimateExport
+    BOMSummary, EstimateExport,
+    BatchExportFormat, BatchExportRequest, BatchExportStatus,
+    ParquetTable, ParquetTableExport, ParquetExportResult
 )
 
 router = APIRouter(prefix="/exports", tags=["exports"])
@@ -26,130 +42,702 @@ async def calculate_bom(job: Job, line_items: list) -> BOMSummary:
     """Calculate BOM summary from job and line items"""
     subtotal_materials = sum(item.extended_price for item in line_items)
     subtotal_labor = 0  # TODO: Calculate from room dimensions and labor rates
-    
-    overhead = (subtotal_materials + subtotal_labor) * (job.overhead_percent / 100)
-    profit = (subtotal_materials + subtotal_labor + overhead) * (job.profit_percent / 100)
-    tax = subtotal_materials * (job.tax_percent / 100)
-    contingency = (subtotal_materials + subtotal_labor) * (job.contingency_percent / 100)
-    
-    grand_total = subtotal_materials + subtotal_labor + overhead + profit + tax + contingency
+    mapped_items = sum(1 for item in line_items if item.is_mapped)
     
     return BOMSummary(
         job_id=job.id,
         job_name=job.name,
         total_items=len(line_items),
-        mapped_items=sum(1 for item in line_items if item.is_mapped),
-        unmapped_items=sum(1 for item in line_items if not item.is_mapped),
-        subtotal_materials=round(subtotal_materials, 2),
-        subtotal_labor=round(subtotal_labor, 2),
-        overhead=round(overhead, 2),
-        profit=round(profit, 2),
-        tax=round(tax, 2),
-        contingency=round(contingency, 2),
-        grand_total=round(grand_total, 2),
+        mapped_items=mapped_items,
+        unmapped_items=len(line_items) - mapped_items,
+        **bom_totals(job, subtotal_materials, subtotal_labor),
         line_items=[LineItemResponse.model_validate(item) for item in line_items]
     )
 
 
+Archived = Tuple[List[Room], List[JobLineItem]]
+
+
+async def _load_archived(db: AsyncSession, job: Job) -> Optional[Archived]:
+    """Rooms and line items of an archived job (read without rehydrating), or None"""
+    if job.archived_at is None:
+        return None
+    return await load_archive(db, job.id, with_products=False)
+
+
+async def _aggregate(db: AsyncSession, job: Job, archived: Optional[Archived]) -> BOMAggregate:
+    """BOM aggregate from SQL, or from the archive for an archived job"""
+    if archived is None:
+        return await aggregate_bom(db, job.id)
+    rooms, line_items = archived
+    return summarize_line_items(line_items, {room.id: room.name for room in rooms})
+
+
+async def _archived_partitions(archived: Archived, with_room: bool = False) -> AsyncIterator[List[Tuple]]:
+    """Archived line items as row partitions shaped like the streamed line item queries"""
+    rooms, line_items = archived
+    room_names = {room.id: room.name for room in rooms}
+    if with_room:
+        line_items = sorted(line_items, key=lambda item: (
+            room_names.get(item.room_id) or "", item.room_id or 0, item.id
+        ))
+    else:
+        line_items = sorted(line_items, key=lambda item: item.id)
+    
+    for start in range(0, len(line_items), CSV_CHUNK_ROWS):
+        yield [
+            (
+                *([room_names.get(item.room_id)] if with_room else []),
+                item.name,
+                item.category,
+                item.qty,
+                item.unit,
+                item.unit_price,
+                item.extended_price,
+                item.notes,
+            )
+            for item in line_items[start:start + CSV_CHUNK_ROWS]
+        ]
+
+
 @router.get("/bom/{job_id}", response_model=BOMSummary)
-async def get_bom(job_id: int, db: AsyncSession = Depends(get_db)):
+async def get_bom(
+    job_id: int,
+    summary: bool = Query(False, description="Return totals and breakdowns only, without line items"),
+    db: AsyncSession = Depends(get_db)
+):
     """Get Bill of Materials for a job"""
     result = await db.execute(select(Job).where(Job.id == job_id))
     job = result.scalar_one_or_none()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    items_result = await db.execute(
-        select(JobLineItem).where(JobLineItem.job_id == job_id)
-    )
-    line_items = items_result.scalars().all()
+    archived = await _load_archived(db, job)
+    aggregate = await _aggregate(db, job, archived)
+    
+    line_items = []
+    if archived is not None and not summary:
+        line_items = sorted(archived[1], key=lambda item: item.id)
+    elif not summary:
+        items_result = await db.execute(
+            select(JobLineItem).where(JobLineItem.job_id == job_id)
+        )
+        line_items = items_result.scalars().all()
+    
+    return build_bom_summary(job, aggregate, line_items)
+
+
+CSV_HEADER = ["Name", "Category", "Qty", "Unit", "Unit Price", "Extended Price", "Notes"]
+CSV_CHUNK_ROWS = 500
+
+
+async def iter_bom_csv(db: AsyncSession, job: Job) -> AsyncIterator[str]:
+    """
+    Yield a job's BOM as CSV chunks.
+    
+    Line items are read through a server-side cursor CSV_CHUNK_ROWS at a
+    time and the totals footer comes from the SQL aggregate, so memory use
+    does not grow with the number of line items. Archived jobs are read
+    from their archive.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    
+    archived = await _load_archived(db, job)
+    if archived is None:
+        result = await db.stream(
+            select(
+                JobLineItem.name,
+                JobLineItem.category,
+                JobLineItem.qty,
+                JobLineItem.unit,
+                JobLineItem.unit_price,
+                JobLineItem.extended_price,
+                JobLineItem.notes,
+            )
+            .where(JobLineItem.job_id == job.id)
+            .order_by(JobLineItem.id)
+            .execution_options(yield_per=CSV_CHUNK_ROWS)
+        )
+        partitions = result.partitions()
+    else:
+        partitions = _archived_partitions(archived)
+    async for rows in partitions:
+        for name, category, qty, unit, unit_price, extended_price, notes in rows:
+            writer.writerow([
+                name,
+                category.value if category else "",
+                qty,
+                unit,
+                f"{unit_price:.2f}",
+                f"{extended_price:.2f}",
+                notes or ""
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
     
-    return await calculate_bom(job, line_items)
+    aggregate = await _aggregate(db, job, archived)
+    totals = bom_totals(job, aggregate.subtotal_materials)
+    writer.writerow([])
+    writer.writerow(["Materials Subtotal", "", "", "", "", f"{totals['subtotal_materials']:.2f}"])
+    writer.writerow(["Tax", "", "", "", "", f"{totals['tax']:.2f}"])
+    writer.writerow(["Overhead", "", "", "", "", f"{totals['overhead']:.2f}"])
+    writer.writerow(["Profit", "", "", "", "", f"{totals['profit']:.2f}"])
+    writer.writerow(["Contingency", "", "", "", "", f"{totals['contingency']:.2f}"])
+    writer.writerow(["Grand Total", "", "", "", "", f"{totals['grand_total']:.2f}"])
+    yield buffer.getvalue()
 
 
 @router.get("/bom/{job_id}/csv")
 async def export_bom_csv(job_id: int, db: AsyncSession = Depends(get_db)):
-    """Export BOM as CSV file"""
+    """Export BOM as CSV file (streamed)"""
     result = await db.execute(select(Job).where(Job.id == job_id))
     job = result.scalar_one_or_none()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    items_result = await db.execute(
-        select(JobLineItem).where(JobLineItem.job_id == job_id)
-    )
-    line_items = items_result.scalars().all()
-    
-    # Generate CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Name", "Category", "Qty", "Unit", "Unit Price", "Extended Price", "Notes"])
-    
-    for item in line_items:
-        writer.writerow([
-            item.name,
-            item.category.value if item.category else "",
-            item.qty,
-            item.unit,
-            f"{item.unit_price:.2f}",
-            f"{item.extended_price:.2f}",
-            item.notes or ""
-        ])
+    async def stream_csv():
+        # The request session is closed before the body streams,
+        # so the generator reads through its own session
+        async with async_session() as session:
+            async for chunk in iter_bom_csv(session, job):
+                yield chunk
     
-    bom = await calculate_bom(job, line_items)
-    writer.writerow([])
-    writer.writerow(["Materials Subtotal", "", "", "", "", f"{bom.subtotal_materials:.2f}"])
-    writer.writerow(["Tax", "", "", "", "", f"{bom.tax:.2f}"])
-    writer.writerow(["Overhead", "", "", "", "", f"{bom.overhead:.2f}"])
-    writer.writerow(["Profit", "", "", "", "", f"{bom.profit:.2f}"])
-    writer.writerow(["Contingency", "", "", "", "", f"{bom.contingency:.2f}"])
-    writer.writerow(["Grand Total", "", "", "", "", f"{bom.grand_total:.2f}"])
-    
-    output.seek(0)
     filename = f"bom_{job.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.csv"
     
     return StreamingResponse(
-        iter([output.getvalue()]),
+        stream_csv(),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
-@router.get("/estimate/{job_id}", response_model=EstimateExport)
-async def get_estimate(job_id: int, db: AsyncSession = Depends(get_db)):
-    """Get full estimate export for a job"""
+async def build_estimate(db: AsyncSession, job_id: int) -> Optional[EstimateExport]:
+    """Build the full estimate for a job, or None if the job does not exist"""
     result = await db.execute(
         select(Job).options(selectinload(Job.rooms)).where(Job.id == job_id)
     )
     job = result.scalar_one_or_none()
     if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
+        return None
     
-    items_result = await db.execute(
-        select(JobLineItem).where(JobLineItem.job_id == job_id)
-    )
-    line_items = items_result.scalars().all()
+    archived = await _load_archived(db, job)
+    if archived is None:
+        items_result = await db.execute(
+            select(JobLineItem).where(JobLineItem.job_id == job_id)
+        )
+        rooms, line_items = job.rooms, items_result.scalars().all()
+    else:
+        rooms, line_items = archived
     
     bom = await calculate_bom(job, line_items)
     
     return EstimateExport(
         job=JobResponse.model_validate(job),
-        rooms=[RoomResponse.model_validate(room) for room in job.rooms],
+        rooms=[RoomResponse.model_validate(room) for room in rooms],
         bom=bom,
         generated_at=datetime.utcnow()
     )
 
 
+# Serialized estimates keyed by (job_id, revision, variant). A write to the
+# job, its rooms or line items bumps the version, so stale entries are never
+# read again and simply age out of the LRU.
+estimate_cache = LRUCache(
+    max_entries=app_settings.ESTIMATE_CACHE_MAX_ENTRIES,
+    max_bytes=app_settings.ESTIMATE_CACHE_MAX_BYTES
+)
+
+
+def estimate_revision(created_at: Optional[datetime], version: int) -> str:
+    """
+    Identify one job row's version for cache keys and ETags.
+    
+    Job ids can be reused after a delete (SQLite hands out the highest id
+    again) and a new job starts at version 1, so the creation time is
+    included to tell the rows apart.
+    """
+    stamp = created_at.strftime("%Y%m%d%H%M%S%f") if created_at else "0"
+    return f"{stamp}-{version}"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (weak comparison) against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [
+        tag[2:] if tag.startswith("W/") else tag for tag in candidates
+    ]
+
+
+async def _job_revision(db: AsyncSession, job_id: int) -> str:
+    """Current estimate_revision of a job; raises 404 if it does not exist"""
+    result = await db.execute(select(Job.created_at, Job.version).where(Job.id == job_id))
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return estimate_revision(*row)
+
+
+async def get_cached_estimate(
+    db: AsyncSession,
+    job_id: int,
+    indent: Optional[int] = None,
+    revision: Optional[str] = None
+) -> Tuple[str, bytes]:
+    """
+    Return (job revision, serialized estimate), building it only on a cache miss.
+    
+    Pass the job revision if the caller already looked it up. Raises 404 if
+    the job does not exist.
+    """
+    if revision is None:
+        revision = await _job_revision(db, job_id)
+    
+    payload = estimate_cache.get((job_id, revision, indent))
+    if payload is None:
+        estimate = await build_estimate(db, job_id)
+        if not estimate:
+            raise HTTPException(status_code=404, detail="Job not found")
+        # Key by the revision the estimate was actually built from
+        revision = estimate_revision(estimate.job.created_at, estimate.job.version)
+        payload = estimate.model_dump_json(indent=indent).encode("utf-8")
+        estimate_cache.set((job_id, revision, indent), payload)
+    return revision, payload
+
+
+@router.get("/estimate/{job_id}", response_model=EstimateExport)
+async def get_estimate(job_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Get full estimate export for a job.
+    
+    Responses carry an ETag derived from the job's creation time and
+    version; send it back in If-None-Match to get a 304 without any
+    aggregation work.
+    """
+    revision = await _job_revision(db, job_id)
+    
+    etag = f'"estimate-{job_id}-{revision}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    revision, payload = await get_cached_estimate(db, job_id, revision=revision)
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"ETag": f'"estimate-{job_id}-{revision}"', "Cache-Control": "no-cache"}
+    )
+
+
 @router.get("/estimate/{job_id}/json")
 async def export_estimate_json(job_id: int, db: AsyncSession = Depends(get_db)):
     """Export full estimate as JSON file"""
-    estimate = await get_estimate(job_id, db)
+    result = await db.execute(select(Job.name).where(Job.id == job_id))
+    job_name = result.scalar_one_or_none()
+    if job_name is None:
+        raise HTTPException(status_code=404, detail="Job not found")
     
-    filename = f"estimate_{estimate.job.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.json"
-    content = estimate.model_dump_json(indent=2)
+    _, content = await get_cached_estimate(db, job_id, indent=2)
+    filename = f"estimate_{job_name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.json"
     
     return StreamingResponse(
         iter([content]),
         media_type="application/json",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
+
+
+@router.get("/estimate/{job_id}/pdf")
+async def export_estimate_pdf(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Export estimate as a PDF quote (cached until the estimate changes)"""
+    _, payload = await get_cached_estimate(db, job_id)
+    estimate = EstimateExport.model_validate_json(payload)
+    path = await get_estimate_pdf(estimate)
+    
+    filename = f"estimate_{estimate.job.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.pdf"
+    return FileResponse(path, media_type="application/pdf", filename=filename)
+
+
+# ============================================================
+# XLSX EXPORTS
+# ============================================================
+
+XLSX_MONEY_FORMAT = '"$"#,##0.00'
+
+
+def _money(ws, value):
+    """Currency cell for a write-only worksheet"""
+    cell = WriteOnlyCell(ws, value=value)
+    cell.number_format = XLSX_MONEY_FORMAT
+    return cell
+
+
+async def _save_workbook(wb: Workbook, filename: str) -> FileResponse:
+    """Save a write-only workbook to a temp file in EXPORT_DIR and return it as a download"""
+    tmp_dir = os.path.join(app_settings.EXPORT_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    path = os.path.join(tmp_dir, f"{uuid.uuid4().hex}.xlsx")
+    await asyncio.to_thread(wb.save, path)
+    
+    return FileResponse(
+        path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename=filename,
+        background=BackgroundTask(os.remove, path)
+    )
+
+
+async def _append_line_item_rows(
+    db: AsyncSession,
+    ws,
+    job_id: int,
+    with_room: bool = False,
+    archived: Optional[Archived] = None
+):
+    """Stream a job's line items (or its archived ones) into a worksheet, ordered by room when with_room"""
+    columns = [
+        JobLineItem.name,
+        JobLineItem.category,
+        JobLineItem.qty,
+        JobLineItem.unit,
+        JobLineItem.unit_price,
+        JobLineItem.extended_price,
+        JobLineItem.notes,
+    ]
+    query = select(*columns).where(JobLineItem.job_id == job_id)
+    if with_room:
+        query = (
+            select(Room.name, *columns)
+            .outerjoin(Room, Room.id == JobLineItem.room_id)
+            .where(JobLineItem.job_id == job_id)
+            .order_by(Room.name, JobLineItem.room_id, JobLineItem.id)
+        )
+    else:
+        query = query.order_by(JobLineItem.id)
+    
+    if archived is None:
+        result = await db.stream(query.execution_options(yield_per=CSV_CHUNK_ROWS))
+        partitions = result.partitions()
+    else:
+        partitions = _archived_partitions(archived, with_room)
+    async for rows in partitions:
+        for row in rows:
+            *room, name, category, qty, unit, unit_price, extended_price, notes = row
+            ws.append([
+                *[value or "" for value in room],
+                name,
+                category.value if category else "",
+                qty,
+                unit,
+                _money(ws, unit_price),
+                _money(ws, extended_price),
+                notes or ""
+            ])
+
+
+def _append_totals(ws, totals: dict, label_col: int):
+    """Append the BOM totals block with labels in column label_col"""
+    pad = [""] * label_col
+    ws.append([])
+    for label, key in [
+        ("Materials Subtotal", "subtotal_materials"),
+        ("Tax", "tax"),
+        ("Overhead", "overhead"),
+        ("Profit", "profit"),
+        ("Contingency", "contingency"),
+        ("Grand Total", "grand_total"),
+    ]:
+        ws.append([*pad, label, _money(ws, totals[key])])
+
+
+@router.get("/bom/{job_id}/xlsx")
+async def export_bom_xlsx(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Export BOM as an Excel workbook (rows streamed into a write-only sheet)"""
+    result = await db.execute(select(Job).where(Job.id == job_id))
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("BOM")
+    ws.append(CSV_HEADER)
+    archived = await _load_archived(db, job)
+    await _append_line_item_rows(db, ws, job_id, archived=archived)
+    
+    aggregate = await _aggregate(db, job, archived)
+    _append_totals(ws, bom_totals(job, aggregate.subtotal_materials), label_col=4)
+    
+    filename = f"bom_{job.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+    return await _save_workbook(wb, filename)
+
+
+@router.get("/estimate/{job_id}/xlsx")
+async def export_estimate_xlsx(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Export estimate as a workbook: summary, line items by room, room and category totals"""
+    result = await db.execute(select(Job).where(Job.id == job_id))
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    archived = await _load_archived(db, job)
+    aggregate = await _aggregate(db, job, archived)
+    bom = build_bom_summary(job, aggregate)
+    
+    wb = Workbook(write_only=True)
+    
+    ws = wb.create_sheet("Summary")
+    ws.append(["Job", job.name])
+    ws.append(["Client", job.client_name or ""])
+    ws.append(["Address", ", ".join(
+        part for part in (job.address_line1, job.address_line2, job.city, job.state, job.zip_code) if part
+    )])
+    ws.append(["Status", job.status.value if job.status else ""])
+    ws.append(["Generated", datetime.utcnow()])
+    ws.append([])
+    ws.append(["Line Items", bom.total_items])
+    ws.append(["Mapped", bom.mapped_items])
+    ws.append(["Unmapped", bom.unmapped_items])
+    _append_totals(ws, bom.model_dump(), label_col=0)
+    
+    ws = wb.create_sheet("Line Items")
+    ws.append(["Room", *CSV_HEADER])
+    await _append_line_item_rows(db, ws, job_id, with_room=True, archived=archived)
+    
+    ws = wb.create_sheet("By Room")
+    ws.append(["Room", "Items", "Mapped", "Subtotal"])
+    for room in bom.by_room:
+        ws.append([room.room_name or "(No room)", room.item_count, room.mapped_items, _money(ws, room.subtotal)])
+    
+    ws = wb.create_sheet("By Category")
+    ws.append(["Category", "Items", "Mapped", "Subtotal"])
+    for category in bom.by_category:
+        ws.append([
+            category.category.value if category.category else "(None)",
+            category.item_count,
+            category.mapped_items,
+            _money(ws, category.subtotal)
+        ])
+    
+    filename = f"estimate_{job.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+    return await _save_workbook(wb, filename)
+
+
+# ============================================================
+# BATCH EXPORTS
+# ============================================================
+
+BATCH_DIR = os.path.join(app_settings.EXPORT_DIR, "batches")
+
+# Keep references to background batch tasks so they are not garbage collected
+_batch_tasks = set()
+
+BATCH_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+class _ZipSink:
+    """Write-only file object for ZipFile; written bytes are drained as chunks"""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def render_job_artifacts(
+    job_id: int,
+    formats: List[BatchExportFormat]
+) -> List[Tuple[str, bytes]]:
+    """Render one job's export files as (archive path, content) pairs"""
+    async with async_session() as session:
+        result = await session.execute(select(Job).where(Job.id == job_id))
+        job = result.scalar_one()
+        folder = f"{job.id}_{job.name.replace(' ', '_').replace('/', '_')}"
+        
+        files = []
+        if BatchExportFormat.BOM_CSV in formats:
+            chunks = [chunk async for chunk in iter_bom_csv(session, job)]
+            files.append((f"{folder}/bom.csv", "".join(chunks).encode("utf-8")))
+        if BatchExportFormat.ESTIMATE_JSON in formats:
+            estimate = await build_estimate(session, job_id)
+            files.append((f"{folder}/estimate.json", estimate.model_dump_json(indent=2).encode("utf-8")))
+        return files
+
+
+async def iter_batch_zip(
+    job_ids: List[int],
+    formats: List[BatchExportFormat]
+) -> AsyncIterator[bytes]:
+    """
+    Render jobs concurrently and yield a ZIP archive as it is written.
+    
+    At most EXPORT_BATCH_CONCURRENCY jobs render at once, each with its own
+    pooled session. Jobs are added to the archive in completion order; a
+    job that fails to render gets an error.txt entry instead.
+    """
+    semaphore = asyncio.Semaphore(app_settings.EXPORT_BATCH_CONCURRENCY)
+    
+    async def render(job_id: int):
+        async with semaphore:
+            try:
+                return job_id, await render_job_artifacts(job_id, formats)
+            except Exception as e:
+                return job_id, [(f"{job_id}_error.txt", str(e).encode("utf-8"))]
+    
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for next_done in asyncio.as_completed([render(job_id) for job_id in job_ids]):
+            job_id, files = await next_done
+            for path, content in files:
+                archive.writestr(path, content)
+            yield sink.drain()
+    yield sink.drain()
+
+
+async def write_batch_file(batch_id: str, job_ids: List[int], formats: List[BatchExportFormat]):
+    """Write a batch archive to BATCH_DIR (.part while in progress, .error on failure)"""
+    path = os.path.join(BATCH_DIR, f"{batch_id}.zip")
+    try:
+        with open(f"{path}.part", "wb") as f:
+            async for chunk in iter_batch_zip(job_ids, formats):
+                f.write(chunk)
+        os.replace(f"{path}.part", path)
+    except Exception as e:
+        with open(os.path.join(BATCH_DIR, f"{batch_id}.error"), "w") as f:
+            f.write(str(e))
+        if os.path.exists(f"{path}.part"):
+            os.remove(f"{path}.part")
+
+
+def _batch_status(batch_id: str) -> Optional[BatchExportStatus]:
+    """Status of a file batch from what exists in BATCH_DIR"""
+    path = os.path.join(BATCH_DIR, f"{batch_id}.zip")
+    if os.path.exists(path):
+        return BatchExportStatus(batch_id=batch_id, status="ready")
+    if os.path.exists(f"{path}.part"):
+        return BatchExportStatus(batch_id=batch_id, status="pending")
+    error_path = os.path.join(BATCH_DIR, f"{batch_id}.error")
+    if os.path.exists(error_path):
+        with open(error_path) as f:
+            return BatchExportStatus(batch_id=batch_id, status="failed", error=f.read())
+    return None
+
+
+@router.post("/batch")
+async def export_batch(request: BatchExportRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Export BOM/estimate files for many jobs as one ZIP archive.
+    
+    Small batches stream the ZIP in the response. Large batches (or
+    deliver="file") are written to EXPORT_DIR in the background and a
+    handle is returned (202) to poll at GET /exports/batch/{batch_id}.
+    """
+    if not (request.job_ids or request.status or request.updated_after or request.updated_before):
+        raise HTTPException(status_code=400, detail="Provide job_ids or a status/date filter")
+    if not request.formats:
+        raise HTTPException(status_code=400, detail="Provide at least one export format")
+    
+    query = select(Job.id).order_by(Job.id)
+    if request.job_ids:
+        query = query.where(Job.id.in_(request.job_ids))
+    if request.status:
+        query = query.where(Job.status == request.status)
+    if request.updated_after:
+        query = query.where(Job.updated_at >= request.updated_after)
+    if request.updated_before:
+        query = query.where(Job.updated_at < request.updated_before)
+    result = await db.execute(query)
+    job_ids = list(result.scalars().all())
+    if not job_ids:
+        raise HTTPException(status_code=404, detail="No jobs match the request")
+    
+    to_file = request.deliver == "file" or (
+        request.deliver == "auto" and len(job_ids) > app_settings.EXPORT_BATCH_STREAM_MAX_JOBS
+    )
+    
+    if not to_file:
+        filename = f"exports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        return StreamingResponse(
+            iter_batch_zip(job_ids, request.formats),
+            media_type="application/zip",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    batch_id = uuid.uuid4().hex
+    # Create the .part file up front so the handle reports "pending" immediately
+    open(os.path.join(BATCH_DIR, f"{batch_id}.zip.part"), "wb").close()
+    
+    task = asyncio.create_task(write_batch_file(batch_id, job_ids, request.formats))
+    _batch_tasks.add(task)
+    task.add_done_callback(_batch_tasks.discard)
+    
+    status = BatchExportStatus(batch_id=batch_id, status="pending", job_count=len(job_ids))
+    return JSONResponse(status_code=202, content=status.model_dump())
+
+
+@router.get("/batch/{batch_id}", response_model=BatchExportStatus)
+async def get_batch_status(batch_id: str, http_request: Request):
+    """Get the status of a batch export written to EXPORT_DIR"""
+    status = _batch_status(batch_id) if BATCH_ID_PATTERN.fullmatch(batch_id) else None
+    if not status:
+        raise HTTPException(status_code=404, detail="Batch export not found")
+    if status.status == "ready":
+        status.download_url = http_request.url_for("download_batch", batch_id=batch_id).path
+    return status
+
+
+@router.get("/batch/{batch_id}/download")
+async def download_batch(batch_id: str):
+    """Download a finished batch export archive"""
+    status = _batch_status(batch_id) if BATCH_ID_PATTERN.fullmatch(batch_id) else None
+    if not status:
+        raise HTTPException(status_code=404, detail="Batch export not found")
+    if status.status != "ready":
+        raise HTTPException(status_code=409, detail=f"Batch export is {status.status}")
+    
+    return FileResponse(
+        os.path.join(BATCH_DIR, f"{batch_id}.zip"),
+        media_type="application/zip",
+        filename=f"exports_{batch_id}.zip"
+    )
+
+
+# ============================================================
+# PARQUET ANALYTICS EXPORT
+# ============================================================
+
+@router.post("/parquet", response_model=ParquetExportResult)
+async def export_parquet(
+    tables: Optional[List[ParquetTable]] = Query(None, description="Tables to export (default: all)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Append rows changed since the last run to the Parquet dataset in
+    EXPORT_DIR/parquet, partitioned by table and month.
+    """
+    summary = await run_parquet_export(db, [table.value for table in tables] if tables else None)
+    
+    results = []
+    for table, export in summary.items():
+        watermark = export["watermark"] or {}
+        results.append(ParquetTableExport(
+            table=table,
+            rows=export["rows"],
+            files=export["files"],
+            watermark_at=watermark.get("at"),
+            watermark_id=watermark.get("id")
+        ))
+    return ParquetExportResult(tables=results)
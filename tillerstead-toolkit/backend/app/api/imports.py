@@ -3,7 +3,8 @@ Imports API router - Import data from CSV/JSON files
 """
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 import json
@@ -12,20 +13,25 @@ import io
 
 from app.db.database import get_db
 from app.db.models import Product, ImportLog, PriceSource, ProductCategory
+from app.db.projections import Projection
 from app.schemas.schemas import ImportStatus
 
 router = APIRouter(prefix="/imports", tags=["imports"])
 
+import_rows = Projection(ImportLog, ImportStatus)
+
 
 @router.get("", response_model=List[ImportStatus])
 async def list_imports(
     limit: int = 20,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
     db: AsyncSession = Depends(get_db)
 ):
     """List recent import logs"""
-    query = select(ImportLog).order_by(ImportLog.started_at.desc()).limit(limit)
+    names = import_rows.parse_fields(fields)
+    query = import_rows.select(names).order_by(ImportLog.started_at.desc()).limit(limit)
     result = await db.execute(query)
-    return result.scalars().all()
+    return ORJSONResponse(import_rows.rows(names, result))
 
 
 @router.get("/{import_id}", response_model=ImportStatus)
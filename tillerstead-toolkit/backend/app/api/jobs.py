@@ -1,32 +1,57 @@
 """
 Jobs API router - CRUD operations for jobs/projects
 """
-from typing import List, Optional
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.db.database import get_db
-from app.db.models import Job, JobStatus
-from app.schemas.schemas import JobCreate, JobUpdate, JobResponse
+from app.db.models import Job, JobStatus, JobLineItem, Room
+from app.db.projections import Projection
+from app.schemas.schemas import (
+    JobCreate, JobUpdate, JobResponse, JobFull, JobCloneRequest, JobArchiveResult, JobRiskResult,
+    RoomResponse, RoomDetail, LineItemDetail,
+    CalculatorResult, LineItemCreate, LineItemResponse, LineItemBulkResult
+)
+from app.services.archive import archive_jobs, ensure_job_hot, load_archive, record_archive_deletes
+from app.services.bom import summarize_line_items, build_bom_summary
+from app.services.job_clone import clone_job as clone_job_rows
+from app.services.risk import DEFAULT_DRAWS, MAX_DRAWS, job_risk
+from app.services.line_items import (
+    missing_products, rows_from_calculator, rows_from_line_items, write_line_items
+)
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+job_rows = Projection(Job, JobResponse)
+
 
 @router.get("", response_model=List[JobResponse])
 async def list_jobs(
     status: Optional[JobStatus] = None,
+    is_template: Optional[bool] = None,
+    archived: Optional[bool] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all jobs with optional status filter"""
-    query = select(Job).offset(skip).limit(limit)
+    """List all jobs with optional status filter and sparse fieldsets"""
+    names = job_rows.parse_fields(fields)
+    query = job_rows.select(names).offset(skip).limit(limit)
     if status:
         query = query.where(Job.status == status)
+    if is_template is not None:
+        query = query.where(Job.is_template == is_template)
+    if archived is not None:
+        query = query.where(Job.archived_at.is_not(None) if archived else Job.archived_at.is_(None))
     query = query.order_by(Job.updated_at.desc())
     result = await db.execute(query)
-    return result.scalars().all()
+    return ORJSONResponse(job_rows.rows(names, result))
 
 
 @router.get("/{job_id}", response_model=JobResponse)
@@ -39,6 +64,79 @@ async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
     return job
 
 
+@router.get("/{job_id}/full", response_model=JobFull)
+async def get_job_full(job_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Get a job with its rooms, line items (grouped per room) and totals.
+    
+    Loads job -> rooms and job -> line items -> products with selectinload,
+    so the query count stays fixed regardless of job size. Archived jobs
+    are read from their archive without rehydrating.
+    """
+    result = await db.execute(
+        select(Job)
+        .options(
+            selectinload(Job.rooms),
+            selectinload(Job.line_items).selectinload(JobLineItem.product),
+        )
+        .where(Job.id == job_id)
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.archived_at is not None:
+        archived = await load_archive(db, job_id)
+        if archived:
+            set_committed_value(job, "rooms", archived[0])
+            set_committed_value(job, "line_items", archived[1])
+    
+    items_by_room = {}
+    for item in sorted(job.line_items, key=lambda i: i.id):
+        items_by_room.setdefault(item.room_id, []).append(LineItemDetail.model_validate(item))
+    
+    rooms = []
+    for room in sorted(job.rooms, key=lambda r: r.name):
+        line_items = items_by_room.pop(room.id, [])
+        rooms.append(RoomDetail(
+            **RoomResponse.model_validate(room).model_dump(),
+            line_items=line_items,
+            subtotal=round(sum(item.extended_price for item in line_items), 2),
+        ))
+    
+    # Items without a room, or pointing at a room that no longer exists
+    unassigned = [item for items in items_by_room.values() for item in items]
+    
+    aggregate = summarize_line_items(
+        job.line_items, {room.id: room.name for room in job.rooms}
+    )
+    
+    return JobFull(
+        **JobResponse.model_validate(job).model_dump(),
+        rooms=rooms,
+        unassigned_line_items=unassigned,
+        bom=build_bom_summary(job, aggregate),
+    )
+
+
+@router.get("/{job_id}/risk", response_model=JobRiskResult)
+async def get_job_risk(
+    job_id: int,
+    draws: int = Query(DEFAULT_DRAWS, ge=1000, le=MAX_DRAWS),
+    target_percentile: float = Query(80.0, ge=50, le=99.9),
+    seed: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Simulate the job's total from quantity and price uncertainty and
+    recommend a contingency covering target_percentile
+    """
+    result = await db.execute(select(Job).where(Job.id == job_id))
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await job_risk(db, job, draws, target_percentile, seed)
+
+
 @router.post("", response_model=JobResponse, status_code=201)
 async def create_job(job_data: JobCreate, db: AsyncSession = Depends(get_db)):
     """Create a new job"""
@@ -49,6 +147,117 @@ async def create_job(job_data: JobCreate, db: AsyncSession = Depends(get_db)):
     return job
 
 
+@router.post("/archive", response_model=JobArchiveResult)
+async def archive_finished_jobs(
+    older_than_days: Optional[int] = Query(None, ge=0, description="Default: ARCHIVE_AFTER_DAYS"),
+    limit: Optional[int] = Query(None, ge=1, description="Max jobs to archive in this run"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Move rooms and line items of old completed/cancelled jobs to the archive.
+    
+    The job rows stay as stubs (archived_at set). Reads are served from the
+    archive; writing to a job's rooms or line items rehydrates it.
+    """
+    return await archive_jobs(db, older_than_days, limit)
+
+
+@router.post("/{job_id}/clone", response_model=JobResponse, status_code=201)
+async def clone_job(
+    job_id: int,
+    options: Optional[JobCloneRequest] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Clone a job with its rooms and line items in one transaction"""
+    options = options or JobCloneRequest()
+    
+    result = await db.execute(select(Job.id).where(Job.id == job_id))
+    if not result.scalar_one_or_none():
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    try:
+        new_job_id = await clone_job_rows(db, job_id, options)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    await db.commit()
+    
+    result = await db.execute(select(Job).where(Job.id == new_job_id))
+    return result.scalar_one()
+
+
+@router.post("/{job_id}/save-as-template", response_model=JobResponse, status_code=201)
+async def save_job_as_template(
+    job_id: int,
+    options: Optional[JobCloneRequest] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Save a copy of a job as a reusable template"""
+    options = (options or JobCloneRequest()).model_copy(update={"as_template": True})
+    return await clone_job(job_id, options, db)
+
+
+@router.post(
+    "/{job_id}/line-items:bulk", response_model=LineItemBulkResult, status_code=201,
+    dependencies=[Depends(ensure_job_hot)]
+)
+async def bulk_create_line_items(
+    job_id: int,
+    payload: Union[CalculatorResult, List[LineItemCreate]],
+    room_id: Optional[int] = Query(None, description="Room for calculator output"),
+    replace: bool = Query(True, description="Replace existing lines from the same calculator and room"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Persist calculator output (or a list of line items) in one statement.
+    
+    SKUs are resolved to products in a single query and priced from the
+    price book. With replace=true, the previous lines from the same
+    calculator/room are swapped out in the same transaction.
+    """
+    result = await db.execute(select(Job.id).where(Job.id == job_id))
+    if not result.scalar_one_or_none():
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    unresolved = []
+    targets = None
+    if isinstance(payload, CalculatorResult):
+        rows, unresolved = await rows_from_calculator(db, job_id, room_id, payload)
+        targets = {(payload.calculator_type, room_id)}
+    else:
+        if any(item.job_id != job_id for item in payload):
+            raise HTTPException(status_code=400, detail="Line items must belong to the job in the path")
+        missing = await missing_products(
+            db, {item.product_id for item in payload if item.product_id is not None}
+        )
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Product(s) not found: {missing}")
+        rows = rows_from_line_items(payload)
+    
+    room_ids = {row["room_id"] for row in rows if row.get("room_id") is not None}
+    if targets and room_id is not None:
+        room_ids.add(room_id)
+    if room_ids:
+        result = await db.execute(
+            select(Room.id).where(Room.id.in_(room_ids), Room.job_id == job_id)
+        )
+        missing = room_ids - set(result.scalars().all())
+        if missing:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Room(s) not found in job: {sorted(missing)}"
+            )
+    
+    replaced, created = await write_line_items(db, job_id, rows, replace=replace, targets=targets)
+    await db.commit()
+    
+    return LineItemBulkResult(
+        job_id=job_id,
+        replaced=replaced,
+        created=[LineItemResponse.model_validate(item) for item in created],
+        unresolved_skus=unresolved,
+    )
+
+
 @router.patch("/{job_id}", response_model=JobResponse)
 async def update_job(
     job_id: int,
@@ -78,5 +287,7 @@ async def delete_job(job_id: int, db: AsyncSession = Depends(get_db)):
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    if job.archived_at is not None:
+        await record_archive_deletes(db, job_id)
     await db.delete(job)
     await db.commit()
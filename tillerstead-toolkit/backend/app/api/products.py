@@ -3,15 +3,22 @@ Products API router - Product catalog CRUD and search
 """
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy import select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
 from app.db.models import Product, ProductCategory
 from app.schemas.schemas import ProductCreate, ProductUpdate, ProductResponse
+from app.core.responses import model_json_response
+from app.db.projections import Projection
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+product_list_adapter = TypeAdapter(List[ProductResponse])
+product_rows = Projection(Product, ProductResponse)
+
 
 @router.get("", response_model=List[ProductResponse])
 async def list_products(
@@ -20,10 +27,12 @@ async def list_products(
     active_only: bool = True,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
     db: AsyncSession = Depends(get_db)
 ):
-    """List products with optional filters"""
-    query = select(Product).offset(skip).limit(limit)
+    """List products with optional filters and sparse fieldsets"""
+    names = product_rows.parse_fields(fields)
+    query = product_rows.select(names).offset(skip).limit(limit)
     
     if active_only:
         query = query.where(Product.is_active == True)
@@ -34,7 +43,7 @@ async def list_products(
     
     query = query.order_by(Product.name)
     result = await db.execute(query)
-    return result.scalars().all()
+    return ORJSONResponse(product_rows.rows(names, result))
 
 
 @router.get("/search", response_model=List[ProductResponse])
@@ -62,7 +71,7 @@ async def search_products(
     
     query = query.limit(limit)
     result = await db.execute(query)
-    return result.scalars().all()
+    return model_json_response(product_list_adapter, result.scalars().all())
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
@@ -0,0 +1,75 @@
+"""
+Reports API router - Portfolio spend and margin analytics
+
+Reports read job_rollups as last refreshed by the background rollup task
+(every ROLLUP_REFRESH_SECONDS when there are changes); they never write.
+"""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_db
+from app.schemas.schemas import CategorySpendRow, StatusMarginRow, VendorSpendRow
+from app.services.reports import spend_by_category, margin_by_status, top_vendors
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+@router.get("/spend-by-category", response_model=List[CategorySpendRow])
+async def get_spend_by_category(
+    start: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="First month (YYYY-MM)"),
+    end: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Last month (YYYY-MM)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Materials spend by product category per month (template jobs excluded)"""
+    rows = await spend_by_category(db, start, end)
+    return [
+        CategorySpendRow(month=month, category=category, item_count=count, spend=_round(spend))
+        for month, category, count, spend in rows
+    ]
+
+
+@router.get("/margin-by-status", response_model=List[StatusMarginRow])
+async def get_margin_by_status(
+    start: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="First month (YYYY-MM)"),
+    end: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Last month (YYYY-MM)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Average materials margin by job status.
+    
+    Margin is (price - product cost) / price over line items whose product
+    has a known cost, computed per job and then averaged.
+    """
+    rows = await margin_by_status(db, start, end)
+    return [
+        StatusMarginRow(
+            status=status,
+            job_count=job_count,
+            spend=_round(spend),
+            cost=_round(cost),
+            avg_margin_percent=_round(margin)
+        )
+        for status, job_count, spend, cost, margin in rows
+    ]
+
+
+@router.get("/top-vendors", response_model=List[VendorSpendRow])
+async def get_top_vendors(
+    limit: int = Query(10, ge=1, le=100),
+    start: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="First month (YYYY-MM)"),
+    end: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Last month (YYYY-MM)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Vendors ranked by materials spend"""
+    rows = await top_vendors(db, limit, start, end)
+    return [
+        VendorSpendRow(vendor=vendor, job_count=job_count, item_count=count, spend=_round(spend))
+        for vendor, job_count, count, spend in rows
+    ]
@@ -1,27 +1,45 @@
 """
 Rooms API router - CRUD operations for rooms within jobs
 """
-from typing import List
+import asyncio
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
-from app.db.models import Room, Job
-from app.schemas.schemas import RoomCreate, RoomUpdate, RoomResponse
+from app.db.models import Room, Job, Product
+from app.db.projections import Projection
+from app.services.archive import load_archive, rehydrate_job
+from app.schemas.schemas import (
+    RoomCreate, RoomUpdate, RoomResponse, RoomGeometry, RoomDimensions,
+    TileLayoutRequest, TileLayoutResult, TileSweepRequest, TileSweepResult
+)
+from app.services.geometry import room_geometry
+from app.services.tile_layout import MAX_LAYOUT_TILES, estimate_layout_tiles, plan_layout, sweep_layouts
 
 router = APIRouter(prefix="/rooms", tags=["rooms"])
 
+room_rows = Projection(Room, RoomResponse, validate=("dimensions",))
+
 
 @router.get("", response_model=List[RoomResponse])
 async def list_rooms(
     job_id: int = Query(..., description="Filter rooms by job ID"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all rooms for a specific job"""
-    query = select(Room).where(Room.job_id == job_id).order_by(Room.name)
+    """List all rooms for a specific job (from its archive if archived)"""
+    names = room_rows.parse_fields(fields)
+    archived = await load_archive(db, job_id, with_products=False)
+    if archived is not None:
+        rooms = sorted(archived[0], key=lambda room: room.name)
+        return ORJSONResponse(room_rows.rows(names, [[getattr(room, name) for name in names] for room in rooms]))
+    
+    query = room_rows.select(names).where(Room.job_id == job_id).order_by(Room.name)
     result = await db.execute(query)
-    return result.scalars().all()
+    return ORJSONResponse(room_rows.rows(names, result))
 
 
 @router.get("/{room_id}", response_model=RoomResponse)
@@ -34,6 +52,88 @@ async def get_room(room_id: int, db: AsyncSession = Depends(get_db)):
     return room
 
 
+@router.get("/{room_id}/geometry", response_model=RoomGeometry)
+async def get_room_geometry(room_id: int, db: AsyncSession = Depends(get_db)):
+    """Floor area, wall area, perimeter and corners compiled from the room's dimensions"""
+    result = await db.execute(select(Room).where(Room.id == room_id))
+    room = result.scalar_one_or_none()
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    
+    try:
+        geometry = await room_geometry(db, room)
+    except (ValueError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid room dimensions: {e}")
+    if geometry is None:
+        raise HTTPException(status_code=404, detail="Room has no dimensions")
+    await db.commit()
+    return geometry
+
+
+@router.post("/{room_id}/tile-layout", response_model=TileLayoutResult)
+async def get_tile_layout(room_id: int, request: TileLayoutRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Lay the tile over the room's floor and count full tiles, cuts and
+    offcut reuse at the start offset that needs the fewest tiles.
+    
+    Layouts expected to need more than MAX_LAYOUT_TILES tiles are rejected
+    with 422; compare those with the tile sweep instead.
+    """
+    result = await db.execute(select(Room).where(Room.id == room_id))
+    room = result.scalar_one_or_none()
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    if not room.dimensions:
+        raise HTTPException(status_code=404, detail="Room has no dimensions")
+    
+    try:
+        dimensions = RoomDimensions.model_validate(room.dimensions)
+        tiles = estimate_layout_tiles(dimensions, request)
+    except (ValueError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid room dimensions: {e}")
+    if tiles > MAX_LAYOUT_TILES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Layout needs about {tiles} tiles (max {MAX_LAYOUT_TILES}); use the tile sweep for this room"
+        )
+    
+    try:
+        return await asyncio.to_thread(plan_layout, dimensions, request)
+    except (ValueError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid room dimensions: {e}")
+
+
+@router.post("/{room_id}/tile-sweep", response_model=TileSweepResult)
+async def get_tile_sweep(room_id: int, request: TileSweepRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Compare tile options and size x box grids across layout patterns for
+    the room: estimated tiles, boxes and cost per scenario, priced from the
+    catalog, with the cheapest refine_top layouts counted by the optimizer
+    """
+    result = await db.execute(select(Room).where(Room.id == room_id))
+    room = result.scalar_one_or_none()
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    if not room.dimensions:
+        raise HTTPException(status_code=404, detail="Room has no dimensions")
+    
+    product_ids = {option.product_id for option in request.options if option.product_id is not None}
+    products = {}
+    if product_ids:
+        result = await db.execute(select(Product).where(Product.id.in_(product_ids)))
+        products = {product.id: product for product in result.scalars().all()}
+        missing = sorted(product_ids - products.keys())
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Products not found: {missing}")
+    
+    try:
+        return await asyncio.to_thread(
+            sweep_layouts, RoomDimensions.model_validate(room.dimensions), request, products
+        )
+    except (ValueError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid room dimensions: {e}")
+
+
 @router.post("", response_model=RoomResponse, status_code=201)
 async def create_room(room_data: RoomCreate, db: AsyncSession = Depends(get_db)):
     """Create a new room in a job"""
@@ -41,6 +141,7 @@ async def create_room(room_data: RoomCreate, db: AsyncSession = Depends(get_db))
     job_result = await db.execute(select(Job).where(Job.id == room_data.job_id))
     if not job_result.scalar_one_or_none():
         raise HTTPException(status_code=404, detail="Job not found")
+    await rehydrate_job(db, room_data.job_id)
     
     room_dict = room_data.model_dump()
     if room_dict.get("dimensions"):
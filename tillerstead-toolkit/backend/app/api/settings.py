@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import result_caches
 from app.db.database import get_db
 from app.db.models import CalculatorPreset
 from app.schemas.schemas import PresetCreate, PresetResponse
@@ -162,3 +163,13 @@ async def set_default_preset(preset_id: int, db: AsyncSession = Depends(get_db))
     await db.commit()
     await db.refresh(preset)
     return preset
+
+
+# ============================================================
+# CACHES
+# ============================================================
+
+@router.get("/caches")
+async def get_cache_stats():
+    """Hit rate, size and eviction metrics of the memoized result caches"""
+    return {name: cache.stats() for name, cache in sorted(result_caches.items())}
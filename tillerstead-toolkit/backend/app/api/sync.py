@@ -0,0 +1,135 @@
+"""
+Sync API router - Delta sync for offline clients
+
+Sync tokens are change_log sequence numbers. On a backend with concurrent
+writers (PostgreSQL) sequence values are assigned at flush but become
+visible at commit, so seq N can be readable while N-1 is still in flight.
+The token handed out is therefore held back before any change younger than
+SYNC_SETTLE_SECONDS: those changes are sent now and again on the next sync
+(clients apply upserts and tombstones idempotently). SQLite serializes
+writers, so the token there is not held back.
+"""
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import engine, get_db
+from app.db.models import ChangeLogEntry
+from app.db.changes import SYNCED_ENTITIES, UPSERT
+from app.schemas.schemas import (
+    JobResponse, RoomResponse, LineItemResponse, ProductResponse, PresetResponse,
+    SyncResponse, SyncUpserts, SyncTombstones
+)
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+# Entity name -> (model, response schema)
+ENTITY_MODELS = {entity: model for model, entity in SYNCED_ENTITIES.items()}
+ENTITY_SCHEMAS = {
+    "jobs": JobResponse,
+    "rooms": RoomResponse,
+    "line_items": LineItemResponse,
+    "products": ProductResponse,
+    "presets": PresetResponse,
+}
+
+
+@router.get("", response_model=SyncResponse)
+async def get_changes(
+    since: int = Query(0, ge=0, description="Token from the previous sync (0 for a full sync)"),
+    limit: int = Query(1000, ge=1, le=5000, description="Max change entries to scan"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get everything that changed after a sync token.
+    
+    Changes are compacted per row: each row appears once, either as its
+    current state (upsert) or as a tombstone. Keep calling with next_token
+    while has_more is true. Recent changes may be sent again on the next
+    call (see module docstring).
+    """
+    # Upper bound of this page in the change sequence
+    result = await db.execute(
+        select(ChangeLogEntry.seq)
+        .where(ChangeLogEntry.seq > since)
+        .order_by(ChangeLogEntry.seq)
+        .offset(limit - 1)
+        .limit(1)
+    )
+    upper = result.scalar_one_or_none()
+    has_more = upper is not None
+    if upper is None:
+        result = await db.execute(select(func.max(ChangeLogEntry.seq)))
+        upper = max(result.scalar_one_or_none() or 0, since)
+    if has_more:
+        result = await db.execute(
+            select(ChangeLogEntry.seq).where(ChangeLogEntry.seq > upper).limit(1)
+        )
+        has_more = result.scalar_one_or_none() is not None
+    
+    # Hold the token back before changes that may have later-committing
+    # predecessors; they are re-read (and de-duplicated) next time
+    next_token = upper
+    if engine.dialect.name != "sqlite" and settings.SYNC_SETTLE_SECONDS > 0:
+        settled_before = datetime.utcnow() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+        result = await db.execute(
+            select(func.min(ChangeLogEntry.seq))
+            .where(
+                ChangeLogEntry.seq > since,
+                ChangeLogEntry.seq <= upper,
+                ChangeLogEntry.changed_at > settled_before,
+            )
+        )
+        recent = result.scalar_one_or_none()
+        if recent is not None:
+            next_token = max(recent - 1, since)
+            # Stop paging here; the client resumes from next_token later
+            has_more = False
+    
+    # Latest operation per (entity, id) within the page
+    latest = (
+        select(
+            ChangeLogEntry.entity,
+            ChangeLogEntry.entity_id,
+            func.max(ChangeLogEntry.seq).label("seq"),
+        )
+        .where(ChangeLogEntry.seq > since, ChangeLogEntry.seq <= upper)
+        .group_by(ChangeLogEntry.entity, ChangeLogEntry.entity_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(latest.c.entity, latest.c.entity_id, ChangeLogEntry.op)
+        .join(ChangeLogEntry, ChangeLogEntry.seq == latest.c.seq)
+    )
+    
+    upsert_ids = {entity: [] for entity in ENTITY_MODELS}
+    tombstones = SyncTombstones()
+    for entity, entity_id, op in result.all():
+        if entity not in ENTITY_MODELS:
+            continue
+        if op == UPSERT:
+            upsert_ids[entity].append(entity_id)
+        else:
+            getattr(tombstones, entity).append(entity_id)
+    
+    # One query per entity type for the current row state. Rows deleted
+    # after this page are skipped; their tombstones come in a later page.
+    upserts = SyncUpserts()
+    for entity, ids in upsert_ids.items():
+        if not ids:
+            continue
+        model = ENTITY_MODELS[entity]
+        schema = ENTITY_SCHEMAS[entity]
+        rows = await db.execute(select(model).where(model.id.in_(ids)).order_by(model.id))
+        setattr(upserts, entity, [schema.model_validate(row) for row in rows.scalars().all()])
+    
+    return SyncResponse(
+        since=since,
+        next_token=next_token,
+        has_more=has_more,
+        upserts=upserts,
+        tombstones=tombstones,
+    )
@@ -0,0 +1,230 @@
+"""
+Caching utilities - In-process LRU and memoization of pure functions
+"""
+import functools
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, get_type_hints
+
+import orjson
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by entry count and total size.
+    
+    Size is measured with `sizeof` (len() by default, i.e. bytes for
+    serialized payloads). Values larger than max_bytes are not cached.
+    Safe to share between the event loop and worker threads.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        sizeof: Callable[[Any], int] = len
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(value)
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return
+            
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+    
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            return self._pop(key)
+    
+    def _pop(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.total_bytes -= entry[1]
+        return entry[0]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Every ResultCache by name, for metrics
+result_caches: Dict[str, "ResultCache"] = {}
+
+
+def input_key(data: Any) -> str:
+    """Hash of the canonical JSON form of a (validated) input"""
+    if isinstance(data, BaseModel):
+        data = data.model_dump(mode="json")
+    return hashlib.sha256(orjson.dumps(data, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class ResultCache:
+    """
+    Memoizes a pure function of one validated pydantic input.
+    
+    Keys hash the input's canonical JSON together with `version`, so bumping
+    the version when the function's logic changes invalidates old results.
+    Results are kept in a per-process LRU bounded by entries and serialized
+    bytes and, when redis_url is set, in Redis so workers share them. Redis
+    failures are counted and treated as misses.
+    
+    Cached results are shared between callers and must not be mutated.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        max_entries: int,
+        max_bytes: int,
+        redis_url: Optional[str] = None,
+        ttl_seconds: int = 86400
+    ):
+        self.name = name
+        self.version = version
+        self.local = LRUCache(max_entries, max_bytes, sizeof=lambda entry: entry[1])
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self.redis_hits = 0
+        self.redis_errors = 0
+        self._redis = None
+        result_caches[name] = self
+    
+    def key(self, data: Any) -> str:
+        return f"{self.name}:{self.version}:{input_key(data)}"
+    
+    def _client(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=0.05, socket_connect_timeout=0.05
+            )
+        return self._redis
+    
+    def get(self, key: str, adapter: TypeAdapter) -> Optional[Any]:
+        entry = self.local.get(key)
+        if entry is not None:
+            return entry[0]
+        if not self.redis_url:
+            return None
+        
+        try:
+            payload = self._client().get(key)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning("Result cache %s: Redis get failed: %s", self.name, e)
+            return None
+        if payload is None:
+            return None
+        
+        self.redis_hits += 1
+        value = adapter.validate_json(payload)
+        self.local.set(key, (value, len(payload)))
+        return value
+    
+    def set(self, key: str, value: Any, adapter: TypeAdapter) -> None:
+        payload = adapter.dump_json(value)
+        self.local.set(key, (value, len(payload)))
+        if not self.redis_url:
+            return
+        try:
+            self._client().set(key, payload, ex=self.ttl_seconds)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning("Result cache %s: Redis set failed: %s", self.name, e)
+    
+    def __call__(self, fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """Decorate fn(data) -> result; the return annotation types Redis payloads"""
+        adapter = TypeAdapter(get_type_hints(fn)["return"])
+        
+        @functools.wraps(fn)
+        def wrapper(data):
+            key = self.key(data)
+            value = self.get(key, adapter)
+            if value is None:
+                value = fn(data)
+                self.set(key, value, adapter)
+            return value
+        
+        wrapper.cache = self
+        return wrapper
+    
+    def clear(self) -> None:
+        """Drop this process's entries (Redis entries expire by TTL or version)"""
+        self.local.clear()
+    
+    def stats(self) -> dict:
+        stats = self.local.stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "version": self.version,
+            "redis": bool(self.redis_url),
+            "redis_hits": self.redis_hits,
+            "redis_errors": self.redis_errors,
+            "hit_rate": round((stats["hits"] + self.redis_hits) / lookups, 4) if lookups else 0.0,
+        })
+        return stats
+
+
+def memoize(name: str, version: str) -> ResultCache:
+    """ResultCache sized and shared according to settings, for use as a decorator"""
+    return ResultCache(
+        name,
+        version,
+        max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+        max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+        redis_url=settings.REDIS_URL if settings.RESULT_CACHE_SHARED else None,
+        ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS
+    )
@@ -23,6 +23,39 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "./uploads"
     EXPORT_DIR: str = "./exports"
     
+    # Batch exports
+    EXPORT_BATCH_CONCURRENCY: int = 4  # Jobs rendered at once
+    EXPORT_BATCH_STREAM_MAX_JOBS: int = 25  # Larger batches are written to EXPORT_DIR
+    
+    # Serialized estimate cache (per process)
+    ESTIMATE_CACHE_MAX_ENTRIES: int = 512
+    ESTIMATE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    
+    # Memoized results of pure functions (per process, optionally shared via REDIS_URL)
+    RESULT_CACHE_MAX_ENTRIES: int = 4096
+    RESULT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    RESULT_CACHE_SHARED: bool = False
+    RESULT_CACHE_TTL_SECONDS: int = 86400
+    
+    # PDF estimates
+    PDF_RENDER_WORKERS: int = 2  # Render worker processes
+    PDF_CACHE_MAX_BYTES: int = 200 * 1024 * 1024  # Rendered PDF cache in EXPORT_DIR
+    
+    # Parquet analytics export
+    PARQUET_BATCH_ROWS: int = 10000  # Rows per cursor fetch / row group
+    
+    # Delta sync: changes newer than this are re-sent on the next sync, so rows
+    # from transactions that commit after a later sequence number are not
+    # skipped (must exceed the longest write transaction; unused on SQLite)
+    SYNC_SETTLE_SECONDS: int = 10
+    
+    # Archive tier: completed/cancelled jobs untouched this long move to job_archives
+    ARCHIVE_AFTER_DAYS: int = 365
+    
+    # Portfolio reports: how often the background task checks the change feed
+    # against the rollup watermark and refreshes job_rollups
+    ROLLUP_REFRESH_SECONDS: int = 30
+    
     # Connectors
     HOMEDEPOT_FEED_PATH: Optional[str] = None
     THIRDPARTY_API_KEY: Optional[str] = None
@@ -0,0 +1,28 @@
+"""
+Response helpers - Fast JSON serialization for API responses
+"""
+from typing import Any
+
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import TypeAdapter
+
+# Default response class for the app: orjson serializes datetimes, enums and
+# dataclasses natively and is several times faster than stdlib json
+DefaultJSONResponse = ORJSONResponse
+
+
+def model_json_response(adapter: TypeAdapter, data: Any, status_code: int = 200) -> Response:
+    """
+    Validate data (e.g. ORM objects) against a response type and serialize it
+    to JSON in a single pydantic-core pass.
+    
+    Skips FastAPI's response_model path (validate -> to_python -> encode),
+    which walks every object twice. Keep response_model on the route for the
+    OpenAPI schema.
+    """
+    value = adapter.validate_python(data, from_attributes=True)
+    return Response(
+        content=adapter.dump_json(value),
+        status_code=status_code,
+        media_type="application/json"
+    )
@@ -0,0 +1,129 @@
+"""
+Change tracking - change_log sequence and job versions
+
+Writes to synced tables are appended to the change_log sequence, and any
+change to a job, its rooms or its line items bumps Job.version. ORM writes
+are captured automatically by session flush listeners. Bulk Core
+statements (INSERT ... SELECT, multi-row INSERT, bulk DELETE) bypass the
+unit of work, so callers record those with record_changes() and
+bump_job_versions().
+"""
+from datetime import datetime
+from typing import Iterable, Set
+
+from sqlalchemy import event, insert, inspect, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.models import (
+    Job, Room, JobLineItem, Product, CalculatorPreset, ChangeLogEntry
+)
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+# Synced models and the entity names used in the feed
+SYNCED_ENTITIES = {
+    Job: "jobs",
+    Room: "rooms",
+    JobLineItem: "line_items",
+    Product: "products",
+    CalculatorPreset: "presets",
+}
+
+
+async def record_changes(
+    db: AsyncSession,
+    entity: str,
+    ids: Iterable[int],
+    op: str = UPSERT
+) -> None:
+    """Append change entries for rows written outside the ORM unit of work"""
+    now = datetime.utcnow()
+    rows = [
+        {"entity": entity, "entity_id": entity_id, "op": op, "changed_at": now}
+        for entity_id in ids
+    ]
+    if rows:
+        await db.execute(insert(ChangeLogEntry), rows)
+
+
+async def bump_job_versions(db: AsyncSession, job_ids: Iterable[int]) -> None:
+    """
+    Bump versions of jobs whose rooms/line items were written in bulk.
+    
+    updated_at is left alone: it dates edits to the job itself (archiving
+    ages jobs by it), and rehydrating an archived job goes through here.
+    """
+    job_ids = set(job_ids)
+    if job_ids:
+        await db.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids))
+            .values(version=Job.version + 1, updated_at=Job.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_flush_versions(session: Session, flush_context, instances) -> None:
+    """Bump Job.version for jobs whose row, rooms or line items are in this flush"""
+    job_ids: Set[int] = set()
+    
+    for obj in session.dirty:
+        if isinstance(obj, Job) and session.is_modified(obj, include_collections=False):
+            job_ids.add(obj.id)
+    
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Room, JobLineItem)) and obj.job_id is not None:
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            job_ids.add(obj.job_id)
+    
+    deleted_jobs = {obj.id for obj in session.deleted if isinstance(obj, Job)}
+    job_ids -= deleted_jobs
+    if not job_ids:
+        return
+    
+    # Jobs loaded in this session are bumped in place; the rest with one UPDATE
+    unloaded = set()
+    for job_id in job_ids:
+        job = session.identity_map.get(Session.identity_key(Job, job_id))
+        if job is None:
+            unloaded.add(job_id)
+        elif "version" in inspect(job).unloaded:
+            job.version = Job.version + 1
+        else:
+            job.version = (job.version or 0) + 1
+    
+    if unloaded:
+        session.connection().execute(
+            update(Job.__table__)
+            .where(Job.__table__.c.id.in_(unloaded))
+            .values(version=Job.__table__.c.version + 1)
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush_changes(session: Session, flush_context) -> None:
+    """Append change entries for every synced object written by this flush"""
+    now = datetime.utcnow()
+    rows = []
+    
+    for obj in session.new:
+        entity = SYNCED_ENTITIES.get(type(obj))
+        if entity:
+            rows.append({"entity": entity, "entity_id": obj.id, "op": UPSERT, "changed_at": now})
+    
+    for obj in session.dirty:
+        entity = SYNCED_ENTITIES.get(type(obj))
+        if entity and session.is_modified(obj, include_collections=False):
+            rows.append({"entity": entity, "entity_id": obj.id, "op": UPSERT, "changed_at": now})
+    
+    for obj in session.deleted:
+        entity = SYNCED_ENTITIES.get(type(obj))
+        if entity:
+            rows.append({"entity": entity, "entity_id": obj.id, "op": DELETE, "changed_at": now})
+    
+    if rows:
+        session.connection().execute(insert(ChangeLogEntry.__table__), rows)
@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import Optional, List
 from sqlalchemy import (
     Column, Integer, String, Float, DateTime, ForeignKey, 
-    Text, Boolean, JSON, Enum as SQLEnum
+    Text, Boolean, JSON, LargeBinary, Enum as SQLEnum
 )
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -148,12 +148,22 @@ class Job(Base):
     
     notes = Column(Text)
     
+    # Templates are reusable starting points for cloning new jobs
+    is_template = Column(Boolean, default=False, index=True)
+    
+    # Bumped on any change to the job, its rooms or its line items
+    version = Column(Integer, default=1, nullable=False)
+    
+    # Set while rooms and line items live in job_archives (see services/archive.py)
+    archived_at = Column(DateTime, index=True)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     rooms = relationship("Room", back_populates="job", cascade="all, delete-orphan")
     line_items = relationship("JobLineItem", back_populates="job", cascade="all, delete-orphan")
+    archive = relationship("JobArchive", uselist=False, cascade="all, delete-orphan")
 
 
 class Room(Base):
@@ -169,6 +179,10 @@ class Room(Base):
     # Dimensions (stored as JSON for flexibility)
     dimensions = Column(JSON)  # {length, width, height, shapes: [...]}
     
+    # Compiled RoomGeometry, valid while geometry_hash matches the dimensions
+    geometry = Column(JSON)
+    geometry_hash = Column(String(64))
+    
     notes = Column(Text)
     
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -220,6 +234,24 @@ class JobLineItem(Base):
     product = relationship("Product", back_populates="line_items")
 
 
+# ============================================================
+# ARCHIVE
+# ============================================================
+
+class JobArchive(Base):
+    """Compressed rooms and line items of an archived job"""
+    __tablename__ = "job_archives"
+    
+    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True)
+    
+    room_count = Column(Integer, default=0)
+    line_item_count = Column(Integer, default=0)
+    raw_bytes = Column(Integer, default=0)  # Uncompressed payload size
+    payload = Column(LargeBinary, nullable=False)  # zlib-compressed JSON {rooms, line_items}
+    
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
 # ============================================================
 # CALCULATOR PRESETS
 # ============================================================
@@ -266,3 +298,59 @@ class ImportLog(Base):
     completed_at = Column(DateTime)
     
     status = Column(String(50), default="pending")  # pending, running, completed, failed
+
+
+# ============================================================
+# CHANGE FEED
+# ============================================================
+
+class ChangeLogEntry(Base):
+    """Append-only change sequence used for offline delta sync"""
+    __tablename__ = "change_log"
+    __table_args__ = {"sqlite_autoincrement": True}  # Never reuse sequence numbers
+    
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(50), nullable=False)  # jobs, rooms, line_items, products, presets
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False)  # upsert, delete
+    
+    changed_at = Column(DateTime, default=datetime.utcnow)
+
+
+# ============================================================
+# REPORTING ROLLUPS
+# ============================================================
+
+class JobRollup(Base):
+    """Pre-aggregated line item spend per job, month, category and vendor"""
+    __tablename__ = "job_rollups"
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, nullable=False, index=True)
+    
+    month = Column(String(7), nullable=False, index=True)  # YYYY-MM of line item creation
+    job_status = Column(SQLEnum(JobStatus))
+    category = Column(SQLEnum(ProductCategory))
+    vendor = Column(String(100))  # Null for unmapped items
+    
+    item_count = Column(Integer, default=0)
+    spend = Column(Float, default=0.0)  # Sum of extended prices
+    costed_spend = Column(Float, default=0.0)  # Spend on items whose product cost is known
+    cost = Column(Float, default=0.0)  # Product cost of those items
+
+
+class JobRollupState(Base):
+    """Job version each job's rollup rows were built from"""
+    __tablename__ = "job_rollup_state"
+    
+    job_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RollupWatermark(Base):
+    """Change feed position a rollup has consumed"""
+    __tablename__ = "rollup_watermarks"
+    
+    name = Column(String(50), primary_key=True)
+    seq = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,78 @@
+"""
+Projections - Column-projected reads for list endpoints
+
+List pages select only the columns their response needs as plain row
+tuples and pack them into slotted dataclasses, skipping ORM identity-map
+bookkeeping and per-row model validation. orjson serializes the
+dataclasses directly (enums by value, datetimes as ISO 8601), so the rows
+go straight to ORJSONResponse. Columns whose stored value is not already
+in response shape (JSON documents with defaults, e.g. room dimensions) are
+named in `validate` and pass through their schema field's type on packing.
+
+Clients can ask for a sparse fieldset with ?fields=id,name,sku to skip
+wide columns such as notes, descriptions and JSON specifications.
+"""
+from dataclasses import make_dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Select, select
+
+
+class Projection:
+    """Column-projected reads of one model shaped like a response schema"""
+    
+    def __init__(self, model: Any, schema: Type[BaseModel], validate: Iterable[str] = ()):
+        self.model = model
+        self.fields: Tuple[str, ...] = tuple(schema.model_fields)
+        self.columns = {name: getattr(model, name) for name in self.fields}
+        self.adapters = {
+            name: TypeAdapter(schema.model_fields[name].annotation) for name in validate
+        }
+        self._row_types: Dict[Tuple[str, ...], type] = {}
+    
+    def parse_fields(self, fields: Optional[str]) -> Tuple[str, ...]:
+        """Validate a ?fields= value, returning names in schema order"""
+        if not fields:
+            return self.fields
+        
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        if not requested:
+            raise HTTPException(status_code=400, detail="No fields requested")
+        unknown = requested - set(self.fields)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        return tuple(name for name in self.fields if name in requested)
+    
+    def row_type(self, names: Tuple[str, ...]) -> type:
+        """Slotted dataclass for a fieldset (built once per distinct fieldset)"""
+        row_type = self._row_types.get(names)
+        if row_type is None:
+            row_type = make_dataclass(
+                f"{self.model.__name__}Row", names, slots=True, frozen=True
+            )
+            self._row_types[names] = row_type
+        return row_type
+    
+    def select(self, names: Tuple[str, ...]) -> Select:
+        """SELECT of just the columns for a fieldset"""
+        return select(*(self.columns[name] for name in names))
+    
+    def rows(self, names: Tuple[str, ...], result: Iterable[tuple]) -> List[Any]:
+        """Pack result tuples into row objects"""
+        row_type = self.row_type(names)
+        adapted = [(index, self.adapters[name]) for index, name in enumerate(names) if name in self.adapters]
+        if not adapted:
+            return [row_type(*row) for row in result]
+        
+        rows = []
+        for row in result:
+            values = list(row)
+            for index, adapter in adapted:
+                values[index] = adapter.dump_python(adapter.validate_python(values[index]), mode="json")
+            rows.append(row_type(*values))
+        return rows
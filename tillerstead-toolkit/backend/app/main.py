@@ -2,28 +2,41 @@
 Tillerstead Toolkit - FastAPI Backend
 Main application entry point
 """
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from app.api import jobs, rooms, calculators, products, imports, exports, settings
+from app.api import jobs, rooms, calculators, products, imports, exports, settings, sync, reports
 from app.db.database import engine, Base
+import app.db.changes  # noqa: F401 - registers change feed listeners
 from app.core.config import settings as app_settings
+from app.core.responses import DefaultJSONResponse
+from app.services.pdf import shutdown_render_pool
+from app.services.reports import run_rollup_refresher
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup"""
+    """
+    Initialize database and start the rollup refresher on startup; stop it
+    and the PDF render workers on shutdown
+    """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    refresher = asyncio.create_task(run_rollup_refresher(app_settings.ROLLUP_REFRESH_SECONDS))
     yield
+    refresher.cancel()
+    shutdown_render_pool()
 
 
 app = FastAPI(
     title="Tillerstead Toolkit API",
     description="Contractor Calculator Hub + Inventory + Catalog Connector",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=DefaultJSONResponse
 )
 
 # CORS middleware - allow production domains + local dev
@@ -51,6 +64,8 @@ app.include_router(products.router, prefix="/api/products", tags=["Products"])
 app.include_router(imports.router, prefix="/api/imports", tags=["Imports"])
 app.include_router(exports.router, prefix="/api/exports", tags=["Exports"])
 app.include_router(settings.router, prefix="/api/settings", tags=["Settings"])
+app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
+app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
 
 
 @app.get("/")
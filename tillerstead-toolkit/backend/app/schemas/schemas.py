@@ -1,11 +1,15 @@
 """
 Pydantic schemas for API request/response validation
 """
+import math
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from enum import Enum
 
+# Bound on the scenarios one tile sweep may describe (tiles x patterns)
+MAX_SWEEP_SCENARIOS = 250_000
+
 
 # ============================================================
 # ENUMS
@@ -133,6 +137,7 @@ class JobBase(BaseModel):
     tax_percent: float = 6.625
     contingency_percent: float = 10.0
     notes: Optional[str] = None
+    is_template: bool = False
 
 
 class JobCreate(JobBase):
@@ -158,16 +163,45 @@ class JobUpdate(BaseModel):
     tax_percent: Optional[float] = None
     contingency_percent: Optional[float] = None
     notes: Optional[str] = None
+    is_template: Optional[bool] = None
 
 
 class JobResponse(JobBase):
     model_config = ConfigDict(from_attributes=True)
     
     id: int
+    version: int = 1
+    archived_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
 
+class JobCloneRequest(BaseModel):
+    """Options for cloning a job or saving it as a template"""
+    name: Optional[str] = Field(None, min_length=1, max_length=255)
+    status: Optional[JobStatus] = None  # Defaults to draft
+    as_template: bool = False
+    include_line_items: bool = True
+    
+    # Re-price mapped line items from the current price book
+    reprice: bool = False
+    
+    # Scale room dimensions (e.g. 5x8 template -> 6x9 bath)
+    length_scale: float = Field(1.0, gt=0)
+    width_scale: float = Field(1.0, gt=0)
+    height_scale: float = Field(1.0, gt=0)
+
+
+class JobArchiveResult(BaseModel):
+    """Jobs moved to the archive tier by one run"""
+    archived: int
+    job_ids: List[int]
+    rooms: int
+    line_items: int
+    raw_bytes: int
+    compressed_bytes: int
+
+
 # ============================================================
 # ROOM SCHEMAS
 # ============================================================
@@ -181,6 +215,159 @@ class RoomDimensions(BaseModel):
     openings: Optional[List[Dict[str, Any]]] = None  # Windows, doors, etc.
 
 
+class RoomGeometry(BaseModel):
+    """Areas, perimeter and corners compiled from room dimensions (feet)"""
+    floor_area_sqft: float
+    gross_floor_area_sqft: float  # Before floor openings (tubs, islands)
+    perimeter_ft: float
+    net_perimeter_ft: float  # Less door widths (baseboard, cove)
+    wall_area_per_ft_height: float
+    wall_area_sqft: Optional[float] = None  # Needs height; less wall openings
+    wall_openings_sqft: float = 0.0
+    floor_openings_sqft: float = 0.0
+    inside_corners: int = 0
+    outside_corners: int = 0
+    inside_corner_lf: Optional[float] = None
+    outside_corner_lf: Optional[float] = None
+    shape_count: int = 0
+
+
+class TilePattern(str, Enum):
+    STRAIGHT = "straight"
+    OFFSET = "offset"  # Running bond, rows shifted by offset_fraction
+
+
+class TileLayoutRequest(BaseModel):
+    """Tile and pattern to lay over a room's floor (inches)"""
+    tile_length_in: float = Field(..., gt=0)
+    tile_width_in: float = Field(..., gt=0)
+    grout_joint_in: float = Field(0.125, ge=0)
+    pattern: TilePattern = TilePattern.STRAIGHT
+    offset_fraction: float = Field(0.5, gt=0, lt=1)  # 0.5 = half offset, 0.33 = third
+    kerf_in: float = Field(0.125, ge=0)  # Lost to each cut
+    min_offcut_in: float = Field(2.0, ge=0)  # Smaller offcuts are discarded
+    allow_rotation: bool = False  # Offcuts may be turned 90 degrees
+    search_steps: int = Field(4, ge=1, le=12)  # Start offsets tried per axis
+    breakage_percent: float = Field(0.0, ge=0, le=100)
+    tiles_per_box: Optional[int] = Field(None, gt=0)
+    flat_waste_percent: float = Field(10.0, ge=0, le=100)  # For comparison
+
+
+class TileLayoutResult(BaseModel):
+    """Tile counts from an optimized layout, against a flat waste allowance"""
+    pattern: TilePattern
+    floor_area_sqft: float
+    full_tiles: int
+    cut_pieces: int
+    cuts_from_offcuts: int
+    tiles_needed: int  # Full tiles plus tiles opened for cuts
+    tiles_to_order: int  # Plus breakage
+    boxes: Optional[int] = None
+    waste_percent: float
+    flat_waste_tiles: int  # What flat_waste_percent would have ordered
+    flat_waste_boxes: Optional[int] = None
+    origins_in: List[List[float]]  # Chosen grid start per shape, from its lower-left corner
+    elapsed_ms: float
+
+
+class TileOption(BaseModel):
+    """One tile to compare; box size and price come from the product unless given"""
+    tile_length_in: float = Field(..., gt=0)
+    tile_width_in: float = Field(..., gt=0)
+    product_id: Optional[int] = None
+    tiles_per_box: Optional[int] = Field(None, gt=0)
+    price_per_box: Optional[float] = Field(None, ge=0)
+
+
+class SweepRange(BaseModel):
+    """Evenly spaced values from start to stop (inclusive)"""
+    start: float = Field(..., gt=0)
+    stop: float = Field(..., gt=0)
+    step: float = Field(..., gt=0)
+    
+    @model_validator(mode="after")
+    def _bounded(self) -> "SweepRange":
+        # Checked before any values are built; also rejects overflowing ratios
+        if not (self.stop - self.start) / self.step < MAX_SWEEP_SCENARIOS:
+            raise ValueError(f"range has more than {MAX_SWEEP_SCENARIOS} values")
+        return self
+    
+    @property
+    def count(self) -> int:
+        """Number of values, worked out without building them"""
+        if self.stop < self.start:
+            return 0
+        return math.floor((self.stop - self.start) / self.step + 1e-6) + 1
+
+
+class TileSweepRequest(BaseModel):
+    """
+    Tiles x patterns to lay over a room's floor, sharing the other layout
+    settings. Tiles are the listed options plus every tile_lengths_in x
+    tile_widths_in size (widths default to the lengths), each in every
+    box_sqft box size and priced at price_per_sqft.
+    """
+    options: List[TileOption] = Field([], max_length=50)
+    tile_lengths_in: Optional[SweepRange] = None
+    tile_widths_in: Optional[SweepRange] = None
+    box_sqft: Optional[SweepRange] = None  # Box coverage for grid sizes
+    price_per_sqft: Optional[float] = Field(None, ge=0)  # For grid sizes
+    patterns: List[TilePattern] = Field([TilePattern.STRAIGHT], min_length=1)
+    grout_joint_in: float = Field(0.125, ge=0)
+    offset_fraction: float = Field(0.5, gt=0, lt=1)
+    kerf_in: float = Field(0.125, ge=0)
+    min_offcut_in: float = Field(2.0, ge=0)
+    allow_rotation: bool = False
+    search_steps: int = Field(4, ge=1, le=12)
+    breakage_percent: float = Field(0.0, ge=0, le=100)
+    flat_waste_percent: float = Field(10.0, ge=0, le=100)
+    refine_top: int = Field(0, ge=0, le=20)  # Cheapest layouts re-run with the optimizer
+    limit: int = Field(50, ge=1, le=1000)  # Scenarios returned
+    
+    @model_validator(mode="after")
+    def _bounded(self) -> "TileSweepRequest":
+        scenarios = self.scenario_count
+        if not scenarios:
+            raise ValueError("no tile options or tile size ranges to sweep")
+        if scenarios > MAX_SWEEP_SCENARIOS:
+            raise ValueError(f"sweep has {scenarios} scenarios (max {MAX_SWEEP_SCENARIOS})")
+        return self
+    
+    @property
+    def scenario_count(self) -> int:
+        """Tiles x patterns described, from range counts alone"""
+        lengths = self.tile_lengths_in.count if self.tile_lengths_in else 0
+        widths = self.tile_widths_in.count if self.tile_widths_in else lengths
+        boxes = self.box_sqft.count if self.box_sqft else 0
+        return (len(self.options) + lengths * widths * max(boxes, 1)) * len(self.patterns)
+
+
+class TileSweepRow(BaseModel):
+    """Order and cost of one tile option in one pattern"""
+    tile_length_in: float
+    tile_width_in: float
+    pattern: TilePattern
+    product_id: Optional[int] = None
+    refined: bool = False  # Counted by the layout optimizer, not estimated
+    tiles_to_order: int
+    waste_percent: float
+    tiles_per_box: Optional[int] = None
+    boxes: Optional[int] = None
+    price_per_box: Optional[float] = None
+    cost: Optional[float] = None
+    flat_waste_boxes: Optional[int] = None
+    flat_waste_cost: Optional[float] = None
+
+
+class TileSweepResult(BaseModel):
+    """Scenario table, cheapest priced scenario first (up to the request's limit)"""
+    floor_area_sqft: float
+    scenario_count: int
+    refined_layouts: int
+    scenarios: List[TileSweepRow]
+    elapsed_ms: float
+
+
 class RoomBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     room_type: Optional[str] = None
@@ -256,6 +443,25 @@ class LineItemResponse(LineItemBase):
     updated_at: datetime
 
 
+class ProductSummary(BaseModel):
+    """Compact product view embedded in line items"""
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    name: str
+    brand: Optional[str] = None
+    sku: Optional[str] = None
+    unit: Optional[str] = None
+    pack_size: Optional[float] = None
+    our_price: Optional[float] = None
+    vendor: Optional[str] = None
+
+
+class LineItemDetail(LineItemResponse):
+    """Line item with its mapped product"""
+    product: Optional[ProductSummary] = None
+
+
 # ============================================================
 # CALCULATOR SCHEMAS
 # ============================================================
@@ -280,6 +486,14 @@ class CalculatorResult(BaseModel):
     formulas_used: List[str]
 
 
+class LineItemBulkResult(BaseModel):
+    """Result of a bulk line item write"""
+    job_id: int
+    replaced: int
+    created: List[LineItemResponse]
+    unresolved_skus: List[str] = []
+
+
 # Tile Floor Calculator
 class TileFloorInput(BaseModel):
     """Tile floor calculator inputs"""
@@ -411,6 +625,23 @@ class ImportStatus(BaseModel):
 # BOM / ESTIMATE SCHEMAS
 # ============================================================
 
+class BOMCategoryTotal(BaseModel):
+    """BOM subtotal for one product category"""
+    category: Optional[ProductCategory] = None
+    item_count: int = 0
+    mapped_items: int = 0
+    subtotal: float = 0.0
+
+
+class BOMRoomTotal(BaseModel):
+    """BOM subtotal for one room (room_id is None for job-level items)"""
+    room_id: Optional[int] = None
+    room_name: Optional[str] = None
+    item_count: int = 0
+    mapped_items: int = 0
+    subtotal: float = 0.0
+
+
 class BOMSummary(BaseModel):
     """Bill of Materials summary"""
     job_id: int
@@ -425,7 +656,43 @@ class BOMSummary(BaseModel):
     tax: float
     contingency: float
     grand_total: float
-    line_items: List[LineItemResponse]
+    line_items: List[LineItemResponse] = []
+    by_category: Optional[List[BOMCategoryTotal]] = None
+    by_room: Optional[List[BOMRoomTotal]] = None
+
+
+class JobRiskResult(BaseModel):
+    """Monte Carlo spread of a job's estimate total (before contingency)"""
+    job_id: int
+    job_version: int
+    draws: int
+    seed: int
+    line_count: int
+    price_groups: int  # Products, plus one per unmapped line
+    subtotal_materials: float
+    estimate_total: float  # Materials + overhead + profit + tax
+    mean_total: float
+    p50_total: float
+    p80_total: float
+    p95_total: float
+    contingency_percent: float  # The job's current flat contingency
+    contingency_total: float  # estimate_total plus that contingency
+    contingency_covers_percentile: float
+    target_percentile: float
+    recommended_contingency_percent: float  # Brings the total to target_percentile
+
+
+class RoomDetail(RoomResponse):
+    """Room with its line items"""
+    line_items: List[LineItemDetail] = []
+    subtotal: float = 0.0
+
+
+class JobFull(JobResponse):
+    """Job document with rooms, line items and totals in one response"""
+    rooms: List[RoomDetail]
+    unassigned_line_items: List[LineItemDetail]
+    bom: BOMSummary
 
 
 class EstimateExport(BaseModel):
@@ -434,3 +701,109 @@ class EstimateExport(BaseModel):
     rooms: List[RoomResponse]
     bom: BOMSummary
     generated_at: datetime
+
+
+class BatchExportFormat(str, Enum):
+    BOM_CSV = "bom_csv"
+    ESTIMATE_JSON = "estimate_json"
+
+
+class BatchExportRequest(BaseModel):
+    """Jobs to export (by id and/or filter) and the artifacts to render"""
+    job_ids: Optional[List[int]] = None
+    status: Optional[JobStatus] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+    formats: List[BatchExportFormat] = [BatchExportFormat.BOM_CSV, BatchExportFormat.ESTIMATE_JSON]
+    deliver: str = Field("auto", pattern="^(auto|stream|file)$")  # auto: file for large batches
+
+
+class BatchExportStatus(BaseModel):
+    """Handle for a batch export written to EXPORT_DIR"""
+    batch_id: str
+    status: str  # pending, ready, failed
+    job_count: Optional[int] = None
+    download_url: Optional[str] = None
+    error: Optional[str] = None
+
+
+class ParquetTable(str, Enum):
+    JOBS = "jobs"
+    ROOMS = "rooms"
+    JOB_LINE_ITEMS = "job_line_items"
+    PRODUCTS = "products"
+    PRICE_HISTORY = "price_history"
+
+
+class ParquetTableExport(BaseModel):
+    """Rows and files written for one table by an incremental Parquet run"""
+    table: ParquetTable
+    rows: int
+    files: List[str]  # Relative to EXPORT_DIR
+    watermark_at: Optional[datetime] = None
+    watermark_id: Optional[int] = None
+
+
+class ParquetExportResult(BaseModel):
+    """Summary of an incremental Parquet export run"""
+    tables: List[ParquetTableExport]
+
+
+# ============================================================
+# SYNC SCHEMAS
+# ============================================================
+
+class SyncUpserts(BaseModel):
+    """Current state of rows changed since the sync token"""
+    jobs: List[JobResponse] = []
+    rooms: List[RoomResponse] = []
+    line_items: List[LineItemResponse] = []
+    products: List[ProductResponse] = []
+    presets: List[PresetResponse] = []
+
+
+class SyncTombstones(BaseModel):
+    """IDs of rows deleted since the sync token"""
+    jobs: List[int] = []
+    rooms: List[int] = []
+    line_items: List[int] = []
+    products: List[int] = []
+    presets: List[int] = []
+
+
+class SyncResponse(BaseModel):
+    """Compacted delta between two points in the change sequence"""
+    since: int
+    next_token: int
+    has_more: bool
+    upserts: SyncUpserts
+    tombstones: SyncTombstones
+
+
+# ============================================================
+# REPORT SCHEMAS
+# ============================================================
+
+class CategorySpendRow(BaseModel):
+    """Materials spend for one category in one month"""
+    month: str  # YYYY-MM
+    category: Optional[ProductCategory] = None
+    item_count: int
+    spend: float
+
+
+class StatusMarginRow(BaseModel):
+    """Average materials margin across jobs in one status"""
+    status: Optional[JobStatus] = None
+    job_count: int
+    spend: float
+    cost: float
+    avg_margin_percent: Optional[float] = None  # Mean of per-job margins on costed items
+
+
+class VendorSpendRow(BaseModel):
+    """Materials spend with one vendor"""
+    vendor: str
+    job_count: int
+    item_count: int
+    spend: float
@@ -0,0 +1,317 @@
+"""
+Archive tier - Move finished jobs' rooms and line items out of the hot tables
+
+Completed and cancelled jobs untouched for ARCHIVE_AFTER_DAYS have their
+rooms and line items packed into one zlib-compressed JSON row in
+job_archives and deleted from rooms / job_line_items. The jobs row stays
+behind as a stub with archived_at set, so job lists, reports and sync keep
+working. Reads and exports of an archived job are served from the payload
+(load_archive) and leave it archived; only writes to its rooms or line
+items rehydrate it (ensure_job_hot), restoring the original row ids unless they have been
+reused since.
+
+Archiving does not bump Job.version (the job's content is unchanged);
+rehydrating does, since restored rows may get new ids. Neither emits
+tombstones for rows that still exist: the change feed only carries the job
+upsert, plus deletes for old ids when rows come back under new ones.
+"""
+import enum
+import json
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy import DateTime, Enum, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.db.changes import record_changes, bump_job_versions, DELETE
+from app.db.database import get_db
+from app.db.models import Job, JobArchive, JobStatus, Room, JobLineItem, Product
+from app.services.reports import refresh_rollups
+
+ARCHIVABLE_STATUSES = (JobStatus.COMPLETED, JobStatus.CANCELLED)
+
+# Jobs archived per transaction
+ARCHIVE_CHUNK_SIZE = 100
+
+
+def _dump_rows(model: Any, rows: List[Any]) -> List[Dict[str, Any]]:
+    """Row tuples of all model columns -> JSON-safe dicts"""
+    names = [column.name for column in model.__table__.columns]
+    dumped = []
+    for row in rows:
+        values = {}
+        for name, value in zip(names, row):
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, enum.Enum):
+                value = value.value
+            values[name] = value
+        dumped.append(values)
+    return dumped
+
+
+def _load_rows(model: Any, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Inverse of _dump_rows (columns added since archiving take their defaults)"""
+    converters = {}
+    for column in model.__table__.columns:
+        if isinstance(column.type, DateTime):
+            converters[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Enum) and column.type.enum_class:
+            converters[column.name] = column.type.enum_class
+    
+    loaded = []
+    for row in rows:
+        values = dict(row)
+        for name, convert in converters.items():
+            if values.get(name) is not None:
+                values[name] = convert(values[name])
+        loaded.append(values)
+    return loaded
+
+
+async def _archive_chunk(db: AsyncSession, job_ids: List[int], now: datetime) -> Dict[str, int]:
+    rooms_by_job: Dict[int, List[Any]] = {job_id: [] for job_id in job_ids}
+    items_by_job: Dict[int, List[Any]] = {job_id: [] for job_id in job_ids}
+    
+    result = await db.execute(
+        select(*Room.__table__.columns).where(Room.job_id.in_(job_ids)).order_by(Room.id)
+    )
+    for row in result.all():
+        rooms_by_job[row.job_id].append(row)
+    
+    result = await db.execute(
+        select(*JobLineItem.__table__.columns)
+        .where(JobLineItem.job_id.in_(job_ids))
+        .order_by(JobLineItem.id)
+    )
+    for row in result.all():
+        items_by_job[row.job_id].append(row)
+    
+    totals = {"rooms": 0, "line_items": 0, "raw_bytes": 0, "compressed_bytes": 0}
+    archives = []
+    for job_id in job_ids:
+        raw = json.dumps({
+            "rooms": _dump_rows(Room, rooms_by_job[job_id]),
+            "line_items": _dump_rows(JobLineItem, items_by_job[job_id]),
+        }, separators=(",", ":")).encode("utf-8")
+        payload = zlib.compress(raw, 6)
+        archives.append({
+            "job_id": job_id,
+            "room_count": len(rooms_by_job[job_id]),
+            "line_item_count": len(items_by_job[job_id]),
+            "raw_bytes": len(raw),
+            "payload": payload,
+            "archived_at": now,
+        })
+        totals["rooms"] += len(rooms_by_job[job_id])
+        totals["line_items"] += len(items_by_job[job_id])
+        totals["raw_bytes"] += len(raw)
+        totals["compressed_bytes"] += len(payload)
+    await db.execute(insert(JobArchive), archives)
+    
+    # No tombstones: the rows still exist, just not in the hot tables. Sync
+    # clients see the job upsert with archived_at set and keep their copies.
+    await db.execute(delete(JobLineItem).where(JobLineItem.job_id.in_(job_ids)))
+    await db.execute(delete(Room).where(Room.job_id.in_(job_ids)))
+    
+    # Keep updated_at as-is so archiving does not count as activity
+    await db.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids))
+        .values(archived_at=now, updated_at=Job.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    await record_changes(db, "jobs", job_ids)
+    return totals
+
+
+async def archive_jobs(
+    db: AsyncSession,
+    older_than_days: Optional[int] = None,
+    limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Archive completed/cancelled, non-template jobs not updated for
+    older_than_days (default ARCHIVE_AFTER_DAYS). Commits after each chunk.
+    """
+    days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    now = datetime.utcnow()
+    
+    # Archived jobs keep their rollup rows, so roll up pending changes first
+    await refresh_rollups(db)
+    
+    query = (
+        select(Job.id)
+        .where(
+            Job.archived_at.is_(None),
+            Job.is_template == False,
+            Job.status.in_(ARCHIVABLE_STATUSES),
+            Job.updated_at < now - timedelta(days=days),
+        )
+        .order_by(Job.id)
+    )
+    if limit:
+        query = query.limit(limit)
+    job_ids = (await db.scalars(query)).all()
+    
+    summary = {"archived": len(job_ids), "job_ids": list(job_ids),
+               "rooms": 0, "line_items": 0, "raw_bytes": 0, "compressed_bytes": 0}
+    for start in range(0, len(job_ids), ARCHIVE_CHUNK_SIZE):
+        totals = await _archive_chunk(db, list(job_ids[start:start + ARCHIVE_CHUNK_SIZE]), now)
+        await db.commit()
+        for key, value in totals.items():
+            summary[key] += value
+    return summary
+
+
+async def load_archive(
+    db: AsyncSession,
+    job_id: int,
+    with_products: bool = True
+) -> Optional[Tuple[List[Room], List[JobLineItem]]]:
+    """
+    Rooms and line items of an archived job read from its payload, or None
+    if the job is not archived. The objects are detached (never added to
+    the session) and line items carry their products (unless
+    with_products is false), so reads and exports can use them like loaded
+    rows without rehydrating the job.
+    """
+    payload = (await db.execute(
+        select(JobArchive.payload).where(JobArchive.job_id == job_id)
+    )).scalar_one_or_none()
+    if payload is None:
+        return None
+    data = json.loads(zlib.decompress(payload))
+    
+    def build(model: Any, rows: List[Dict[str, Any]]) -> List[Any]:
+        names = set(model.__table__.columns.keys())
+        return [model(**{k: v for k, v in row.items() if k in names}) for row in _load_rows(model, rows)]
+    
+    rooms = build(Room, data["rooms"])
+    line_items = build(JobLineItem, data["line_items"])
+    
+    product_ids = {item.product_id for item in line_items if item.product_id}
+    products = {}
+    if product_ids and with_products:
+        products = {
+            product.id: product
+            for product in (await db.scalars(select(Product).where(Product.id.in_(product_ids)))).all()
+        }
+    for item in line_items:
+        set_committed_value(item, "product", products.get(item.product_id))
+    return rooms, line_items
+
+
+async def _ids_free(db: AsyncSession, model: Any, ids: List[int]) -> bool:
+    if not ids:
+        return True
+    result = await db.execute(select(model.id).where(model.id.in_(ids)).limit(1))
+    return result.first() is None
+
+
+async def _free_ids(db: AsyncSession, model: Any, ids: List[int]) -> List[int]:
+    if not ids:
+        return []
+    taken = set((await db.scalars(select(model.id).where(model.id.in_(ids)))).all())
+    return [row_id for row_id in ids if row_id not in taken]
+
+
+async def record_archive_deletes(db: AsyncSession, job_id: int) -> None:
+    """Tombstone an archived job's rows (ids not taken since) when the job is deleted"""
+    payload = (await db.execute(
+        select(JobArchive.payload).where(JobArchive.job_id == job_id)
+    )).scalar_one_or_none()
+    if payload is None:
+        return
+    data = json.loads(zlib.decompress(payload))
+    await record_changes(db, "rooms", await _free_ids(db, Room, [room["id"] for room in data["rooms"]]), DELETE)
+    await record_changes(
+        db, "line_items", await _free_ids(db, JobLineItem, [item["id"] for item in data["line_items"]]), DELETE
+    )
+
+
+async def rehydrate_job(db: AsyncSession, job_id: int) -> bool:
+    """
+    Restore an archived job's rooms and line items in the current
+    transaction. Returns False if the job is not archived.
+    """
+    result = await db.execute(
+        select(JobArchive.payload)
+        .join(Job, Job.id == JobArchive.job_id)
+        .where(JobArchive.job_id == job_id)
+        .with_for_update()
+    )
+    payload = result.scalar_one_or_none()
+    if payload is None:
+        return False
+    
+    data = json.loads(zlib.decompress(payload))
+    rooms = _load_rows(Room, data["rooms"])
+    line_items = _load_rows(JobLineItem, data["line_items"])
+    
+    keep_ids = (
+        await _ids_free(db, Room, [room["id"] for room in rooms])
+        and await _ids_free(db, JobLineItem, [item["id"] for item in line_items])
+    )
+    if not keep_ids:
+        # Clients still hold the archived rows under their old ids; retire
+        # the ids nothing else has taken since (before the new rows, whose
+        # upserts must win if an id comes back)
+        await record_changes(db, "rooms", await _free_ids(db, Room, [room["id"] for room in rooms]), DELETE)
+        await record_changes(
+            db, "line_items", await _free_ids(db, JobLineItem, [item["id"] for item in line_items]), DELETE
+        )
+    
+    room_map = {}
+    if rooms:
+        old_ids = [room["id"] for room in rooms]
+        if not keep_ids:
+            rooms = [{k: v for k, v in room.items() if k != "id"} for room in rooms]
+        new_ids = (await db.scalars(
+            insert(Room).returning(Room.id, sort_by_parameter_order=True), rooms
+        )).all()
+        room_map = dict(zip(old_ids, new_ids))
+        await record_changes(db, "rooms", new_ids)
+    
+    if line_items:
+        # Products deleted while the job was archived leave items unmapped
+        product_ids = {item["product_id"] for item in line_items if item.get("product_id")}
+        existing = set()
+        if product_ids:
+            existing = set((await db.scalars(
+                select(Product.id).where(Product.id.in_(product_ids))
+            )).all())
+        
+        for item in line_items:
+            if not keep_ids:
+                del item["id"]
+            if item.get("room_id") is not None:
+                item["room_id"] = room_map.get(item["room_id"])
+            if item.get("product_id") and item["product_id"] not in existing:
+                item["product_id"] = None
+                item["is_mapped"] = False
+        new_ids = (await db.scalars(
+            insert(JobLineItem).returning(JobLineItem.id, sort_by_parameter_order=True), line_items
+        )).all()
+        await record_changes(db, "line_items", new_ids)
+    
+    await db.execute(delete(JobArchive).where(JobArchive.job_id == job_id))
+    await db.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .values(archived_at=None, updated_at=Job.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    await record_changes(db, "jobs", [job_id])
+    await bump_job_versions(db, [job_id])
+    return True
+
+
+async def ensure_job_hot(job_id: int, db: AsyncSession = Depends(get_db)) -> None:
+    """Route dependency: rehydrate an archived job before the handler writes its rooms or line items"""
+    if await rehydrate_job(db, job_id):
+        await db.commit()
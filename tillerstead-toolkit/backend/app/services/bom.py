@@ -0,0 +1,135 @@
+"""
+BOM aggregation - Job totals computed in SQL instead of per-row ORM objects
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Job, Room, JobLineItem
+from app.schemas.schemas import (
+    BOMSummary, BOMCategoryTotal, BOMRoomTotal, LineItemResponse
+)
+
+
+@dataclass
+class BOMAggregate:
+    """Counts, subtotal and breakdowns for a job's line items"""
+    total_items: int = 0
+    mapped_items: int = 0
+    subtotal_materials: float = 0.0
+    by_category: List[BOMCategoryTotal] = field(default_factory=list)
+    by_room: List[BOMRoomTotal] = field(default_factory=list)
+
+
+def bom_totals(job: Job, subtotal_materials: float, subtotal_labor: float = 0.0) -> Dict[str, float]:
+    """Apply the job's overhead/profit/tax/contingency to the subtotals"""
+    overhead = (subtotal_materials + subtotal_labor) * (job.overhead_percent / 100)
+    profit = (subtotal_materials + subtotal_labor + overhead) * (job.profit_percent / 100)
+    tax = subtotal_materials * (job.tax_percent / 100)
+    contingency = (subtotal_materials + subtotal_labor) * (job.contingency_percent / 100)
+    
+    grand_total = subtotal_materials + subtotal_labor + overhead + profit + tax + contingency
+    
+    return {
+        "subtotal_materials": round(subtotal_materials, 2),
+        "subtotal_labor": round(subtotal_labor, 2),
+        "overhead": round(overhead, 2),
+        "profit": round(profit, 2),
+        "tax": round(tax, 2),
+        "contingency": round(contingency, 2),
+        "grand_total": round(grand_total, 2),
+    }
+
+
+async def aggregate_bom(db: AsyncSession, job_id: int) -> BOMAggregate:
+    """
+    Aggregate a job's line items with a single grouped query.
+    
+    One row comes back per (category, room) pair, so the result size depends
+    on how many categories/rooms a job has, not on how many line items.
+    """
+    item_count = func.count(JobLineItem.id)
+    result = await db.execute(
+        select(
+            JobLineItem.category,
+            JobLineItem.room_id,
+            Room.name,
+            item_count,
+            item_count.filter(JobLineItem.is_mapped == True),
+            func.coalesce(func.sum(JobLineItem.extended_price), 0.0),
+        )
+        .outerjoin(Room, Room.id == JobLineItem.room_id)
+        .where(JobLineItem.job_id == job_id)
+        .group_by(JobLineItem.category, JobLineItem.room_id, Room.name)
+    )
+    
+    return _fold_groups(result.all())
+
+
+def summarize_line_items(line_items: Sequence[JobLineItem], room_names: Dict[int, str]) -> BOMAggregate:
+    """Aggregate line items that are already loaded (same shape as aggregate_bom)"""
+    return _fold_groups(
+        (
+            item.category,
+            item.room_id,
+            room_names.get(item.room_id),
+            1,
+            1 if item.is_mapped else 0,
+            item.extended_price or 0.0,
+        )
+        for item in line_items
+    )
+
+
+def _fold_groups(groups: Iterable[Tuple]) -> BOMAggregate:
+    """Fold (category, room_id, room_name, count, mapped, subtotal) groups into an aggregate"""
+    aggregate = BOMAggregate()
+    categories: Dict[object, BOMCategoryTotal] = {}
+    rooms: Dict[object, BOMRoomTotal] = {}
+    
+    for category, room_id, room_name, count, mapped, subtotal in groups:
+        aggregate.total_items += count
+        aggregate.mapped_items += mapped
+        aggregate.subtotal_materials += subtotal
+        
+        by_category = categories.setdefault(
+            category, BOMCategoryTotal(category=category)
+        )
+        by_category.item_count += count
+        by_category.mapped_items += mapped
+        by_category.subtotal += subtotal
+        
+        by_room = rooms.setdefault(
+            room_id, BOMRoomTotal(room_id=room_id, room_name=room_name)
+        )
+        by_room.item_count += count
+        by_room.mapped_items += mapped
+        by_room.subtotal += subtotal
+    
+    for breakdown in (*categories.values(), *rooms.values()):
+        breakdown.subtotal = round(breakdown.subtotal, 2)
+    
+    aggregate.by_category = sorted(categories.values(), key=lambda c: -c.subtotal)
+    aggregate.by_room = sorted(rooms.values(), key=lambda r: (r.room_name or "", r.room_id or 0))
+    return aggregate
+
+
+def build_bom_summary(
+    job: Job,
+    aggregate: BOMAggregate,
+    line_items: Sequence[JobLineItem] = ()
+) -> BOMSummary:
+    """Build the BOM response from an aggregate and (optionally) its line items"""
+    return BOMSummary(
+        job_id=job.id,
+        job_name=job.name,
+        total_items=aggregate.total_items,
+        mapped_items=aggregate.mapped_items,
+        unmapped_items=aggregate.total_items - aggregate.mapped_items,
+        **bom_totals(job, aggregate.subtotal_materials),
+        line_items=[LineItemResponse.model_validate(item) for item in line_items],
+        by_category=aggregate.by_category,
+        by_room=aggregate.by_room,
+    )
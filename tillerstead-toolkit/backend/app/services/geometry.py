@@ -0,0 +1,223 @@
+"""
+Room geometry - Compile RoomDimensions into areas, perimeters and corners
+
+Shapes (all lengths in feet):
+    {"type": "rectangle", "length": 10, "width": 8}
+    {"type": "l_shape", "length": 12, "width": 10, "cutout_length": 4, "cutout_width": 3}
+    {"type": "polygon", "points": [[0, 0], [10, 0], [10, 8], [0, 8]]}
+    {"type": "circle", "radius": 3}                    (or "diameter")
+    {"type": "arc", "radius": 4, "angle_deg": 90}      (circular sector)
+Any shape may set "subtract": true (columns, islands). Without shapes the
+room is a length x width rectangle. Shapes are assumed not to share walls,
+so the perimeter is the sum of the added shapes' perimeters; describe an
+irregular room outline as one polygon.
+
+Openings:
+    {"type": "door", "width": 3, "height": 6.67, "count": 2}   (wall)
+    {"type": "tub", "location": "floor", "length": 5, "width": 2.5}
+Wall openings reduce wall area; doors also reduce the net (baseboard)
+perimeter. Floor openings reduce floor area.
+
+Polygon math (shoelace area, edge lengths, convex/reflex corners) runs as
+NumPy array operations over the vertices. Results are memoized by
+dimensions and cached on the Room row under a hash of its dimensions.
+"""
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.cache import input_key, memoize
+from app.db.models import Room
+from app.schemas.schemas import RoomDimensions, RoomGeometry
+
+# Bump when the formulas below change so cached results are recomputed
+GEOMETRY_VERSION = "2"
+
+# Vertices whose turn has a smaller sine (cross product over the product of
+# the edge lengths) are treated as straight (no corner), at any scale
+COLLINEAR_TOLERANCE = 1e-6
+
+
+def _number(shape: Dict[str, Any], key: str, default: Optional[float] = None) -> float:
+    value = shape.get(key, default)
+    if value is None:
+        raise ValueError(f"{shape.get('type', 'shape')} is missing '{key}'")
+    value = float(value)
+    if value < 0:
+        raise ValueError(f"{shape.get('type', 'shape')} has negative '{key}'")
+    return value
+
+
+def shape_polygon(shape: Dict[str, Any]) -> Optional[np.ndarray]:
+    """Vertices (n x 2) of a polygonal shape, or None for curved shapes"""
+    kind = str(shape.get("type", "rectangle")).lower()
+    if kind in ("rectangle", "rect", "square"):
+        length = _number(shape, "length")
+        width = _number(shape, "width", length)
+        return np.array([[0, 0], [length, 0], [length, width], [0, width]], dtype=float)
+    if kind in ("l_shape", "l-shape", "l"):
+        length = _number(shape, "length")
+        width = _number(shape, "width")
+        cut_length = _number(shape, "cutout_length")
+        cut_width = _number(shape, "cutout_width")
+        if cut_length >= length or cut_width >= width:
+            raise ValueError("l_shape cutout must be smaller than the overall shape")
+        return np.array([
+            [0, 0], [length, 0], [length, width - cut_width],
+            [length - cut_length, width - cut_width], [length - cut_length, width], [0, width],
+        ], dtype=float)
+    if kind == "polygon":
+        points = np.asarray(shape.get("points") or [], dtype=float)
+        if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+            raise ValueError("polygon needs at least 3 [x, y] points")
+        return points
+    if kind in ("circle", "arc", "sector"):
+        return None
+    raise ValueError(f"Unknown shape type '{kind}'")
+
+
+def polygon_metrics(points: np.ndarray) -> Tuple[float, float, int, int]:
+    """(area, perimeter, convex corners, reflex corners) of a simple polygon"""
+    x, y = points[:, 0], points[:, 1]
+    x_next, y_next = np.roll(x, -1), np.roll(y, -1)
+    signed_area = 0.5 * float(np.sum(x * y_next - x_next * y))
+    
+    edges = np.roll(points, -1, axis=0) - points
+    lengths = np.hypot(edges[:, 0], edges[:, 1])
+    perimeter = float(np.sum(lengths))
+    
+    # Sine of the turn at each vertex; positive is convex for counter-clockwise
+    # order. Zero-length edges (repeated points) make no turn.
+    incoming = np.roll(edges, 1, axis=0)
+    cross = incoming[:, 0] * edges[:, 1] - incoming[:, 1] * edges[:, 0]
+    scale = np.roll(lengths, 1) * lengths
+    turns = np.divide(cross, scale, out=np.zeros_like(cross), where=scale > 0)
+    if signed_area < 0:
+        turns = -turns
+    convex = int(np.count_nonzero(turns > COLLINEAR_TOLERANCE))
+    reflex = int(np.count_nonzero(turns < -COLLINEAR_TOLERANCE))
+    return abs(signed_area), perimeter, convex, reflex
+
+
+def shape_metrics(shape: Dict[str, Any]) -> Tuple[float, float, int, int]:
+    """(area, perimeter, inside corners, outside corners) of one shape"""
+    polygon = shape_polygon(shape)
+    if polygon is not None:
+        # Convex vertices of the floor outline are inside corners of the walls
+        return polygon_metrics(polygon)
+    
+    kind = str(shape.get("type")).lower()
+    radius = _number(shape, "radius", shape["diameter"] / 2 if shape.get("diameter") else None)
+    if kind == "circle":
+        return math.pi * radius ** 2, 2 * math.pi * radius, 0, 0
+    
+    angle = math.radians(_number(shape, "angle_deg", 180.0))
+    if not 0 < angle <= 2 * math.pi:
+        raise ValueError("arc angle_deg must be between 0 and 360")
+    if math.isclose(angle, 2 * math.pi):
+        return math.pi * radius ** 2, 2 * math.pi * radius, 0, 0
+    # Sector: the radii meet the arc at two inside corners; the center is
+    # an inside corner below 180 degrees and an outside corner above
+    inside = 2 + (1 if angle < math.pi else 0)
+    outside = 1 if angle > math.pi else 0
+    return 0.5 * angle * radius ** 2, (2 + angle) * radius, inside, outside
+
+
+def _opening_area(opening: Dict[str, Any]) -> Tuple[str, float, float]:
+    """(location, area, door width) of an opening, counted count times"""
+    count = _number(opening, "count", 1)
+    location = str(opening.get("location", "wall")).lower()
+    if location == "floor":
+        length = _number(opening, "length")
+        width = _number(opening, "width")
+        return location, length * width * count, 0.0
+    
+    width = _number(opening, "width")
+    height = _number(opening, "height")
+    door_width = width * count if str(opening.get("type", "")).lower() == "door" else 0.0
+    return location, width * height * count, door_width
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+@memoize("room_geometry", GEOMETRY_VERSION)
+def compile_dimensions(dimensions: RoomDimensions) -> RoomGeometry:
+    """Floor/wall areas, perimeter and corners of a room (raises ValueError on bad shapes)"""
+    shapes: List[Dict[str, Any]] = list(dimensions.shapes or [])
+    if not shapes and dimensions.length and dimensions.width:
+        shapes = [{"type": "rectangle", "length": dimensions.length, "width": dimensions.width}]
+    
+    floor_area = perimeter = 0.0
+    inside = outside = 0
+    for shape in shapes:
+        area, shape_perimeter, convex, reflex = shape_metrics(shape)
+        if shape.get("subtract"):
+            floor_area -= area
+            continue
+        floor_area += area
+        perimeter += shape_perimeter
+        inside += convex
+        outside += reflex
+    
+    wall_openings = floor_openings = door_widths = 0.0
+    for opening in dimensions.openings or []:
+        location, area, door_width = _opening_area(opening)
+        if location == "floor":
+            floor_openings += area
+        else:
+            wall_openings += area
+            door_widths += door_width
+    
+    height = dimensions.height
+    wall_area = max(perimeter * height - wall_openings, 0.0) if height else None
+    return RoomGeometry(
+        floor_area_sqft=_round(max(floor_area - floor_openings, 0.0)),
+        gross_floor_area_sqft=_round(max(floor_area, 0.0)),
+        perimeter_ft=_round(perimeter),
+        net_perimeter_ft=_round(max(perimeter - door_widths, 0.0)),
+        wall_area_per_ft_height=_round(perimeter),
+        wall_area_sqft=_round(wall_area),
+        wall_openings_sqft=_round(wall_openings),
+        floor_openings_sqft=_round(floor_openings),
+        inside_corners=inside,
+        outside_corners=outside,
+        inside_corner_lf=_round(inside * height) if height else None,
+        outside_corner_lf=_round(outside * height) if height else None,
+        shape_count=len(shapes),
+    )
+
+
+def dimensions_hash(dimensions: Optional[Dict[str, Any]]) -> str:
+    return input_key({"version": GEOMETRY_VERSION, "dimensions": dimensions})
+
+
+async def room_geometry(db: AsyncSession, room: Room) -> Optional[RoomGeometry]:
+    """
+    Geometry of a room, reusing the copy cached on the row when its
+    dimensions are unchanged. Returns None for rooms without dimensions.
+    """
+    if not room.dimensions:
+        return None
+    
+    key = dimensions_hash(room.dimensions)
+    if room.geometry_hash == key and room.geometry:
+        return RoomGeometry.model_validate(room.geometry)
+    
+    geometry = compile_dimensions(RoomDimensions.model_validate(room.dimensions))
+    
+    # Core UPDATE: a cache fill is not an edit (no version bump or change entry)
+    await db.execute(
+        update(Room)
+        .where(Room.id == room.id)
+        .values(geometry=geometry.model_dump(), geometry_hash=key, updated_at=Room.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    set_committed_value(room, "geometry", geometry.model_dump())
+    set_committed_value(room, "geometry_hash", key)
+    return geometry
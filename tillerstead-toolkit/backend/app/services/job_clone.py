@@ -0,0 +1,220 @@
+"""
+Job cloning - Duplicate a job, its rooms and line items inside the database
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func, insert, literal, null, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.changes import record_changes
+from app.db.models import Job, JobStatus, Room, JobLineItem, Product
+from app.schemas.schemas import JobCloneRequest
+from app.services.archive import load_archive
+
+
+def _scale_dimensions(dimensions: Optional[Dict[str, Any]], options: JobCloneRequest) -> Optional[Dict[str, Any]]:
+    """
+    Scale a room's length/width/height and its shapes; openings keep their size.
+    
+    Shape lengths (and cutouts, polygon x) scale with length_scale, widths
+    (polygon y) with width_scale. Circles and arcs need length_scale equal
+    to width_scale to stay circular; otherwise ValueError is raised.
+    """
+    if not dimensions:
+        return dimensions
+    
+    length_scale, width_scale = options.length_scale, options.width_scale
+    factors = {
+        "length": length_scale,
+        "width": width_scale,
+        "height": options.height_scale,
+        "cutout_length": length_scale,
+        "cutout_width": width_scale,
+    }
+    
+    def scale(values: Dict[str, Any]) -> Dict[str, Any]:
+        scaled = dict(values)
+        for key, factor in factors.items():
+            if isinstance(scaled.get(key), (int, float)) and factor != 1.0:
+                scaled[key] = round(scaled[key] * factor, 4)
+        return scaled
+    
+    def scale_shape(shape: Dict[str, Any]) -> Dict[str, Any]:
+        scaled = scale(shape)
+        if isinstance(shape.get("points"), list):
+            scaled["points"] = [
+                [round(point[0] * length_scale, 4), round(point[1] * width_scale, 4)]
+                if isinstance(point, (list, tuple)) and len(point) == 2 else point
+                for point in shape["points"]
+            ]
+        curved = [key for key in ("radius", "diameter") if isinstance(shape.get(key), (int, float))]
+        if curved and length_scale != width_scale:
+            raise ValueError(
+                f"Cannot scale {shape.get('type', 'shape')} by different length and width factors"
+            )
+        for key in curved:
+            scaled[key] = round(shape[key] * length_scale, 4)
+        return scaled
+    
+    scaled = scale(dimensions)
+    if dimensions.get("shapes"):
+        scaled["shapes"] = [scale_shape(shape) for shape in dimensions["shapes"]]
+    return scaled
+
+
+async def _insert_archived_items(
+    db: AsyncSession,
+    line_items: List[JobLineItem],
+    job_id: int,
+    room_map: Dict[int, int],
+    options: JobCloneRequest,
+    now: datetime
+) -> List[int]:
+    """Copy line items read from an archive with one multi-row INSERT (same overrides as below)"""
+    if not line_items:
+        return []
+    product_ids = {item.product_id for item in line_items if item.product_id is not None}
+    prices = {}
+    if product_ids:
+        prices = dict((await db.execute(
+            select(Product.id, Product.our_price).where(Product.id.in_(product_ids))
+        )).all())
+    
+    names = [column.name for column in JobLineItem.__table__.columns if column.name != "id"]
+    rows = []
+    for item in sorted(line_items, key=lambda item: item.id):
+        row = {name: getattr(item, name) for name in names}
+        row.update(job_id=job_id, room_id=room_map.get(item.room_id), created_at=now, updated_at=now)
+        if item.product_id is not None and item.product_id not in prices:
+            # Product deleted while the source was archived
+            row.update(product_id=None, is_mapped=False)
+        if options.reprice and prices.get(item.product_id) is not None:
+            row["unit_price"] = prices[item.product_id]
+            row["extended_price"] = round(item.qty * row["unit_price"], 2)
+        rows.append(row)
+    return (await db.scalars(
+        insert(JobLineItem).returning(JobLineItem.id, sort_by_parameter_order=True), rows
+    )).all()
+
+
+async def clone_job(db: AsyncSession, source_id: int, options: JobCloneRequest) -> int:
+    """
+    Clone a job in the current transaction and return the new job id.
+    
+    The job row and line items are copied with INSERT ... SELECT; rooms are
+    copied with one multi-row INSERT so their dimensions can be scaled and
+    their new ids mapped back onto the copied line items. An archived
+    source's rooms and line items are copied from its archive.
+    """
+    now = datetime.utcnow()
+    jobs = Job.__table__
+    
+    source_name = (await db.execute(
+        select(jobs.c.name).where(jobs.c.id == source_id)
+    )).scalar_one()
+    
+    overrides = {
+        "name": options.name or (source_name if options.as_template else f"{source_name} (copy)"),
+        "status": options.status or JobStatus.DRAFT,
+        "is_template": options.as_template,
+        "version": 1,
+        "archived_at": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    job_columns = [column for column in jobs.columns if column.name != "id"]
+    
+    new_job_id = (await db.execute(
+        insert(jobs)
+        .from_select(
+            [column.name for column in job_columns],
+            select(*[
+                literal(overrides[column.name], column.type) if column.name in overrides else column
+                for column in job_columns
+            ]).where(jobs.c.id == source_id)
+        )
+        .returning(jobs.c.id)
+    )).scalar_one()
+    await record_changes(db, "jobs", [new_job_id])
+    
+    # An archived source is copied from its archive and stays archived
+    archived = await load_archive(db, source_id, with_products=False)
+    
+    # Rooms: one multi-row INSERT, ids returned in parameter order
+    if archived is None:
+        source_rooms = (await db.execute(
+            select(Room.id, Room.name, Room.room_type, Room.dimensions, Room.notes)
+            .where(Room.job_id == source_id)
+            .order_by(Room.id)
+        )).all()
+    else:
+        source_rooms = sorted(archived[0], key=lambda room: room.id)
+    
+    room_map: Dict[int, int] = {}
+    if source_rooms:
+        new_room_ids = (await db.scalars(
+            insert(Room).returning(Room.id, sort_by_parameter_order=True),
+            [
+                {
+                    "job_id": new_job_id,
+                    "name": room.name,
+                    "room_type": room.room_type,
+                    "dimensions": _scale_dimensions(room.dimensions, options),
+                    "notes": room.notes,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for room in source_rooms
+            ]
+        )).all()
+        room_map = {room.id: new_id for room, new_id in zip(source_rooms, new_room_ids)}
+        await record_changes(db, "rooms", new_room_ids)
+    
+    if not options.include_line_items:
+        return new_job_id
+    if archived is not None:
+        new_item_ids = await _insert_archived_items(db, archived[1], new_job_id, room_map, options, now)
+        await record_changes(db, "line_items", new_item_ids)
+        return new_job_id
+    
+    # Line items: INSERT ... SELECT with rooms remapped and optional re-pricing
+    items = JobLineItem.__table__
+    products = Product.__table__
+    
+    if room_map:
+        room_id = case(room_map, value=items.c.room_id, else_=null())
+    else:
+        room_id = null()
+    
+    if options.reprice:
+        unit_price = func.coalesce(products.c.our_price, items.c.unit_price)
+        extended_price = func.round(items.c.qty * unit_price, 2)
+    else:
+        unit_price = items.c.unit_price
+        extended_price = items.c.extended_price
+    
+    overrides = {
+        "job_id": literal(new_job_id),
+        "room_id": room_id,
+        "unit_price": unit_price,
+        "extended_price": extended_price,
+        "created_at": literal(now, items.c.created_at.type),
+        "updated_at": literal(now, items.c.updated_at.type),
+    }
+    item_columns = [column for column in items.columns if column.name != "id"]
+    
+    source_items = (
+        select(*[overrides.get(column.name, column) for column in item_columns])
+        .select_from(items.outerjoin(products, products.c.id == items.c.product_id))
+        .where(items.c.job_id == source_id)
+        .order_by(items.c.id)
+    )
+    new_item_ids = (await db.scalars(
+        insert(items)
+        .from_select([column.name for column in item_columns], source_items)
+        .returning(items.c.id)
+    )).all()
+    await record_changes(db, "line_items", new_item_ids)
+    
+    return new_job_id
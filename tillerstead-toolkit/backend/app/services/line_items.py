@@ -0,0 +1,150 @@
+"""
+Bulk line item writes - Persist calculator output in a single statement
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, insert, or_, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.changes import record_changes, bump_job_versions, DELETE
+from app.db.models import JobLineItem, Product
+from app.schemas.schemas import CalculatorResult, LineItemCreate
+
+
+async def resolve_skus(db: AsyncSession, skus: Set[str]) -> Dict[str, Tuple[int, Optional[float]]]:
+    """Map SKUs to (product_id, our_price) with one query (the active match with the lowest id wins)"""
+    if not skus:
+        return {}
+    
+    result = await db.execute(
+        select(Product.sku, Product.id, Product.our_price)
+        .where(Product.sku.in_(skus), Product.is_active == True)
+        .order_by(Product.id)
+    )
+    resolved = {}
+    for sku, product_id, price in result.all():
+        resolved.setdefault(sku, (product_id, price))
+    return resolved
+
+
+async def rows_from_calculator(
+    db: AsyncSession,
+    job_id: int,
+    room_id: Optional[int],
+    calculator: CalculatorResult
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Turn calculator output into line item rows, pricing SKUs from the price book"""
+    products = await resolve_skus(
+        db, {item.sku for item in calculator.line_items if item.sku}
+    )
+    
+    rows = []
+    unresolved = []
+    for item in calculator.line_items:
+        product_id, price = products.get(item.sku, (None, None)) if item.sku else (None, None)
+        if item.sku and product_id is None:
+            unresolved.append(item.sku)
+        
+        unit_price = price or 0.0
+        rows.append({
+            "job_id": job_id,
+            "room_id": room_id,
+            "product_id": product_id,
+            "name": item.name,
+            "description": item.formula,
+            "category": item.category,
+            "qty": item.qty,
+            "unit": item.unit,
+            "unit_price": unit_price,
+            "extended_price": round(item.qty * unit_price, 2),
+            "calculator_type": calculator.calculator_type,
+            "calculator_inputs": calculator.inputs,
+            "is_mapped": product_id is not None,
+            "mapping_confidence": 1.0 if product_id is not None else None,
+            "notes": item.notes,
+        })
+    
+    return rows, unresolved
+
+
+async def missing_products(db: AsyncSession, product_ids: Set[int]) -> List[int]:
+    """Product ids (sorted) that do not exist, checked with one query"""
+    if not product_ids:
+        return []
+    result = await db.execute(select(Product.id).where(Product.id.in_(product_ids)))
+    return sorted(product_ids - set(result.scalars().all()))
+
+
+def rows_from_line_items(line_items: Sequence[LineItemCreate]) -> List[Dict[str, Any]]:
+    """Turn explicit line items into rows with extended prices"""
+    return [
+        {
+            **item.model_dump(),
+            "extended_price": round(item.qty * item.unit_price, 2),
+            "is_mapped": item.product_id is not None,
+            "mapping_confidence": 1.0 if item.product_id is not None else None,
+        }
+        for item in line_items
+    ]
+
+
+async def write_line_items(
+    db: AsyncSession,
+    job_id: int,
+    rows: List[Dict[str, Any]],
+    replace: bool = True,
+    targets: Optional[Set[Tuple[str, Optional[int]]]] = None
+) -> Tuple[int, List[JobLineItem]]:
+    """
+    Insert line item rows in one multi-row INSERT ... RETURNING.
+    
+    With replace=True, existing lines of the job matching any of the
+    (calculator_type, room_id) targets are deleted first, so re-running a
+    calculator swaps its lines within the caller's transaction. Pass the
+    calculator's own target so output with no lines still clears the old
+    ones; by default the targets are taken from the rows.
+    Returns (replaced_count, created_items).
+    """
+    replaced = 0
+    if replace:
+        if targets is None:
+            targets = {
+                (row["calculator_type"], row.get("room_id"))
+                for row in rows if row.get("calculator_type")
+            }
+        if targets:
+            result = await db.scalars(
+                delete(JobLineItem).where(
+                    JobLineItem.job_id == job_id,
+                    or_(*[
+                        and_(
+                            JobLineItem.calculator_type == calculator_type,
+                            JobLineItem.room_id.is_(None) if room_id is None
+                            else JobLineItem.room_id == room_id,
+                        )
+                        for calculator_type, room_id in targets
+                    ])
+                ).returning(JobLineItem.id)
+            )
+            replaced_ids = result.all()
+            replaced = len(replaced_ids)
+            await record_changes(db, "line_items", replaced_ids, DELETE)
+    
+    if not rows:
+        if replaced:
+            await bump_job_versions(db, [job_id])
+        return replaced, []
+    
+    now = datetime.utcnow()
+    for row in rows:
+        row.setdefault("created_at", now)
+        row.setdefault("updated_at", now)
+    
+    created = (await db.scalars(
+        insert(JobLineItem).returning(JobLineItem, sort_by_parameter_order=True),
+        rows
+    )).all()
+    await record_changes(db, "line_items", [item.id for item in created])
+    await bump_job_versions(db, [job_id])
+    return replaced, list(created)
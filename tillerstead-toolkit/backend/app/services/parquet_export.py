@@ -0,0 +1,222 @@
+"""
+Parquet export - Incremental columnar snapshots for analytics
+
+Each run appends the rows that are new or changed since the previous run
+to a Hive-style dataset under EXPORT_DIR/parquet:
+
+    parquet/<table>/month=YYYY-MM/part-<run>.parquet
+
+Rows are partitioned by the month of their watermark column (updated_at,
+or recorded_at for append-only price_history). Progress is tracked per
+table as an (updated_at, id) keyset watermark in _watermarks.json, which is
+only advanced after a run's files are complete. A row changed after it was
+exported shows up again in a later file, so readers keep the copy with the
+latest updated_at per id. Deletes are not exported.
+
+Rows are read from a streaming cursor PARQUET_BATCH_ROWS at a time and
+written as one row group per batch, so memory stays flat however large
+the tables are.
+"""
+import asyncio
+import enum
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Boolean, DateTime, Enum, Float, Integer, JSON, and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Job, Room, JobLineItem, Product, PriceHistory
+
+PARQUET_DIR = os.path.join(settings.EXPORT_DIR, "parquet")
+WATERMARK_FILE = os.path.join(PARQUET_DIR, "_watermarks.json")
+
+# Exported table -> (model, watermark column name)
+EXPORT_TABLES = {
+    "jobs": (Job, "updated_at"),
+    "rooms": (Room, "updated_at"),
+    "job_line_items": (JobLineItem, "updated_at"),
+    "products": (Product, "updated_at"),
+    "price_history": (PriceHistory, "recorded_at"),
+}
+
+_export_lock = asyncio.Lock()
+
+
+def arrow_schema(model: Any):
+    """Arrow schema for a model's columns (enums as values, JSON as text)"""
+    import pyarrow as pa
+    
+    fields = []
+    for column in model.__table__.columns:
+        if isinstance(column.type, Enum):
+            arrow_type = pa.string()
+        elif isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type, nullable=not column.primary_key))
+    return pa.schema(fields)
+
+
+def _load_watermarks() -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(WATERMARK_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_watermarks(watermarks: Dict[str, Dict[str, Any]]) -> None:
+    os.makedirs(PARQUET_DIR, exist_ok=True)
+    tmp_path = f"{WATERMARK_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp_path, WATERMARK_FILE)
+
+
+class _PartitionWriter:
+    """Open Parquet writers for one table, one file per month partition"""
+    
+    def __init__(self, table: str, schema, run_id: str):
+        self.table = table
+        self.schema = schema
+        self.run_id = run_id
+        self.writers: Dict[str, Any] = {}
+        self.rows = 0
+    
+    def _path(self, month: str) -> str:
+        return os.path.join(PARQUET_DIR, self.table, f"month={month}", f"part-{self.run_id}.parquet")
+    
+    def write(self, batches: Dict[str, Dict[str, List[Any]]]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        for month, columns in batches.items():
+            writer = self.writers.get(month)
+            if writer is None:
+                path = self._path(month)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                writer = pq.ParquetWriter(f"{path}.tmp", self.schema, compression="zstd")
+                self.writers[month] = writer
+            batch = pa.Table.from_pydict(columns, schema=self.schema)
+            writer.write_table(batch)
+            self.rows += batch.num_rows
+    
+    def commit(self) -> List[str]:
+        """Close all files and move them into place"""
+        paths = []
+        for month, writer in self.writers.items():
+            writer.close()
+            path = self._path(month)
+            os.replace(f"{path}.tmp", path)
+            paths.append(path)
+        return paths
+    
+    def abort(self) -> None:
+        for month, writer in self.writers.items():
+            writer.close()
+            try:
+                os.remove(f"{self._path(month)}.tmp")
+            except FileNotFoundError:
+                pass
+
+
+def _to_arrow_value(value: Any, is_json: bool) -> Any:
+    if value is None:
+        return None
+    if is_json:
+        return json.dumps(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+async def export_table(
+    db: AsyncSession,
+    table: str,
+    watermark: Optional[Dict[str, Any]],
+    run_id: str
+) -> Tuple[int, List[str], Optional[Dict[str, Any]]]:
+    """
+    Stream one table's changed rows into month partitions.
+    
+    Returns (rows_written, files, new_watermark).
+    """
+    model, watermark_name = EXPORT_TABLES[table]
+    columns = list(model.__table__.columns)
+    names = [column.name for column in columns]
+    json_columns = {column.name for column in columns if isinstance(column.type, JSON)}
+    watermark_column = getattr(model, watermark_name)
+    watermark_index = names.index(watermark_name)
+    id_index = names.index("id")
+    
+    query = select(*columns).order_by(watermark_column, model.id)
+    if watermark:
+        since = datetime.fromisoformat(watermark["at"])
+        query = query.where(or_(
+            watermark_column > since,
+            and_(watermark_column == since, model.id > watermark["id"]),
+        ))
+    else:
+        query = query.where(watermark_column.is_not(None))
+    
+    writer = _PartitionWriter(table, arrow_schema(model), run_id)
+    last_row = None
+    try:
+        result = await db.stream(query.execution_options(yield_per=settings.PARQUET_BATCH_ROWS))
+        async for rows in result.partitions():
+            batches: Dict[str, Dict[str, List[Any]]] = {}
+            for row in rows:
+                month = row[watermark_index].strftime("%Y-%m")
+                batch = batches.get(month)
+                if batch is None:
+                    batch = batches[month] = {name: [] for name in names}
+                for name, value in zip(names, row):
+                    batch[name].append(_to_arrow_value(value, name in json_columns))
+            last_row = rows[-1]
+            await asyncio.to_thread(writer.write, batches)
+    except BaseException:
+        await asyncio.to_thread(writer.abort)
+        raise
+    
+    files = await asyncio.to_thread(writer.commit)
+    if last_row is None:
+        return 0, files, watermark
+    return writer.rows, files, {
+        "at": last_row[watermark_index].isoformat(),
+        "id": last_row[id_index],
+    }
+
+
+async def run_parquet_export(db: AsyncSession, tables: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Export every (or the given) table incrementally.
+    
+    Returns {table: {"rows": n, "files": [...], "watermark": {...}}}. A
+    table's watermark is saved as soon as its files are in place, so a
+    failure part-way only repeats the unfinished tables.
+    """
+    async with _export_lock:
+        watermarks = await asyncio.to_thread(_load_watermarks)
+        run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        summary = {}
+        for table in tables or list(EXPORT_TABLES):
+            rows, files, watermark = await export_table(db, table, watermarks.get(table), run_id)
+            if watermark:
+                watermarks[table] = watermark
+                await asyncio.to_thread(_save_watermarks, watermarks)
+            summary[table] = {
+                "rows": rows,
+                "files": [os.path.relpath(path, settings.EXPORT_DIR) for path in files],
+                "watermark": watermark,
+            }
+        return summary
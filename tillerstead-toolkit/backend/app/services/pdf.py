@@ -0,0 +1,215 @@
+"""
+PDF estimates - Render quotes in a process pool behind a content-addressed cache
+
+Rendering is CPU-bound, so it runs in worker processes instead of on the
+event loop. Rendered files are keyed by a hash of the estimate content and
+PDF_TEMPLATE_VERSION, so an unchanged quote is served from EXPORT_DIR
+without re-rendering. The cache is size-capped with least-recently-used
+eviction (file mtime is bumped on every hit, before its path is returned).
+Files used within EVICT_GRACE_SECONDS are never evicted, so a path handed
+to a response is still there when the response opens it; the cache may
+briefly exceed its cap instead.
+"""
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.schemas.schemas import EstimateExport
+
+# Bump whenever the layout below changes so cached PDFs are re-rendered
+PDF_TEMPLATE_VERSION = "1"
+
+PDF_CACHE_DIR = os.path.join(settings.EXPORT_DIR, "pdf_cache")
+
+# Recently served files are kept past the size cap for this long
+EVICT_GRACE_SECONDS = 60
+
+_pool: Optional[ProcessPoolExecutor] = None
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def render_estimate_pdf(estimate: Dict[str, Any]) -> bytes:
+    """Render an estimate (EstimateExport as a JSON-mode dict) to PDF bytes"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from xml.sax.saxutils import escape  # Paragraph text is markup
+    
+    job = estimate["job"]
+    bom = estimate["bom"]
+    styles = getSampleStyleSheet()
+    rooms = {room["id"]: room["name"] for room in estimate["rooms"]}
+    
+    story = [
+        Paragraph(f"Estimate: {escape(job['name'])}", styles["Title"]),
+        Paragraph(f"Generated {estimate['generated_at'][:10]}", styles["Normal"]),
+        Spacer(1, 0.2 * inch),
+    ]
+    
+    client_lines = [
+        job.get("client_name"),
+        job.get("address_line1"),
+        job.get("address_line2"),
+        ", ".join(part for part in (job.get("city"), job.get("state"), job.get("zip_code")) if part),
+        job.get("client_email"),
+        job.get("client_phone"),
+    ]
+    for line in client_lines:
+        if line:
+            story.append(Paragraph(escape(line), styles["Normal"]))
+    story.append(Spacer(1, 0.3 * inch))
+    
+    rows = [["Item", "Room", "Qty", "Unit", "Unit Price", "Total"]]
+    for item in bom["line_items"]:
+        rows.append([
+            Paragraph(escape(item["name"]), styles["BodyText"]),
+            rooms.get(item["room_id"], ""),
+            f"{item['qty']:g}",
+            item["unit"],
+            f"${item['unit_price']:,.2f}",
+            f"${item['extended_price']:,.2f}",
+        ])
+    
+    items_table = Table(
+        rows,
+        colWidths=[2.6 * inch, 1.2 * inch, 0.6 * inch, 0.6 * inch, 0.9 * inch, 0.9 * inch],
+        repeatRows=1,
+    )
+    items_table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f3b2d")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("ALIGN", (2, 0), (-1, -1), "RIGHT"),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f2f2f2")]),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ]))
+    story += [items_table, Spacer(1, 0.3 * inch)]
+    
+    totals = [
+        ("Materials", bom["subtotal_materials"]),
+        ("Labor", bom["subtotal_labor"]),
+        ("Overhead", bom["overhead"]),
+        ("Profit", bom["profit"]),
+        ("Tax", bom["tax"]),
+        ("Contingency", bom["contingency"]),
+        ("Total", bom["grand_total"]),
+    ]
+    totals_table = Table(
+        [[label, f"${value:,.2f}"] for label, value in totals],
+        colWidths=[1.5 * inch, 1.2 * inch],
+        hAlign="RIGHT",
+    )
+    totals_table.setStyle(TableStyle([
+        ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+        ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+        ("LINEABOVE", (0, -1), (-1, -1), 1, colors.black),
+    ]))
+    story.append(totals_table)
+    
+    if job.get("notes"):
+        story += [Spacer(1, 0.3 * inch), Paragraph(escape(job["notes"]), styles["Normal"])]
+    
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter, title=f"Estimate - {job['name']}").build(story)
+    return buffer.getvalue()
+
+
+def estimate_cache_key(estimate: EstimateExport) -> str:
+    """Content hash of an estimate (ignoring generation time) plus template version"""
+    content = estimate.model_dump_json(exclude={"generated_at"})
+    return hashlib.sha256(f"{PDF_TEMPLATE_VERSION}:{content}".encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(PDF_CACHE_DIR, f"{key}.pdf")
+
+
+def _cache_get(key: str) -> Optional[str]:
+    """Path of a cached PDF (marking it recently used), or None"""
+    path = _cache_path(key)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def _cache_put(key: str, content: bytes) -> str:
+    """Store a rendered PDF and evict least recently used files over the size cap"""
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    path = _cache_path(key)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    
+    entries = []
+    for entry in os.scandir(PDF_CACHE_DIR):
+        if entry.name.endswith(".pdf") and entry.path != path:
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    
+    total = len(content) + sum(size for _, size, _ in entries)
+    in_use_after = time.time() - EVICT_GRACE_SECONDS
+    for mtime, size, old_path in sorted(entries):
+        if total <= settings.PDF_CACHE_MAX_BYTES or mtime > in_use_after:
+            break
+        try:
+            os.remove(old_path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return path
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_render_pool() -> None:
+    """Stop the render worker processes (called on app shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _render_to_cache(key: str, estimate: Dict[str, Any]) -> str:
+    loop = asyncio.get_running_loop()
+    content = await loop.run_in_executor(_get_pool(), render_estimate_pdf, estimate)
+    return await asyncio.to_thread(_cache_put, key, content)
+
+
+async def get_estimate_pdf(estimate: EstimateExport) -> str:
+    """
+    Path to the PDF for an estimate, rendering it only on a cache miss.
+    
+    Concurrent requests for the same content share a single render.
+    """
+    key = estimate_cache_key(estimate)
+    path = _cache_get(key)
+    if path:
+        return path
+    
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_render_to_cache(key, estimate.model_dump(mode="json")))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
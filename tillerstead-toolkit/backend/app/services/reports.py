@@ -0,0 +1,297 @@
+"""
+Portfolio reports - Spend and margin rollups maintained incrementally
+
+Line items are pre-aggregated into job_rollups, one row per (job, month,
+category, vendor). A job's rows are rebuilt only when it is stale:
+  - its Job.version differs from the version recorded in job_rollup_state
+    (any write to the job, its rooms or line items bumps the version), or
+  - a product its line items reference appears in the change feed after the
+    products watermark (vendor or cost changed), or
+  - it was deleted.
+Archived jobs (see services/archive.py) keep their rollup rows; only status
+changes to their stub are carried over.
+Report queries then read the small rollup table instead of every line item,
+and never write: the rollups are refreshed by a background task
+(run_rollup_refresher) whenever the change feed has moved past the
+watermark, and before jobs are archived.
+
+Refreshes are serialized: within a process by _refresh_lock, across
+workers by a row lock on the watermark (SELECT ... FOR UPDATE on
+PostgreSQL; SQLite allows a single writer anyway). Watermark and state
+rows are written with dialect-aware upserts, and a refresh that still hits
+a unique-key conflict is rolled back and retried.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import case, delete, func, insert, literal, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import async_session, engine
+from app.db.models import (
+    Job, JobLineItem, Product, ChangeLogEntry,
+    JobRollup, JobRollupState, RollupWatermark
+)
+
+PRODUCTS_WATERMARK = "job_rollups:products"
+
+# Bound on IN (...) parameters per statement (SQLite allows 999 on old builds)
+REFRESH_CHUNK_SIZE = 500
+
+# Attempts at a refresh that loses a unique-key race to another worker
+REFRESH_ATTEMPTS = 3
+
+_refresh_lock = asyncio.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def month_bucket(column):
+    """YYYY-MM of a datetime column, in the current database's dialect"""
+    if engine.dialect.name == "sqlite":
+        return func.strftime("%Y-%m", column)
+    return func.to_char(column, "YYYY-MM")
+
+
+def upsert(model):
+    """INSERT supporting ON CONFLICT, in the current database's dialect"""
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+async def _stale_job_ids(db: AsyncSession, since_seq: int, upto_seq: int) -> List[int]:
+    """Jobs whose rollup rows no longer match the job, its line items or products"""
+    outdated = (
+        select(Job.id)
+        .outerjoin(JobRollupState, JobRollupState.job_id == Job.id)
+        .where(or_(JobRollupState.job_id.is_(None), JobRollupState.version != Job.version))
+    )
+    deleted = (
+        select(JobRollupState.job_id)
+        .outerjoin(Job, Job.id == JobRollupState.job_id)
+        .where(Job.id.is_(None))
+    )
+    changed_products = (
+        select(ChangeLogEntry.entity_id)
+        .where(
+            ChangeLogEntry.entity == "products",
+            ChangeLogEntry.seq > since_seq,
+            ChangeLogEntry.seq <= upto_seq,
+        )
+    )
+    repriced = (
+        select(JobLineItem.job_id)
+        .where(JobLineItem.product_id.in_(changed_products))
+    )
+    result = await db.execute(outdated.union(deleted, repriced))
+    return sorted(result.scalars().all())
+
+
+async def _rebuild_jobs(db: AsyncSession, job_ids: List[int]) -> None:
+    """Replace rollup rows and state for a chunk of jobs with grouped INSERT ... SELECT"""
+    # Archived jobs have no line items in the hot tables; keep their rows
+    # and only carry over status changes made to the stub
+    archived = set((await db.scalars(
+        select(Job.id).where(Job.id.in_(job_ids), Job.archived_at.is_not(None))
+    )).all())
+    if archived:
+        await db.execute(
+            update(JobRollup)
+            .where(JobRollup.job_id.in_(archived))
+            .values(job_status=select(Job.status).where(Job.id == JobRollup.job_id).scalar_subquery())
+        )
+    rebuilt = [job_id for job_id in job_ids if job_id not in archived]
+    
+    await db.execute(delete(JobRollup).where(JobRollup.job_id.in_(rebuilt)))
+    await db.execute(delete(JobRollupState).where(JobRollupState.job_id.in_(job_ids)))
+    
+    month = month_bucket(JobLineItem.created_at)
+    costed = Product.cost.is_not(None)
+    aggregate = (
+        select(
+            JobLineItem.job_id,
+            month.label("month"),
+            Job.status,
+            JobLineItem.category,
+            Product.vendor,
+            func.count(JobLineItem.id),
+            func.coalesce(func.sum(JobLineItem.extended_price), 0.0),
+            func.coalesce(func.sum(case((costed, JobLineItem.extended_price), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((costed, JobLineItem.qty * Product.cost), else_=0.0)), 0.0),
+        )
+        .join(Job, Job.id == JobLineItem.job_id)
+        .outerjoin(Product, Product.id == JobLineItem.product_id)
+        .where(JobLineItem.job_id.in_(rebuilt), Job.is_template == False)
+        .group_by(JobLineItem.job_id, month, Job.status, JobLineItem.category, Product.vendor)
+    )
+    await db.execute(
+        insert(JobRollup).from_select(
+            ["job_id", "month", "job_status", "category", "vendor",
+             "item_count", "spend", "costed_spend", "cost"],
+            aggregate
+        )
+    )
+    
+    state = upsert(JobRollupState).from_select(
+        ["job_id", "version", "refreshed_at"],
+        select(Job.id, Job.version, literal(datetime.utcnow()))
+        .where(Job.id.in_(job_ids))
+    )
+    await db.execute(
+        state.on_conflict_do_update(
+            index_elements=[JobRollupState.job_id],
+            set_={"version": state.excluded.version, "refreshed_at": state.excluded.refreshed_at},
+        )
+    )
+
+
+async def _refresh(db: AsyncSession) -> int:
+    """One refresh attempt under the watermark row lock"""
+    await db.execute(
+        upsert(RollupWatermark)
+        .values(name=PRODUCTS_WATERMARK, seq=0)
+        .on_conflict_do_nothing(index_elements=[RollupWatermark.name])
+    )
+    result = await db.execute(
+        select(RollupWatermark)
+        .where(RollupWatermark.name == PRODUCTS_WATERMARK)
+        .with_for_update()
+    )
+    watermark = result.scalar_one()
+    
+    result = await db.execute(select(func.max(ChangeLogEntry.seq)))
+    upto_seq = result.scalar_one_or_none() or 0
+    
+    job_ids = await _stale_job_ids(db, watermark.seq, upto_seq)
+    for start in range(0, len(job_ids), REFRESH_CHUNK_SIZE):
+        await _rebuild_jobs(db, job_ids[start:start + REFRESH_CHUNK_SIZE])
+    
+    watermark.seq = upto_seq
+    await db.commit()
+    return len(job_ids)
+
+
+async def refresh_rollups(db: AsyncSession) -> int:
+    """
+    Bring job_rollups up to date and commit. Returns the number of jobs rebuilt.
+    
+    Cheap when nothing changed: one anti-join over jobs plus a change feed
+    range scan.
+    """
+    async with _refresh_lock:
+        for attempt in range(1, REFRESH_ATTEMPTS + 1):
+            try:
+                return await _refresh(db)
+            except IntegrityError:
+                await db.rollback()
+                if attempt == REFRESH_ATTEMPTS:
+                    raise
+
+
+async def rollups_pending(db: AsyncSession) -> bool:
+    """Whether the change feed has moved past the watermark (read-only check)"""
+    upto_seq = (await db.execute(select(func.max(ChangeLogEntry.seq)))).scalar_one_or_none() or 0
+    seen_seq = (await db.execute(
+        select(RollupWatermark.seq).where(RollupWatermark.name == PRODUCTS_WATERMARK)
+    )).scalar_one_or_none()
+    return seen_seq is None or upto_seq > seen_seq
+
+
+async def run_rollup_refresher(interval_seconds: float) -> None:
+    """Refresh job_rollups whenever there are new changes, checking every interval_seconds"""
+    while True:
+        try:
+            async with async_session() as db:
+                if await rollups_pending(db):
+                    rebuilt = await refresh_rollups(db)
+                    logger.debug("Rebuilt rollups for %d job(s)", rebuilt)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Rollup refresh failed")
+        await asyncio.sleep(interval_seconds)
+
+
+def _month_range(query, start: Optional[str], end: Optional[str]):
+    if start:
+        query = query.where(JobRollup.month >= start)
+    if end:
+        query = query.where(JobRollup.month <= end)
+    return query
+
+
+async def spend_by_category(db: AsyncSession, start: Optional[str] = None, end: Optional[str] = None):
+    """(month, category, item_count, spend) rows, oldest month first"""
+    query = (
+        select(
+            JobRollup.month,
+            JobRollup.category,
+            func.sum(JobRollup.item_count),
+            func.sum(JobRollup.spend),
+        )
+        .group_by(JobRollup.month, JobRollup.category)
+        .order_by(JobRollup.month, JobRollup.category)
+    )
+    result = await db.execute(_month_range(query, start, end))
+    return result.all()
+
+
+async def margin_by_status(db: AsyncSession, start: Optional[str] = None, end: Optional[str] = None):
+    """(status, job_count, spend, cost, avg_margin_percent) rows"""
+    per_job = _month_range(
+        select(
+            JobRollup.job_id,
+            JobRollup.job_status,
+            func.sum(JobRollup.spend).label("spend"),
+            func.sum(JobRollup.costed_spend).label("costed_spend"),
+            func.sum(JobRollup.cost).label("cost"),
+        )
+        .group_by(JobRollup.job_id, JobRollup.job_status),
+        start, end
+    ).subquery()
+    
+    margin = case(
+        (per_job.c.costed_spend > 0,
+         (per_job.c.costed_spend - per_job.c.cost) * 100.0 / per_job.c.costed_spend),
+    )
+    result = await db.execute(
+        select(
+            per_job.c.job_status,
+            func.count(per_job.c.job_id),
+            func.sum(per_job.c.spend),
+            func.sum(per_job.c.cost),
+            func.avg(margin),
+        )
+        .group_by(per_job.c.job_status)
+        .order_by(per_job.c.job_status)
+    )
+    return result.all()
+
+
+async def top_vendors(
+    db: AsyncSession,
+    limit: int = 10,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+):
+    """(vendor, job_count, item_count, spend) rows, highest spend first"""
+    spend = func.sum(JobRollup.spend)
+    query = (
+        select(
+            JobRollup.vendor,
+            func.count(func.distinct(JobRollup.job_id)),
+            func.sum(JobRollup.item_count),
+            spend,
+        )
+        .where(JobRollup.vendor.is_not(None))
+        .group_by(JobRollup.vendor)
+        .order_by(spend.desc())
+        .limit(limit)
+    )
+    result = await db.execute(_month_range(query, start, end))
+    return result.all()
@@ -0,0 +1,222 @@
+"""
+Estimate risk - Monte Carlo totals for a job instead of a flat contingency
+
+Each line item's amount (extended_price) varies with two factors:
+  - quantity: normal around the ordered quantity, with a standard deviation
+    of half the calculator's waste_percent (so the waste allowance spans
+    about two standard deviations), or DEFAULT_QUANTITY_CV without one
+  - price: lognormal with mean 1 and the volatility of the product's cost
+    in price_history (std of log changes between successive records), or
+    DEFAULT_PRICE_VOLATILITY with fewer than MIN_PRICE_POINTS records
+Lines of the same product share one price draw. Unmapped lines each get
+their own.
+
+Because quantity noise is normal and independent per line, the lines of a
+price group sum to a single normal term, and given the price draws the
+groups' terms sum to one normal too. A simulation therefore draws one
+price per group plus one quantity term per draw, not two per line.
+Totals apply the job's overhead, profit and tax exactly as bom_totals()
+does, without contingency. The recommended contingency is the percent
+that brings the estimate up to the target percentile.
+
+Results are cached by job version and the latest price_history row of the
+job's products, so repeated requests are served without simulating. The
+simulation and cache reads/writes (Redis when shared) run in a worker
+thread so they do not hold up the event loop.
+"""
+import asyncio
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import memoize
+from app.db.models import Job, JobLineItem, PriceHistory
+from app.schemas.schemas import JobRiskResult
+from app.services.archive import load_archive
+
+# Bump when the model below changes so cached results are recomputed
+RISK_VERSION = "1"
+
+DEFAULT_DRAWS = 100_000
+MAX_DRAWS = 250_000
+DEFAULT_QUANTITY_CV = 0.05
+DEFAULT_PRICE_VOLATILITY = 0.05
+MIN_PRICE_POINTS = 3
+
+# Upper bound on draws x groups per simulated block (memory stays ~16 MB)
+CHUNK_CELLS = 4_000_000
+
+risk_cache = memoize("job_risk", RISK_VERSION)
+_risk_adapter = TypeAdapter(JobRiskResult)
+
+
+def _quantity_sd(calculator_inputs: Optional[Dict[str, Any]]) -> float:
+    """Relative standard deviation of a line's quantity"""
+    waste = (calculator_inputs or {}).get("waste_percent")
+    try:
+        waste = float(waste)
+    except (TypeError, ValueError):
+        return DEFAULT_QUANTITY_CV
+    return max(waste, 0.0) / 200.0
+
+
+def price_volatility(costs: List[float]) -> float:
+    """Std of log changes between successive cost records"""
+    costs = np.asarray([cost for cost in costs if cost and cost > 0], dtype=float)
+    if len(costs) < MIN_PRICE_POINTS:
+        return DEFAULT_PRICE_VOLATILITY
+    return float(np.std(np.diff(np.log(costs)), ddof=1))
+
+
+def simulate_materials(
+    amounts: np.ndarray,
+    spread: np.ndarray,
+    volatility: np.ndarray,
+    draws: int,
+    seed: int
+) -> np.ndarray:
+    """
+    Material subtotal per draw.
+    
+    amounts / spread are each price group's expected amount and the std of
+    its quantity noise (same units); volatility is the group's log price std.
+    Given the price draws, the summed quantity noise is a single normal with
+    variance sum(price**2 * spread**2), so only prices are drawn per group.
+    """
+    rng = np.random.default_rng(seed)
+    amounts32 = amounts.astype(np.float32)
+    variance32 = (spread ** 2).astype(np.float32)
+    sigma = volatility.astype(np.float32)
+    drift = sigma ** 2 / 2
+    
+    totals = np.empty(draws)
+    chunk = max(CHUNK_CELLS // max(len(amounts), 1), 1)
+    for start in range(0, draws, chunk):
+        n = min(chunk, draws - start)
+        price = rng.standard_normal((n, len(amounts)), dtype=np.float32)
+        price *= sigma
+        price -= drift
+        np.exp(price, out=price)
+        expected = price @ amounts32
+        np.square(price, out=price)
+        noise = np.sqrt(price @ variance32) * rng.standard_normal(n, dtype=np.float32)
+        totals[start:start + n] = np.maximum(expected + noise, 0.0)
+    return totals
+
+
+async def _price_groups(
+    db: AsyncSession,
+    lines: List[Tuple[Optional[int], float, Optional[Dict[str, Any]]]]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """(amount, quantity spread, volatility) per price group and the line count"""
+    groups: Dict[Any, List[float]] = {}
+    line_count = 0
+    for line_count, (product_id, amount, inputs) in enumerate(lines, start=1):
+        amount = amount or 0.0
+        key = product_id if product_id is not None else ("line", line_count)
+        group = groups.setdefault(key, [0.0, 0.0])
+        group[0] += amount
+        group[1] += (amount * _quantity_sd(inputs)) ** 2
+    
+    product_ids = [key for key in groups if not isinstance(key, tuple)]
+    history: Dict[int, List[float]] = {}
+    if product_ids:
+        result = await db.execute(
+            select(PriceHistory.product_id, PriceHistory.cost)
+            .where(PriceHistory.product_id.in_(product_ids))
+            .order_by(PriceHistory.product_id, PriceHistory.recorded_at, PriceHistory.id)
+        )
+        for product_id, cost in result.all():
+            history.setdefault(product_id, []).append(cost)
+    
+    amounts = np.array([group[0] for group in groups.values()])
+    spread = np.sqrt([group[1] for group in groups.values()])
+    volatility = np.array([
+        price_volatility(history.get(key, [])) if not isinstance(key, tuple) else DEFAULT_PRICE_VOLATILITY
+        for key in groups
+    ])
+    return amounts, spread, volatility, line_count
+
+
+async def job_risk(
+    db: AsyncSession,
+    job: Job,
+    draws: int = DEFAULT_DRAWS,
+    target_percentile: float = 80.0,
+    seed: int = 0
+) -> JobRiskResult:
+    """
+    Simulate a job's estimate total, reusing the cached result for this job
+    version and prices. Archived jobs are read from their archive.
+    """
+    archived = await load_archive(db, job.id) if job.archived_at is not None else None
+    if archived is None:
+        product_ids = select(JobLineItem.product_id).where(JobLineItem.job_id == job.id)
+    else:
+        product_ids = [item.product_id for item in archived[1] if item.product_id is not None]
+    result = await db.execute(
+        select(func.max(PriceHistory.id)).where(PriceHistory.product_id.in_(product_ids))
+    )
+    key = risk_cache.key({
+        "job_id": job.id,
+        "version": job.version,
+        "prices": result.scalar_one_or_none(),
+        "draws": draws,
+        "target": target_percentile,
+        "seed": seed,
+    })
+    cached = await asyncio.to_thread(risk_cache.get, key, _risk_adapter)
+    if cached is not None:
+        return cached
+    
+    if archived is None:
+        result = await db.execute(
+            select(JobLineItem.product_id, JobLineItem.extended_price, JobLineItem.calculator_inputs)
+            .where(JobLineItem.job_id == job.id)
+        )
+        lines = result.all()
+    else:
+        lines = [(item.product_id, item.extended_price, item.calculator_inputs) for item in archived[1]]
+    amounts, spread, volatility, line_count = await _price_groups(db, lines)
+    subtotal = float(amounts.sum())
+    # bom_totals() without contingency, as a multiple of the material subtotal
+    overhead, profit, tax = job.overhead_percent / 100, job.profit_percent / 100, job.tax_percent / 100
+    factor = (1 + overhead) * (1 + profit) + tax
+    contingency = job.contingency_percent
+    current_total = subtotal * factor + subtotal * contingency / 100
+    
+    def simulate() -> Tuple[float, ...]:
+        materials = simulate_materials(amounts, spread, volatility, draws, seed) if subtotal else np.zeros(1)
+        totals = materials * factor
+        p50, p80, p95, target = np.percentile(totals, [50, 80, 95, target_percentile])
+        covers = np.mean(totals <= current_total + 1e-9)
+        return float(totals.mean()), float(p50), float(p80), float(p95), float(target), float(covers)
+    
+    mean, p50, p80, p95, target, covers = await asyncio.to_thread(simulate)
+    recommended = max(target - subtotal * factor, 0.0) * 100 / subtotal if subtotal else 0.0
+    
+    risk = JobRiskResult(
+        job_id=job.id,
+        job_version=job.version,
+        draws=draws,
+        seed=seed,
+        line_count=line_count,
+        price_groups=len(amounts),
+        subtotal_materials=round(subtotal, 2),
+        estimate_total=round(subtotal * factor, 2),
+        mean_total=round(mean, 2),
+        p50_total=round(p50, 2),
+        p80_total=round(p80, 2),
+        p95_total=round(p95, 2),
+        contingency_percent=contingency,
+        contingency_total=round(current_total, 2),
+        contingency_covers_percentile=round(covers * 100, 2),
+        target_percentile=target_percentile,
+        recommended_contingency_percent=round(math.ceil(recommended * 100) / 100, 2),
+    )
+    await asyncio.to_thread(risk_cache.set, key, risk, _risk_adapter)
+    return risk
@@ -0,0 +1,575 @@
+"""
+Tile layout - Lay a tile grid over a room outline and count what to order
+
+Instead of a flat waste percentage, the room polygon is covered with a
+straight or running-bond tile grid, each tile is classified as full, cut
+or outside, and cut pieces are filled from offcuts of earlier cuts where
+they fit (greedy best fit, guillotine remainders). Start offsets of the
+grid are searched to find the layout that needs the fewest tiles.
+
+sweep_layouts() compares many tiles, patterns and box sizes for one room.
+Running the optimizer per scenario does not scale to a grid of sizes, so
+the sweep counts tiles in closed form instead: for a uniformly random grid
+origin, the expected number of grid cells an outline touches is the area
+of the outline grown by one cell, over the cell area (Steiner's formula,
+exact for convex outlines),
+    area / (pitch_x * pitch_y) + x_extent / pitch_x + y_extent / pitch_y + 1
+with extents taken as half the outline's total |dx| and |dy|. That is one
+NumPy expression over the whole size x box grid. It ignores offcut reuse
+and the origin search, so it estimates a typical layout (and is the same
+for both patterns); the optimizer re-counts the cheapest refine_top
+layouts on request.
+
+Classification is vectorized with NumPy over (tile rows x outline edges),
+so its cost grows with the room's perimeter rather than its tile count:
+a tile is cut when an outline edge passes through its interior, otherwise
+it is full when its center is inside the outline (even-odd rule). The
+piece needed for a cut tile is the bounding box of its overlap with the
+room, computed from tile corners inside the room, outline vertices inside
+the tile and edge/tile-border intersections.
+
+All lengths here are inches.
+"""
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.schemas.schemas import (
+    RoomDimensions, SweepRange, TileLayoutRequest, TileLayoutResult,
+    TileOption, TileSweepRequest, TileSweepRow, TileSweepResult
+)
+from app.services.geometry import _number, shape_metrics, shape_polygon
+
+EPS = 1e-6
+
+# Curved shapes are laid out as regular polygons with this many sides
+CURVE_SEGMENTS = 64
+
+# Offsets tried per axis when searching start positions (plus centered)
+DEFAULT_SEARCH_STEPS = 4
+
+# Candidates that get the full offcut-reuse pass after the quick count
+REUSE_FINALISTS = 3
+
+# Layouts with more estimated tiles than this are not optimized: the
+# tile-layout endpoint rejects them and the sweep leaves them unrefined
+MAX_LAYOUT_TILES = 50_000
+
+
+@dataclass
+class LayoutCandidate:
+    """Tile counts for one grid origin"""
+    origin: Tuple[float, float]
+    full_tiles: int
+    cut_pieces: List[Tuple[float, float]] = field(default_factory=list)
+    from_offcuts: int = 0
+    tiles_needed: int = 0
+
+
+def _edges(rings: Sequence[np.ndarray]) -> Tuple[np.ndarray, ...]:
+    """Edge endpoint arrays (ax, ay, bx, by) of all rings"""
+    starts = np.concatenate(rings)
+    ends = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+    return starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+
+
+def _inside(px: np.ndarray, py: np.ndarray, edges) -> np.ndarray:
+    """Even-odd point-in-polygon for points (any shape) against all edges"""
+    ax, ay, bx, by = edges
+    px = px[..., None]
+    py = py[..., None]
+    straddles = (ay > py) != (by > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = ax + (py - ay) * (bx - ax) / (by - ay)
+    return np.count_nonzero(straddles & (px < x_cross), axis=-1) % 2 == 1
+
+
+def _scan(bounds, tile_w, tile_h, joint, origin, row_shift, edges) -> Tuple[int, np.ndarray, np.ndarray]:
+    """
+    (full tile count, lower-left corners of cut tiles) for one grid origin.
+    
+    Works per tile row rather than per tile: each edge is clipped to the
+    row's band, and the tiles whose span strictly overlaps a clipped edge
+    are the cut tiles. Full tiles are counted from where the row's center
+    line is inside the outline, less the cut tiles centered there.
+    """
+    ax, ay, bx, by = edges
+    xmin, ymin, xmax, ymax = bounds
+    pitch_x, pitch_y = tile_w + joint, tile_h + joint
+    ox, oy = origin
+    
+    rows = np.arange(math.floor((ymin - oy) / pitch_y) - 1, math.ceil((ymax - oy) / pitch_y) + 1)
+    y0 = oy + rows * pitch_y
+    xs = ox + (rows * row_shift) % 1.0 * pitch_x  # x of column 0 in each row
+    Y0, XS = y0[:, None], xs[:, None]
+    
+    # x extent of each edge strictly inside each row's band
+    dx, dy = bx - ax, by - ay
+    flat = np.abs(dy) < EPS
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_a = np.clip((Y0 + EPS - ay) / dy, 0, 1)
+        t_b = np.clip((Y0 + tile_h - EPS - ay) / dy, 0, 1)
+    t_lo = np.where(flat, 0.0, np.minimum(t_a, t_b))
+    t_hi = np.where(flat, 1.0, np.maximum(t_a, t_b))
+    in_band = np.where(flat, (ay > Y0 + EPS) & (ay < Y0 + tile_h - EPS), t_hi > t_lo)
+    x_a, x_b = ax + t_lo * dx, ax + t_hi * dx
+    lo, hi = np.minimum(x_a, x_b), np.maximum(x_a, x_b)
+    
+    # Columns whose tile (x, x + tile_w) strictly overlaps [lo, hi]
+    col_lo = np.floor((lo + EPS - XS - tile_w) / pitch_x) + 1
+    col_hi = np.ceil((hi - EPS - XS) / pitch_x) - 1
+    counts = np.where(in_band, col_hi - col_lo + 1, 0).clip(min=0).astype(np.int64).ravel()
+    starts = col_lo.ravel()[counts > 0].astype(np.int64)
+    row_index = np.broadcast_to(np.arange(len(rows))[:, None], in_band.shape).ravel()
+    row_index, counts = row_index[counts > 0], counts[counts > 0]
+    
+    step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cut_rows = np.repeat(row_index, counts)
+    cut_cols = np.repeat(starts, counts) + step
+    if len(cut_cols):
+        col_min = cut_cols.min()
+        keys = np.unique(cut_rows * (cut_cols.max() - col_min + 1) + (cut_cols - col_min))
+        cut_rows, cut_cols = np.divmod(keys, cut_cols.max() - col_min + 1)
+        cut_cols = cut_cols + col_min
+    cut_x = xs[cut_rows] + cut_cols * pitch_x
+    cut_y = y0[cut_rows]
+    
+    # Inside spans of each row's center line (sorted even-odd crossings)
+    yc = Y0 + tile_h / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossings = np.where((ay > yc) != (by > yc), ax + (yc - ay) * dx / dy, np.inf)
+    crossings.sort(axis=1)
+    pairs = crossings.shape[1] // 2
+    enter, leave = crossings[:, 0:2 * pairs:2], crossings[:, 1:2 * pairs:2]
+    spans = np.isfinite(leave)
+    with np.errstate(invalid="ignore"):
+        first = np.ceil((enter - XS - tile_w / 2) / pitch_x)
+        last = np.floor((leave - XS - tile_w / 2) / pitch_x)
+        centered = int(np.where(spans, (last - first + 1).clip(min=0), 0).sum())
+    
+    cut_centered = int(_inside(cut_x + tile_w / 2, cut_y + tile_h / 2, edges).sum())
+    return centered - cut_centered, cut_x, cut_y
+
+
+def _cut_pieces(x0, y0, tile_w, tile_h, edges, vertices) -> np.ndarray:
+    """(n x 2) width/height of the part of each cut tile inside the room"""
+    ax, ay, bx, by = edges
+    x1, y1 = x0 + tile_w, y0 + tile_h
+    n = len(x0)
+    
+    # Tile corners inside the room
+    corner_x = np.stack([x0, x1, x0, x1], axis=1)
+    corner_y = np.stack([y0, y0, y1, y1], axis=1)
+    corner_in = _inside(corner_x, corner_y, edges)
+    
+    # Outline vertices inside the tile
+    vx, vy = vertices[:, 0], vertices[:, 1]
+    vert_in = (
+        (vx >= x0[:, None] - EPS) & (vx <= x1[:, None] + EPS)
+        & (vy >= y0[:, None] - EPS) & (vy <= y1[:, None] + EPS)
+    )
+    vert_x = np.broadcast_to(vx, (n, len(vx)))
+    vert_y = np.broadcast_to(vy, (n, len(vy)))
+    
+    # Outline edges crossing the four tile border lines, within the border
+    dx, dy = bx - ax, by - ay
+    points_x, points_y, points_ok = [], [], []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for border, vertical in ((x0, True), (x1, True), (y0, False), (y1, False)):
+            if vertical:
+                t = (border[:, None] - ax) / dx
+                px = np.broadcast_to(border[:, None], t.shape)
+                py = ay + t * dy
+                within = (py >= y0[:, None] - EPS) & (py <= y1[:, None] + EPS)
+            else:
+                t = (border[:, None] - ay) / dy
+                py = np.broadcast_to(border[:, None], t.shape)
+                px = ax + t * dx
+                within = (px >= x0[:, None] - EPS) & (px <= x1[:, None] + EPS)
+            points_x.append(px)
+            points_y.append(py)
+            points_ok.append(np.isfinite(t) & (t >= -EPS) & (t <= 1 + EPS) & within)
+    
+    all_x = np.concatenate([corner_x, vert_x] + points_x, axis=1)
+    all_y = np.concatenate([corner_y, vert_y] + points_y, axis=1)
+    ok = np.concatenate([corner_in, vert_in] + points_ok, axis=1)
+    
+    min_x = np.where(ok, all_x, np.inf).min(axis=1)
+    max_x = np.where(ok, all_x, -np.inf).max(axis=1)
+    min_y = np.where(ok, all_y, np.inf).min(axis=1)
+    max_y = np.where(ok, all_y, -np.inf).max(axis=1)
+    width = np.clip(np.minimum(max_x, x1) - np.maximum(min_x, x0), 0, tile_w)
+    height = np.clip(np.minimum(max_y, y1) - np.maximum(min_y, y0), 0, tile_h)
+    return np.stack([np.nan_to_num(width), np.nan_to_num(height)], axis=1)
+
+
+def reuse_offcuts(
+    pieces: Sequence[Tuple[float, float]],
+    tile_w: float,
+    tile_h: float,
+    kerf: float = 0.125,
+    min_offcut: float = 2.0,
+    allow_rotation: bool = False
+) -> Tuple[int, int]:
+    """
+    Greedily cut pieces from offcuts before opening new tiles.
+    
+    Pieces are placed largest first into the smallest offcut they fit
+    (rotated too if allowed). Cutting a piece leaves one guillotine
+    remainder, the larger of the two strips, which goes back to the pool
+    if both sides are at least min_offcut. Returns (new_tiles, from_offcuts).
+    """
+    pool: List[Tuple[float, float]] = []
+    new_tiles = from_offcuts = 0
+    
+    def remainder(stock_w: float, stock_h: float, w: float, h: float) -> None:
+        right = (stock_w - w - kerf, stock_h)
+        top = (stock_w, stock_h - h - kerf)
+        best = max(right, top, key=lambda r: r[0] * r[1])
+        if min(best) >= min_offcut:
+            pool.append(best)
+    
+    for w, h in sorted(pieces, key=lambda p: p[0] * p[1], reverse=True):
+        best_index, best_fit = None, None
+        for index, (ow, oh) in enumerate(pool):
+            if w <= ow + EPS and h <= oh + EPS:
+                fit = (ow, oh, False)
+            elif allow_rotation and h <= ow + EPS and w <= oh + EPS:
+                fit = (ow, oh, True)
+            else:
+                continue
+            if best_fit is None or ow * oh < best_fit[0] * best_fit[1]:
+                best_index, best_fit = index, fit
+        
+        if best_fit is None:
+            new_tiles += 1
+            remainder(tile_w, tile_h, w, h)
+            continue
+        
+        from_offcuts += 1
+        pool.pop(best_index)
+        ow, oh, rotated = best_fit
+        remainder(ow, oh, *((h, w) if rotated else (w, h)))
+    return new_tiles, from_offcuts
+
+
+def shape_rings(shape: Dict[str, Any]) -> List[np.ndarray]:
+    """Outline (in inches) of a geometry shape, curves as polygons"""
+    polygon = shape_polygon(shape)
+    if polygon is None:
+        radius = _number(shape, "radius", shape["diameter"] / 2 if shape.get("diameter") else None)
+        angle = 2 * math.pi if str(shape.get("type")).lower() == "circle" else \
+            math.radians(_number(shape, "angle_deg", 180.0))
+        steps = max(int(CURVE_SEGMENTS * angle / (2 * math.pi)), 4)
+        theta = np.linspace(0, angle, steps + 1)
+        polygon = np.stack([radius * np.cos(theta), radius * np.sin(theta)], axis=1)
+        if not math.isclose(angle, 2 * math.pi):
+            polygon = np.vstack([[0.0, 0.0], polygon])
+        else:
+            polygon = polygon[:-1]
+    return [polygon * 12.0]
+
+
+def layout_rings(
+    rings: Sequence[np.ndarray],
+    tile_w: float,
+    tile_h: float,
+    joint: float = 0.125,
+    pattern: str = "straight",
+    offset_fraction: float = 0.5,
+    search_steps: int = DEFAULT_SEARCH_STEPS,
+    kerf: float = 0.125,
+    min_offcut: float = 2.0,
+    allow_rotation: bool = False
+) -> LayoutCandidate:
+    """
+    Best layout of one outline (rings in inches; extra rings are holes).
+    
+    Every origin on a search_steps x search_steps grid within one tile
+    pitch, plus the centered layout, gets a quick full + cut count; the
+    REUSE_FINALISTS best then get the offcut pass and the fewest tiles wins.
+    """
+    edges = _edges(rings)
+    vertices = np.concatenate(rings)
+    bounds = (vertices[:, 0].min(), vertices[:, 1].min(), vertices[:, 0].max(), vertices[:, 1].max())
+    row_shift = offset_fraction if pattern == "offset" else 0.0
+    pitch_x, pitch_y = tile_w + joint, tile_h + joint
+    
+    origins = [
+        (bounds[0] + pitch_x * i / search_steps, bounds[1] + pitch_y * j / search_steps)
+        for i in range(search_steps) for j in range(search_steps)
+    ]
+    center_x, center_y = (bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2
+    origins.append((center_x - tile_w / 2, center_y - tile_h / 2))
+    
+    candidates = []
+    for origin in origins:
+        full, cut_x, cut_y = _scan(bounds, tile_w, tile_h, joint, origin, row_shift, edges)
+        candidates.append((full + len(cut_x), origin, full, cut_x, cut_y))
+    candidates.sort(key=lambda c: c[0])
+    
+    best: Optional[LayoutCandidate] = None
+    for _, origin, full, cut_x, cut_y in candidates[:REUSE_FINALISTS]:
+        pieces = _cut_pieces(cut_x, cut_y, tile_w, tile_h, edges, vertices)
+        pieces = [tuple(p) for p in pieces if p[0] > EPS and p[1] > EPS]
+        new_tiles, from_offcuts = reuse_offcuts(pieces, tile_w, tile_h, kerf, min_offcut, allow_rotation)
+        candidate = LayoutCandidate(
+            origin=(round(origin[0] - bounds[0], 3), round(origin[1] - bounds[1], 3)),
+            full_tiles=full,
+            cut_pieces=pieces,
+            from_offcuts=from_offcuts,
+            tiles_needed=full + new_tiles,
+        )
+        if best is None or candidate.tiles_needed < best.tiles_needed:
+            best = candidate
+    return best
+
+
+def floor_shapes(dimensions: RoomDimensions) -> List[Dict[str, Any]]:
+    """Floor shapes of a room (a length x width rectangle without shapes)"""
+    shapes: List[Dict[str, Any]] = list(dimensions.shapes or [])
+    if not shapes and dimensions.length and dimensions.width:
+        shapes = [{"type": "rectangle", "length": dimensions.length, "width": dimensions.width}]
+    return shapes
+
+
+def estimate_layout_tiles(dimensions: RoomDimensions, request: TileLayoutRequest) -> int:
+    """Tiles a layout is expected to touch, from the outlines alone (see expected_tiles)"""
+    terms = [
+        outline_terms(shape_rings(shape))
+        for shape in floor_shapes(dimensions) if not shape.get("subtract")
+    ]
+    joint = request.grout_joint_in
+    return math.ceil(float(expected_tiles(
+        terms, request.tile_length_in + joint, request.tile_width_in + joint
+    )) - EPS)
+
+
+def plan_layout(dimensions: RoomDimensions, request: TileLayoutRequest) -> TileLayoutResult:
+    """
+    Lay out every added shape of a room, each on its own grid, and total
+    the counts (raises ValueError on bad shapes). Subtracted shapes and
+    floor openings carry no position, so they are not cut out of the
+    layout; floor area and waste are measured on the gross floor area.
+    """
+    started = time.perf_counter()
+    shapes = floor_shapes(dimensions)
+    
+    full_tiles = cut_pieces = from_offcuts = tiles_needed = 0
+    origins = []
+    for shape in shapes:
+        if shape.get("subtract"):
+            continue
+        best = layout_rings(
+            shape_rings(shape), request.tile_length_in, request.tile_width_in,
+            request.grout_joint_in, request.pattern.value, request.offset_fraction,
+            request.search_steps, request.kerf_in, request.min_offcut_in, request.allow_rotation
+        )
+        full_tiles += best.full_tiles
+        cut_pieces += len(best.cut_pieces)
+        from_offcuts += best.from_offcuts
+        tiles_needed += best.tiles_needed
+        origins.append(list(best.origin))
+    
+    floor_area = sum(shape_metrics(shape)[0] for shape in shapes if not shape.get("subtract"))
+    tile_sqft = request.tile_length_in * request.tile_width_in / 144.0
+    # Each tile covers its face plus half the joint on every side
+    pitch_sqft = (request.tile_length_in + request.grout_joint_in) * \
+        (request.tile_width_in + request.grout_joint_in) / 144.0
+    covered = tiles_needed * pitch_sqft
+    tiles_to_order = math.ceil(tiles_needed * (1 + request.breakage_percent / 100) - EPS)
+    flat_tiles = math.ceil(floor_area * (1 + request.flat_waste_percent / 100) / tile_sqft - EPS)
+    per_box = request.tiles_per_box
+    return TileLayoutResult(
+        pattern=request.pattern,
+        floor_area_sqft=round(floor_area, 4),
+        full_tiles=full_tiles,
+        cut_pieces=cut_pieces,
+        cuts_from_offcuts=from_offcuts,
+        tiles_needed=tiles_needed,
+        tiles_to_order=tiles_to_order,
+        boxes=math.ceil(tiles_to_order / per_box) if per_box else None,
+        waste_percent=round((covered - floor_area) * 100 / covered, 2) if covered else 0.0,
+        flat_waste_tiles=flat_tiles,
+        flat_waste_boxes=math.ceil(flat_tiles / per_box) if per_box else None,
+        origins_in=origins,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+def sweep_values(sweep: Optional[SweepRange]) -> np.ndarray:
+    """Values of a sweep range (empty when not given)"""
+    if sweep is None:
+        return np.empty(0)
+    return sweep.start + np.arange(sweep.count) * sweep.step
+
+
+def outline_terms(rings: Sequence[np.ndarray]) -> Tuple[float, float, float]:
+    """(area, x extent, y extent) of an outline in inches; extents are half the total |dx| / |dy|"""
+    area = extent_x = extent_y = 0.0
+    for ring in rings:
+        x, y = ring[:, 0], ring[:, 1]
+        next_x, next_y = np.roll(x, -1), np.roll(y, -1)
+        area += abs(float(np.dot(x, next_y) - np.dot(next_x, y))) / 2
+        extent_x += float(np.abs(next_x - x).sum()) / 2
+        extent_y += float(np.abs(next_y - y).sum()) / 2
+    return area, extent_x, extent_y
+
+
+def expected_tiles(terms: Sequence[Tuple[float, float, float]], pitch_x, pitch_y) -> np.ndarray:
+    """Expected tiles touched by each outline for a random grid origin, summed (broadcasts over pitches)"""
+    area, extent_x, extent_y = np.sum(terms, axis=0) if len(terms) else (0.0, 0.0, 0.0)
+    return area / (pitch_x * pitch_y) + extent_x / pitch_x + extent_y / pitch_y + len(terms)
+
+
+def _box_terms(option: TileOption, product: Optional[Any]) -> Tuple[float, float]:
+    """(tiles per box, price per box) of an option, NaN where unknown"""
+    tile_sqft = option.tile_length_in * option.tile_width_in / 144.0
+    per_box = option.tiles_per_box
+    coverage = product.coverage_per_unit if product is not None else None
+    if per_box is None and coverage and (product.coverage_unit or "sqft") == "sqft":
+        per_box = max(round(coverage / tile_sqft), 1)
+    
+    price = option.price_per_box
+    if price is None and product is not None and product.our_price is not None:
+        if product.unit != "sqft":
+            price = product.our_price
+        elif per_box is not None:
+            # Tile priced per square foot is sold by the box actually used
+            price = product.our_price * per_box * tile_sqft
+    return (
+        float(per_box) if per_box is not None else math.nan,
+        float(price) if price is not None else math.nan,
+    )
+
+
+def _tile_grid(request: TileSweepRequest, products: Dict[int, Any]) -> Tuple[np.ndarray, ...]:
+    """(length, width, tiles per box, price per box, product id) per tile: options, then the size x box grid"""
+    option_terms = [_box_terms(option, products.get(option.product_id)) for option in request.options]
+    length = np.array([option.tile_length_in for option in request.options], dtype=float)
+    width = np.array([option.tile_width_in for option in request.options], dtype=float)
+    per_box = np.array([terms[0] for terms in option_terms], dtype=float)
+    price = np.array([terms[1] for terms in option_terms], dtype=float)
+    product_id = np.array([
+        option.product_id if option.product_id is not None else -1 for option in request.options
+    ], dtype=np.int64)
+    
+    lengths = sweep_values(request.tile_lengths_in)
+    widths = sweep_values(request.tile_widths_in) if request.tile_widths_in else lengths
+    box_sqft = sweep_values(request.box_sqft)
+    if len(lengths) and len(widths):
+        if not len(box_sqft):
+            box_sqft = np.array([math.nan])
+        grid_length, grid_width, grid_box = (
+            axis.ravel() for axis in np.meshgrid(lengths, widths, box_sqft, indexing="ij")
+        )
+        tile_sqft = grid_length * grid_width / 144.0
+        grid_per_box = np.maximum(np.round(grid_box / tile_sqft), 1.0)
+        unit_price = math.nan if request.price_per_sqft is None else request.price_per_sqft
+        length = np.concatenate([length, grid_length])
+        width = np.concatenate([width, grid_width])
+        per_box = np.concatenate([per_box, grid_per_box])
+        price = np.concatenate([price, unit_price * grid_per_box * tile_sqft])
+        product_id = np.concatenate([product_id, np.full(len(grid_length), -1, dtype=np.int64)])
+    return length, width, per_box, price, product_id
+
+
+def sweep_layouts(
+    dimensions: RoomDimensions,
+    request: TileSweepRequest,
+    products: Dict[int, Any]
+) -> TileSweepResult:
+    """
+    Estimate tiles, boxes and cost for every tile x pattern scenario as
+    arrays, re-count the cheapest refine_top layouts with plan_layout(),
+    and return the cheapest scenarios first. products maps product_id to
+    Product rows loaded by the caller. TileSweepRequest validation bounds
+    the scenarios by MAX_SWEEP_SCENARIOS before any array is built.
+    """
+    started = time.perf_counter()
+    shapes = [shape for shape in floor_shapes(dimensions) if not shape.get("subtract")]
+    terms = [outline_terms(shape_rings(shape)) for shape in shapes]
+    floor_area = sum(shape_metrics(shape)[0] for shape in shapes)
+    
+    patterns = list(request.patterns)
+    length, width, per_box, price, product_id = (
+        np.tile(column, len(patterns)) for column in _tile_grid(request, products)
+    )
+    pattern_index = np.repeat(np.arange(len(patterns)), len(length) // len(patterns))
+    joint = request.grout_joint_in
+    pitch_sqft = (length + joint) * (width + joint) / 144.0
+    tile_sqft = length * width / 144.0
+    
+    tiles_needed = np.ceil(expected_tiles(terms, length + joint, width + joint) - EPS)
+    refined = np.zeros(len(length), dtype=bool)
+    
+    def order(tiles_needed: np.ndarray) -> Tuple[np.ndarray, ...]:
+        tiles = np.ceil(tiles_needed * (1 + request.breakage_percent / 100) - EPS)
+        boxes = np.ceil(tiles / per_box)
+        cost = boxes * price
+        ranking = np.lexsort((tiles, np.nan_to_num(cost, nan=np.inf)))
+        return tiles, boxes, cost, ranking
+    
+    tiles, boxes, cost, ranking = order(tiles_needed)
+    
+    # Re-count the cheapest distinct layouts with the optimizer
+    layouts = {}
+    for index in ranking:
+        if len(layouts) == request.refine_top:
+            break
+        key = (length[index], width[index], pattern_index[index])
+        if key in layouts or tiles_needed[index] > MAX_LAYOUT_TILES:
+            continue
+        layouts[key] = plan_layout(dimensions, TileLayoutRequest(
+            tile_length_in=float(length[index]),
+            tile_width_in=float(width[index]),
+            pattern=patterns[pattern_index[index]],
+            **request.model_dump(include={
+                "grout_joint_in", "offset_fraction", "kerf_in", "min_offcut_in",
+                "allow_rotation", "search_steps", "breakage_percent", "flat_waste_percent",
+            }),
+        ))
+        same = (length == key[0]) & (width == key[1]) & (pattern_index == key[2])
+        tiles_needed[same] = layouts[key].tiles_needed
+        refined |= same
+    if layouts:
+        tiles, boxes, cost, ranking = order(tiles_needed)
+    
+    covered = tiles_needed * pitch_sqft
+    with np.errstate(divide="ignore", invalid="ignore"):
+        waste = np.where(covered > 0, (covered - floor_area) * 100 / covered, 0.0)
+    flat_tiles = np.ceil(floor_area * (1 + request.flat_waste_percent / 100) / tile_sqft - EPS)
+    flat_boxes = np.ceil(flat_tiles / per_box)
+    flat_cost = flat_boxes * price
+    
+    def value(array: np.ndarray, index: int, kind=float):
+        return None if np.isnan(array[index]) else kind(round(float(array[index]), 2))
+    
+    rows = [
+        TileSweepRow(
+            tile_length_in=round(float(length[i]), 4),
+            tile_width_in=round(float(width[i]), 4),
+            pattern=patterns[pattern_index[i]],
+            product_id=int(product_id[i]) if product_id[i] >= 0 else None,
+            refined=bool(refined[i]),
+            tiles_to_order=int(tiles[i]),
+            waste_percent=round(float(waste[i]), 2),
+            tiles_per_box=value(per_box, i, int),
+            boxes=value(boxes, i, int),
+            price_per_box=value(price, i),
+            cost=value(cost, i),
+            flat_waste_boxes=value(flat_boxes, i, int),
+            flat_waste_cost=value(flat_cost, i),
+        )
+        for i in ranking[:request.limit]
+    ]
+    return TileSweepResult(
+        floor_area_sqft=round(floor_area, 4),
+        scenario_count=len(length),
+        refined_layouts=len(layouts),
+        scenarios=rows,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
@@ -0,0 +1,124 @@
+"""
+Archive benchmark - Hot-table query latency as job history grows
+
+For each history size, seeds a SQLite database where most jobs are old
+completed work, times the queries that serve an active job, archives the
+old jobs, and times the same queries again:
+  bom    - aggregate_bom() for one active job (grouped scan of job_line_items)
+  rooms  - rooms of one active job, as served by list_rooms
+
+Run from the backend directory:
+    python -m benchmarks.bench_archive [jobs ...]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.database import Base
+from app.db.models import Job, JobStatus, Room, JobLineItem, Product, ProductCategory
+from app.services.archive import archive_jobs
+from app.services.bom import aggregate_bom
+
+ROOMS_PER_JOB = 3
+ITEMS_PER_ROOM = 15
+ACTIVE_SHARE = 0.1  # Jobs that stay hot
+
+
+async def seed(db: AsyncSession, job_count: int) -> int:
+    """Seed job history and return the id of an active job"""
+    now = datetime.utcnow()
+    old = now - timedelta(days=800)
+    await db.execute(insert(Product), [
+        {"name": "Porcelain 12x24", "sku": "TILE-1", "category": ProductCategory.TILE,
+         "our_price": 4.5, "cost": 3.0, "vendor": "Acme", "created_at": now, "updated_at": now},
+    ])
+    active_every = int(1 / ACTIVE_SHARE)
+    jobs = [
+        {
+            "name": f"Job {i}",
+            "status": JobStatus.IN_PROGRESS if i % active_every == 0 else JobStatus.COMPLETED,
+            "notes": "Client wants herringbone in the hall bath. " * 3,
+            "version": 1,
+            "created_at": old if i % active_every else now,
+            "updated_at": old if i % active_every else now,
+        }
+        for i in range(job_count)
+    ]
+    job_ids = (await db.scalars(insert(Job).returning(Job.id, sort_by_parameter_order=True), jobs)).all()
+    
+    rooms = [
+        {"job_id": job_id, "name": f"Room {r}", "dimensions": {"length": 8, "width": 5, "height": 8},
+         "created_at": now, "updated_at": now}
+        for job_id in job_ids for r in range(ROOMS_PER_JOB)
+    ]
+    room_ids = (await db.scalars(insert(Room).returning(Room.id, sort_by_parameter_order=True), rooms)).all()
+    
+    items = [
+        {"job_id": room["job_id"], "room_id": room_id, "product_id": 1, "name": f"Item {k}",
+         "description": "12x24 porcelain, 1/3 offset, 1/8in joint", "category": ProductCategory.TILE,
+         "qty": k + 1, "unit": "each", "unit_price": 4.5, "extended_price": 4.5 * (k + 1),
+         "calculator_type": "tile_floor", "calculator_inputs": {"area_sqft": 40, "waste_percent": 10},
+         "is_mapped": True, "created_at": now, "updated_at": now}
+        for room, room_id in zip(rooms, room_ids) for k in range(ITEMS_PER_ROOM)
+    ]
+    for start in range(0, len(items), 5000):
+        await db.execute(insert(JobLineItem), items[start:start + 5000])
+    await db.commit()
+    return job_ids[0]
+
+
+async def timed(fn, repeat: int = 50) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def run(job_count: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        
+        async with sessions() as db:
+            job_id = await seed(db, job_count)
+            
+            async def bom():
+                await aggregate_bom(db, job_id)
+            
+            async def rooms():
+                (await db.scalars(select(Room).where(Room.job_id == job_id).order_by(Room.name))).all()
+                db.expunge_all()
+            
+            before = (await timed(bom), await timed(rooms))
+            start = time.perf_counter()
+            summary = await archive_jobs(db, older_than_days=365)
+            archive_seconds = time.perf_counter() - start
+            after = (await timed(bom), await timed(rooms))
+        await engine.dispose()
+    
+    ratio = summary["raw_bytes"] / max(summary["compressed_bytes"], 1)
+    print(
+        f"{job_count:>6} jobs  bom {before[0]:7.2f} -> {after[0]:6.2f} ms"
+        f"  rooms {before[1]:6.2f} -> {after[1]:5.2f} ms"
+        f"  archived {summary['archived']} jobs / {summary['line_items']} items"
+        f" in {archive_seconds:5.2f}s ({ratio:.1f}x compression)"
+    )
+
+
+def main(sizes=(250, 1000, 4000)) -> None:
+    for size in sizes:
+        asyncio.run(run(size))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or (250, 1000, 4000))
@@ -0,0 +1,89 @@
+"""
+List read benchmark - ORM hydration vs column projection for product pages
+
+Compares, against an in-memory SQLite price book:
+  orm       - select(Product) + TypeAdapter validation from attributes
+  projected - Projection select of all response columns into slotted rows
+  sparse    - Projection select of ?fields=id,name,sku,our_price
+
+Run from the backend directory:
+    python -m benchmarks.bench_list_reads [rows] [repeat]
+"""
+import sys
+import timeit
+import tracemalloc
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.responses import model_json_response
+from app.db.database import Base
+from app.db.models import Product, ProductCategory
+from app.db.projections import Projection
+from app.schemas.schemas import ProductResponse
+
+
+def seed(session: Session, count: int) -> None:
+    session.execute(insert(Product), [
+        {
+            "name": f"Porcelain Tile 12x24 Matte {i}", "brand": "Daltile",
+            "category": ProductCategory.TILE, "sku": f"SKU-{i:05d}",
+            "description": "Rectified porcelain tile, frost resistant. " * 8,
+            "notes": "Order 10% overage for diagonal layouts. " * 4,
+            "specifications": {"finish": "matte", "pei": 4, "thickness_mm": 9, "colors": ["ash", "bone"]},
+            "unit": "box", "pack_size": 15.5, "cost": 2.1, "our_price": 3.49 + i % 7,
+            "vendor": "Floor & Decor", "is_active": True,
+        }
+        for i in range(count)
+    ])
+    session.commit()
+
+
+def measure(fn, repeat: int):
+    seconds = min(timeit.repeat(fn, number=repeat, repeat=3)) / repeat
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main(rows: int = 1000, repeat: int = 20) -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    seed(session, rows)
+    
+    adapter = TypeAdapter(List[ProductResponse])
+    projection = Projection(Product, ProductResponse)
+    full = projection.parse_fields(None)
+    sparse = projection.parse_fields("id,name,sku,our_price")
+    
+    def orm_path():
+        products = session.scalars(select(Product).order_by(Product.name)).all()
+        model_json_response(adapter, products)
+        session.expunge_all()
+    
+    def projected_path(names):
+        result = session.execute(projection.select(names).order_by(Product.name))
+        orjson.dumps(projection.rows(names, result))
+    
+    print(f"{rows} products x {repeat} pages")
+    baseline = None
+    cases = (
+        ("orm", orm_path),
+        ("projected", lambda: projected_path(full)),
+        ("sparse", lambda: projected_path(sparse)),
+    )
+    for name, fn in cases:
+        seconds, peak = measure(fn, repeat)
+        baseline = baseline or seconds
+        print(f"  {name:<10} {seconds * 1000:8.2f} ms/page  {baseline / seconds:5.1f}x  peak {peak / 1024:8.0f} KiB")
+    session.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,39 @@
+"""
+Risk benchmark - Monte Carlo simulation time by job size
+
+Times simulate_materials() for jobs with a growing number of price groups
+(distinct products) and prints the P50/P80/P95 material subtotals as a
+share of the expected subtotal.
+
+Run from the backend directory:
+    python -m benchmarks.bench_risk [draws]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services.risk import DEFAULT_DRAWS, DEFAULT_PRICE_VOLATILITY, simulate_materials
+
+GROUP_COUNTS = (5, 20, 50, 200)
+
+
+def main(draws: int = DEFAULT_DRAWS, repeat: int = 3) -> None:
+    rng = np.random.default_rng(7)
+    print(f"{draws} draws")
+    for groups in GROUP_COUNTS:
+        amounts = rng.uniform(20, 2000, groups)
+        spread = amounts * rng.uniform(0.0, 0.075, groups)
+        volatility = rng.uniform(0.0, 2 * DEFAULT_PRICE_VOLATILITY, groups)
+        
+        best = float("inf")
+        for seed in range(repeat):
+            start = time.perf_counter()
+            totals = simulate_materials(amounts, spread, volatility, draws, seed)
+            best = min(best, time.perf_counter() - start)
+        p50, p80, p95 = np.percentile(totals, [50, 80, 95]) / amounts.sum()
+        print(f"  {groups:>4} groups  {best * 1000:7.1f} ms  P50 {p50:.3f}  P80 {p80:.3f}  P95 {p95:.3f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
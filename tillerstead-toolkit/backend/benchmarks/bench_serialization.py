@@ -0,0 +1,74 @@
+"""
+Serialization benchmark - Response rendering paths for the heaviest list endpoints
+
+Compares, for a page of ORM-like product rows:
+  fastapi   - response_model validation + jsonable_encoder + stdlib JSONResponse
+  orjson    - response_model validation + ORJSONResponse (default_response_class)
+  adapter   - TypeAdapter validate + dump_json in one pydantic-core pass
+
+Run from the backend directory:
+    python -m benchmarks.bench_serialization [rows] [repeat]
+"""
+import asyncio
+import sys
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import TypeAdapter
+
+from app.core.responses import model_json_response
+from app.schemas.schemas import ProductResponse
+
+
+def make_rows(count: int) -> list:
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=i, name=f"Porcelain Tile 12x24 Matte {i}", brand="Daltile", category="tile",
+            description="Rectified porcelain tile, frost resistant",
+            sku=f"SKU-{i:05d}", upc=None, manufacturer_sku=f"DT-{i}",
+            unit="box", pack_size=15.5, pack_unit="sqft", coverage_per_unit=15.5,
+            coverage_unit="sqft", cost=2.1, retail=4.99, our_price=3.49 + i % 7,
+            vendor="Floor & Decor", vendor_url=None, notes=None,
+            specifications={"finish": "matte", "pei": 4},
+            is_active=True, created_at=now, updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def main(rows: int = 500, repeat: int = 200) -> None:
+    data = make_rows(rows)
+    field = create_response_field(name="response", type_=List[ProductResponse])
+    adapter = TypeAdapter(List[ProductResponse])
+    loop = asyncio.new_event_loop()
+    
+    async def validated():
+        return await serialize_response(field=field, response_content=data)
+    
+    def fastapi_path():
+        JSONResponse(jsonable_encoder(loop.run_until_complete(validated())))
+    
+    def orjson_path():
+        ORJSONResponse(loop.run_until_complete(validated()))
+    
+    def adapter_path():
+        model_json_response(adapter, data)
+    
+    print(f"{rows} rows x {repeat} renders")
+    baseline = None
+    for name, fn in (("fastapi", fastapi_path), ("orjson", orjson_path), ("adapter", adapter_path)):
+        seconds = min(timeit.repeat(fn, number=repeat, repeat=3)) / repeat
+        baseline = baseline or seconds
+        print(f"  {name:<8} {seconds * 1000:8.2f} ms/response  {baseline / seconds:5.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,78 @@
+"""
+Tile layout benchmark - Layout time and tile counts against a flat waste allowance
+
+Lays each tile size over a few room outlines (rectangle, L-shape, angled
+polygon, round) and prints the best time of plan_layout() with the tiles
+it orders next to a flat 10% waste allowance. Then times sweep_layouts()
+over a size x box grid per room, estimated only and with refinement.
+
+Run from the backend directory:
+    python -m benchmarks.bench_tile_layout [repeat]
+"""
+import sys
+import time
+
+from app.schemas.schemas import RoomDimensions, TileLayoutRequest, TileSweepRequest
+from app.services.tile_layout import plan_layout, sweep_layouts
+
+ROOMS = {
+    "rectangle 14.3x11.7": RoomDimensions(length=14.3, width=11.7),
+    "l_shape 22x18": RoomDimensions(shapes=[
+        {"type": "l_shape", "length": 22, "width": 18, "cutout_length": 9, "cutout_width": 7.5},
+    ]),
+    "polygon 40x35": RoomDimensions(shapes=[
+        {"type": "polygon", "points": [[0, 0], [40, 0], [40, 20], [25, 20], [25, 35], [10, 35], [10, 20], [0, 25]]},
+    ]),
+    "circle r9": RoomDimensions(shapes=[{"type": "circle", "radius": 9}]),
+    "warehouse 61x48": RoomDimensions(length=61.3, width=47.7),
+}
+
+TILES = {
+    "24x48 offset": TileLayoutRequest(tile_length_in=48, tile_width_in=24, pattern="offset", offset_fraction=0.33),
+    "12x24 offset": TileLayoutRequest(tile_length_in=24, tile_width_in=12, pattern="offset"),
+    "6x6 straight": TileLayoutRequest(tile_length_in=6, tile_width_in=6, grout_joint_in=0.0625),
+}
+
+SWEEP = {
+    "tile_lengths_in": {"start": 4, "stop": 48, "step": 0.5},
+    "tile_widths_in": {"start": 4, "stop": 24, "step": 0.5},
+    "box_sqft": {"start": 6, "stop": 18, "step": 0.5},
+    "price_per_sqft": 4.25,
+    "patterns": ["straight", "offset"],
+}
+
+
+def main(repeat: int = 5) -> None:
+    for tile_name, request in TILES.items():
+        print(tile_name)
+        for room_name, dimensions in ROOMS.items():
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = plan_layout(dimensions, request)
+                best = min(best, time.perf_counter() - start)
+            tiles = result.full_tiles + result.cut_pieces
+            print(
+                f"  {room_name:<20} {tiles:>6} tiles  {best * 1000:6.2f} ms"
+                f"  order {result.tiles_needed:>6} vs flat {result.flat_waste_tiles:>6}"
+                f"  ({result.waste_percent:4.1f}% waste, {result.cuts_from_offcuts} cuts from offcuts)"
+            )
+    
+    for refine_top in (0, 10):
+        request = TileSweepRequest(**SWEEP, refine_top=refine_top)
+        print(f"sweep, refine_top={refine_top}")
+        for room_name, dimensions in ROOMS.items():
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = sweep_layouts(dimensions, request, {})
+                best = min(best, time.perf_counter() - start)
+            cheapest = result.scenarios[0]
+            print(
+                f"  {room_name:<20} {result.scenario_count:>7} scenarios  {best * 1000:7.2f} ms"
+                f"  cheapest {cheapest.tile_length_in:g}x{cheapest.tile_width_in:g} ${cheapest.cost:,.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
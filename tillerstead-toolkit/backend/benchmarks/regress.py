@@ -0,0 +1,248 @@
+"""
+Regression benchmarks - Latency, allocation and golden-output checks
+
+Every case runs a pure engine over a fixed, seeded input corpus (typical
+rooms and jobs, huge commercial floors, pathological shapes) and records:
+  latency_us  - median microseconds per call over `repeat` passes
+  throughput  - calls per second at that latency
+  peak_kb     - peak memory allocated during one pass (tracemalloc)
+  golden      - the outputs themselves, compared with the case's tolerance
+
+Results are compared with benchmarks/baselines.json. A case fails when its
+outputs differ from the golden outputs. With --timing it also fails when
+latency or peak memory exceed the baseline by more than the threshold;
+timing baselines are machine-specific, so only use --timing on the machine
+that recorded them (regenerate with --update there, after confirming that
+any golden-output change is intended).
+
+Run from the backend directory:
+    python -m benchmarks.regress [--update] [--timing] [--threshold 0.25] [case ...]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.schemas.schemas import RoomDimensions, TileLayoutRequest
+from app.services.geometry import compile_dimensions
+from app.services.risk import simulate_materials
+from app.services.tile_layout import plan_layout
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_THRESHOLD = 0.25
+
+
+@dataclass
+class Case:
+    """An engine, its seeded corpus and how to reduce outputs to golden values"""
+    fn: Callable[[Any], Any]
+    corpus: Callable[[], List[Any]]
+    golden: Callable[[Any], Any]
+    rel_tol: float = 1e-9
+    repeat: int = 5
+
+
+def _rectangles(seed: int, count: int, low: float, high: float) -> List[RoomDimensions]:
+    rng = random.Random(seed)
+    return [
+        RoomDimensions(length=round(rng.uniform(low, high), 2), width=round(rng.uniform(low, high), 2),
+                       height=rng.choice([8, 9, 10]))
+        for _ in range(count)
+    ]
+
+
+def _pathological() -> List[RoomDimensions]:
+    """Slivers, many-vertex outlines, near-collinear points and tiny arcs"""
+    rng = np.random.default_rng(11)
+    angles = np.sort(rng.uniform(0, 2 * np.pi, 200))
+    radii = rng.uniform(8, 20, 200)
+    star = np.stack([radii * np.cos(angles), radii * np.sin(angles)], axis=1).round(3).tolist()
+    return [
+        RoomDimensions(shapes=[{"type": "polygon", "points": [[0, 0], [60, 0], [60, 0.4], [0, 0.3]]}]),
+        RoomDimensions(shapes=[{"type": "polygon", "points": star}]),
+        RoomDimensions(shapes=[{"type": "polygon", "points": [[0, 0], [10, 1e-7], [20, 0], [20, 12], [0, 12]]}]),
+        RoomDimensions(shapes=[{"type": "arc", "radius": 0.6, "angle_deg": 15}]),
+        RoomDimensions(height=9, shapes=[
+            {"type": "l_shape", "length": 30, "width": 22, "cutout_length": 29.5, "cutout_width": 21.5},
+            {"type": "circle", "radius": 1.5, "subtract": True},
+        ], openings=[{"type": "door", "width": 3, "height": 6.67, "count": 4}]),
+    ]
+
+
+def _layout_corpus(dimensions: List[RoomDimensions], tile: Dict[str, Any]) -> List[tuple]:
+    request = TileLayoutRequest(**tile)
+    return [(room, request) for room in dimensions]
+
+
+def _layout_golden(result) -> Dict[str, Any]:
+    return result.model_dump(mode="json", exclude={"elapsed_ms"})
+
+
+def _risk_corpus(seed: int, jobs: int, groups: int) -> List[tuple]:
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for index in range(jobs):
+        amounts = rng.uniform(20, 2000, groups)
+        corpus.append((amounts, amounts * rng.uniform(0, 0.075, groups), rng.uniform(0, 0.1, groups), 100_000, index))
+    return corpus
+
+
+CASES: Dict[str, Case] = {
+    "geometry/typical": Case(
+        fn=compile_dimensions.__wrapped__,
+        corpus=lambda: _rectangles(1, 200, 5, 20),
+        golden=lambda result: result.model_dump(mode="json"),
+    ),
+    "geometry/pathological": Case(
+        fn=compile_dimensions.__wrapped__,
+        corpus=_pathological,
+        golden=lambda result: result.model_dump(mode="json"),
+    ),
+    "tile_layout/typical": Case(
+        fn=lambda args: plan_layout(*args),
+        corpus=lambda: _layout_corpus(_rectangles(2, 20, 5, 20), {"tile_length_in": 24, "tile_width_in": 12, "pattern": "offset"}),
+        golden=_layout_golden,
+        rel_tol=1e-6,
+    ),
+    "tile_layout/commercial": Case(
+        fn=lambda args: plan_layout(*args),
+        corpus=lambda: _layout_corpus(_rectangles(3, 4, 60, 120), {"tile_length_in": 12, "tile_width_in": 12}),
+        golden=_layout_golden,
+        rel_tol=1e-6,
+    ),
+    "tile_layout/pathological": Case(
+        fn=lambda args: plan_layout(*args),
+        corpus=lambda: _layout_corpus(_pathological()[:4], {"tile_length_in": 6, "tile_width_in": 6, "pattern": "offset"}),
+        golden=_layout_golden,
+        rel_tol=1e-6,
+    ),
+    "risk/typical": Case(
+        fn=lambda args: [round(float(p), 2) for p in np.percentile(simulate_materials(*args), [50, 80, 95])],
+        corpus=lambda: _risk_corpus(4, 5, 20),
+        golden=lambda result: result,
+        rel_tol=1e-4,  # float32 sampling; BLAS builds differ in summation order
+        repeat=3,
+    ),
+}
+
+
+def measure(case: Case) -> Dict[str, Any]:
+    corpus = case.corpus()
+    outputs = [case.golden(case.fn(item)) for item in corpus]  # Also warms up
+    
+    timings = []
+    for _ in range(case.repeat):
+        start = time.perf_counter()
+        for item in corpus:
+            case.fn(item)
+        timings.append((time.perf_counter() - start) / len(corpus))
+    
+    tracemalloc.start()
+    for item in corpus:
+        case.fn(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    latency = statistics.median(timings)
+    return {
+        "calls": len(corpus),
+        "latency_us": round(latency * 1e6, 1),
+        "throughput": round(1 / latency, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "golden": outputs,
+    }
+
+
+def _same(expected: Any, actual: Any, rel_tol: float) -> bool:
+    if isinstance(expected, float) or isinstance(actual, float):
+        if expected is None or actual is None:
+            return expected is actual
+        return math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=rel_tol)
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return expected.keys() == actual.keys() and all(
+            _same(expected[key], actual[key], rel_tol) for key in expected
+        )
+    if isinstance(expected, list) and isinstance(actual, list):
+        return len(expected) == len(actual) and all(
+            _same(e, a, rel_tol) for e, a in zip(expected, actual)
+        )
+    return expected == actual
+
+
+def compare(
+    name: str,
+    case: Case,
+    baseline: Dict[str, Any],
+    result: Dict[str, Any],
+    threshold: Optional[float] = None
+) -> List[str]:
+    """Failure messages for one case (empty when it passes); timing is checked only with a threshold"""
+    failures = []
+    for index, (expected, actual) in enumerate(zip(baseline["golden"], result["golden"])):
+        if not _same(expected, actual, case.rel_tol):
+            failures.append(f"{name}: output {index} changed: {expected!r} -> {actual!r}")
+    if len(baseline["golden"]) != len(result["golden"]):
+        failures.append(f"{name}: corpus size changed ({len(baseline['golden'])} -> {len(result['golden'])})")
+    if threshold is None:
+        return failures
+    for metric in ("latency_us", "peak_kb"):
+        limit = baseline[metric] * (1 + threshold)
+        if result[metric] > limit:
+            failures.append(f"{name}: {metric} {result[metric]} exceeds baseline {baseline[metric]} by more than {threshold:.0%}")
+    return failures
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("cases", nargs="*", help="Case names or prefixes (default: all)")
+    parser.add_argument("--update", action="store_true", help="Write results as the new baselines")
+    parser.add_argument("--timing", action="store_true", help="Also fail on latency/peak memory regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+    
+    names = [name for name in CASES if not args.cases or any(name.startswith(c) for c in args.cases)]
+    try:
+        with open(BASELINE_FILE) as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+    
+    failures = []
+    for name in names:
+        result = measure(CASES[name])
+        print(
+            f"{name:<26} {result['calls']:>4} calls  {result['latency_us']:>10.1f} us/call"
+            f"  {result['throughput']:>10.1f}/s  peak {result['peak_kb']:>9.1f} KB"
+        )
+        if args.update:
+            baselines[name] = result
+        elif name in baselines:
+            failures += compare(
+                name, CASES[name], baselines[name], result, args.threshold if args.timing else None
+            )
+        else:
+            print(f"  no baseline for {name} (run with --update)")
+    
+    if args.update:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baselines, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"Baselines written to {os.path.relpath(BASELINE_FILE)}")
+        return 0
+    
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
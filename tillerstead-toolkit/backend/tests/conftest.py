@@ -0,0 +1,89 @@
+"""
+Shared fixtures - A fresh SQLite database per test and an HTTP client for the API routers
+"""
+import os
+import tempfile
+
+# Settings are read at import time, so point them at a scratch directory first
+_scratch = tempfile.mkdtemp(prefix="tillerstead-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_scratch, 'test.db')}"
+os.environ["EXPORT_DIR"] = os.path.join(_scratch, "exports")
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import app.db.changes  # noqa: F401 - registers change feed listeners
+from app.api.exports import estimate_cache, router as exports_router
+from app.api.jobs import router as jobs_router
+from app.api.products import router as products_router
+from app.api.rooms import router as rooms_router
+from app.api.sync import router as sync_router
+from app.core.responses import DefaultJSONResponse
+from app.db.database import Base, async_session, engine
+from app.db.models import Job, JobLineItem, Product, ProductCategory, Room
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    """API client over empty tables (routers mounted under /api, as in app.main)"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    estimate_cache.clear()
+    
+    app = FastAPI(default_response_class=DefaultJSONResponse)
+    for router in (jobs_router, rooms_router, products_router, exports_router, sync_router):
+        app.include_router(router, prefix="/api")
+    
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+    await engine.dispose()
+
+
+@pytest.fixture
+async def job_id(client) -> int:
+    """
+    A job with two rooms of four line items each (even items mapped to the
+    TILE-1 product) plus one line item without a room
+    """
+    async with async_session() as db:
+        tile = Product(
+            name="Porcelain 12x24", sku="TILE-1", category=ProductCategory.TILE,
+            our_price=4.5, cost=3.0, vendor="Acme"
+        )
+        mortar = Product(
+            name="Thinset 50lb", sku="MORT-1", category=ProductCategory.MORTAR,
+            our_price=25.0, cost=18.0, vendor="Bolt"
+        )
+        job = Job(name="Bath Job")
+        db.add_all([tile, mortar, job])
+        await db.flush()
+        
+        rooms = [
+            Room(job_id=job.id, name=f"Room {i}", dimensions={"length": 5 + i, "width": 8, "height": 8})
+            for i in range(2)
+        ]
+        db.add_all(rooms)
+        await db.flush()
+        
+        for room in rooms:
+            for k in range(4):
+                mapped = k % 2 == 0
+                db.add(JobLineItem(
+                    job_id=job.id, room_id=room.id, product_id=tile.id if mapped else None,
+                    name=f"Item {k}", category=ProductCategory.TILE if k % 3 else ProductCategory.MORTAR,
+                    qty=k + 1, unit="each", unit_price=2.0, extended_price=2.0 * (k + 1),
+                    is_mapped=mapped, calculator_type="tile_floor", calculator_inputs={"area_sqft": 40}
+                ))
+        db.add(JobLineItem(
+            job_id=job.id, name="Misc", qty=1, unit_price=10.0, extended_price=10.0,
+            category=ProductCategory.OTHER
+        ))
+        await db.commit()
+        return job.id
@@ -0,0 +1,91 @@
+"""
+Archive tier - Archiving, reads from the archive and rehydration on write
+"""
+import pytest
+from sqlalchemy import func, select
+
+from app.db.database import async_session
+from app.db.models import JobArchive, JobLineItem, Room
+
+pytestmark = pytest.mark.anyio
+
+
+async def _archive(client, job_id: int) -> dict:
+    await client.patch(f"/api/jobs/{job_id}", json={"status": "completed"})
+    response = await client.post("/api/jobs/archive", params={"older_than_days": 0})
+    assert response.status_code == 200
+    return response.json()
+
+
+async def _hot_rows(job_id: int):
+    async with async_session() as db:
+        rooms = (await db.execute(select(func.count()).where(Room.job_id == job_id))).scalar_one()
+        items = (await db.execute(select(func.count()).where(JobLineItem.job_id == job_id))).scalar_one()
+        archives = (await db.execute(select(func.count()).where(JobArchive.job_id == job_id))).scalar_one()
+    return rooms, items, archives
+
+
+async def test_archive_moves_rows(client, job_id):
+    draft_id = (await client.post("/api/jobs", json={"name": "Still open"})).json()["id"]
+    
+    result = await _archive(client, job_id)
+    assert (result["archived"], result["job_ids"]) == (1, [job_id])
+    assert (result["rooms"], result["line_items"]) == (2, 9)
+    assert 0 < result["compressed_bytes"] < result["raw_bytes"]
+    assert await _hot_rows(job_id) == (0, 0, 1)
+    
+    archived = (await client.get("/api/jobs", params={"archived": True, "fields": "id"})).json()
+    assert archived == [{"id": job_id}]
+    hot = (await client.get("/api/jobs", params={"archived": False, "fields": "id"})).json()
+    assert hot == [{"id": draft_id}]
+    
+    # Already archived jobs are not picked up again
+    assert (await client.post("/api/jobs/archive", params={"older_than_days": 0})).json()["archived"] == 0
+
+
+async def test_reads_are_served_from_the_archive(client, job_id):
+    before = {
+        "full": (await client.get(f"/api/jobs/{job_id}/full")).json(),
+        "bom": (await client.get(f"/api/exports/bom/{job_id}")).json(),
+        "csv": (await client.get(f"/api/exports/bom/{job_id}/csv")).text,
+        "rooms": (await client.get("/api/rooms", params={"job_id": job_id})).json(),
+    }
+    await _archive(client, job_id)
+    version = (await client.get(f"/api/jobs/{job_id}")).json()["version"]
+    
+    full = (await client.get(f"/api/jobs/{job_id}/full")).json()
+    assert full["rooms"] == before["full"]["rooms"]
+    assert full["unassigned_line_items"] == before["full"]["unassigned_line_items"]
+    assert full["bom"] == before["full"]["bom"]
+    assert (await client.get(f"/api/exports/bom/{job_id}")).json() == before["bom"]
+    assert (await client.get(f"/api/exports/bom/{job_id}/csv")).text == before["csv"]
+    assert (await client.get("/api/rooms", params={"job_id": job_id})).json() == before["rooms"]
+    for url in (f"/api/exports/estimate/{job_id}", f"/api/exports/bom/{job_id}/xlsx", f"/api/jobs/{job_id}/risk"):
+        assert (await client.get(url)).status_code == 200
+    
+    clone_id = (await client.post(f"/api/jobs/{job_id}/clone")).json()["id"]
+    clone = (await client.get(f"/api/jobs/{clone_id}/full")).json()
+    assert clone["bom"]["grand_total"] == before["full"]["bom"]["grand_total"]
+    assert [room["name"] for room in clone["rooms"]] == ["Room 0", "Room 1"]
+    
+    # None of the reads brought the job back
+    job = (await client.get(f"/api/jobs/{job_id}")).json()
+    assert job["archived_at"] is not None and job["version"] == version
+    assert await _hot_rows(job_id) == (0, 0, 1)
+
+
+async def test_write_rehydrates(client, job_id):
+    before = (await client.get(f"/api/jobs/{job_id}/full")).json()
+    await _archive(client, job_id)
+    
+    response = await client.post(f"/api/jobs/{job_id}/line-items:bulk", json=[
+        {"job_id": job_id, "name": "Grout", "qty": 1, "unit": "bag", "unit_price": 15.0}
+    ])
+    assert response.status_code == 201
+    assert await _hot_rows(job_id) == (2, 10, 0)
+    
+    after = (await client.get(f"/api/jobs/{job_id}/full")).json()
+    assert after["archived_at"] is None
+    assert after["version"] > before["version"]
+    assert after["rooms"] == before["rooms"]
+    assert [item["name"] for item in after["unassigned_line_items"]] == ["Misc", "Grout"]
@@ -0,0 +1,58 @@
+"""
+BOM aggregation - SQL totals and breakdowns against the line items
+"""
+import pytest
+from sqlalchemy import select
+
+from app.db.database import async_session
+from app.db.models import JobLineItem, Room
+from app.services.bom import aggregate_bom, summarize_line_items
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_bom_totals_and_breakdowns(client, job_id):
+    response = await client.get(f"/api/exports/bom/{job_id}")
+    assert response.status_code == 200
+    bom = response.json()
+    
+    items = bom["line_items"]
+    assert bom["total_items"] == len(items) == 9
+    assert bom["mapped_items"] == sum(1 for item in items if item["is_mapped"]) == 4
+    assert bom["unmapped_items"] == 5
+    assert bom["subtotal_materials"] == pytest.approx(sum(item["extended_price"] for item in items))
+    
+    by_room = {row["room_name"]: row for row in bom["by_room"]}
+    assert set(by_room) == {None, "Room 0", "Room 1"}
+    assert by_room["Room 0"]["item_count"] == 4
+    assert by_room["Room 0"]["subtotal"] == pytest.approx(20.0)
+    assert by_room[None]["subtotal"] == pytest.approx(10.0)
+    assert sum(row["subtotal"] for row in bom["by_category"]) == pytest.approx(bom["subtotal_materials"])
+
+
+async def test_bom_summary_omits_line_items(client, job_id):
+    full = (await client.get(f"/api/exports/bom/{job_id}")).json()
+    summary = (await client.get(f"/api/exports/bom/{job_id}", params={"summary": True})).json()
+    
+    assert summary["line_items"] == []
+    assert {key: value for key, value in summary.items() if key != "line_items"} == \
+        {key: value for key, value in full.items() if key != "line_items"}
+
+
+async def test_summarize_line_items_matches_sql(client, job_id):
+    async with async_session() as db:
+        items = (await db.scalars(select(JobLineItem).where(JobLineItem.job_id == job_id))).all()
+        rooms = (await db.scalars(select(Room).where(Room.job_id == job_id))).all()
+        in_memory = summarize_line_items(items, {room.id: room.name for room in rooms})
+        in_sql = await aggregate_bom(db, job_id)
+    
+    assert (in_memory.total_items, in_memory.mapped_items) == (in_sql.total_items, in_sql.mapped_items)
+    assert in_memory.subtotal_materials == pytest.approx(in_sql.subtotal_materials)
+    assert in_memory.by_room == in_sql.by_room
+    # Categories with equal subtotals may come back in either order
+    by_category = lambda aggregate: sorted(aggregate.by_category, key=lambda row: row.category.value)
+    assert by_category(in_memory) == by_category(in_sql)
+
+
+async def test_bom_missing_job(client):
+    assert (await client.get("/api/exports/bom/999")).status_code == 404
@@ -0,0 +1,53 @@
+"""
+Estimate exports - ETags, conditional requests and the serialized estimate cache
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_estimate_etag_and_304(client, job_id):
+    response = await client.get(f"/api/exports/estimate/{job_id}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.json()["bom"]["total_items"] == 9
+    
+    response = await client.get(f"/api/exports/estimate/{job_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    
+    weak = await client.get(f"/api/exports/estimate/{job_id}", headers={"If-None-Match": f"W/{etag}"})
+    assert weak.status_code == 304
+
+
+async def test_estimate_etag_changes_on_write(client, job_id):
+    etag = (await client.get(f"/api/exports/estimate/{job_id}")).headers["etag"]
+    await client.post(f"/api/jobs/{job_id}/line-items:bulk", json=[
+        {"job_id": job_id, "name": "Grout", "qty": 1, "unit": "bag", "unit_price": 15.0}
+    ])
+    
+    response = await client.get(f"/api/exports/estimate/{job_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["bom"]["total_items"] == 10
+
+
+async def test_estimate_not_shared_by_a_reused_job_id(client):
+    first = (await client.post("/api/jobs", json={"name": "First"})).json()
+    etag = (await client.get(f"/api/exports/estimate/{first['id']}")).headers["etag"]
+    await client.delete(f"/api/jobs/{first['id']}")
+    
+    # SQLite hands the highest id out again; the new job is also at version 1
+    second = (await client.post("/api/jobs", json={"name": "Second"})).json()
+    assert (second["id"], second["version"]) == (first["id"], first["version"])
+    
+    response = await client.get(f"/api/exports/estimate/{second['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["job"]["name"] == "Second"
+    json_export = await client.get(f"/api/exports/estimate/{second['id']}/json")
+    assert json_export.json()["job"]["name"] == "Second"
+
+
+async def test_estimate_missing_job(client):
+    assert (await client.get("/api/exports/estimate/999")).status_code == 404
@@ -0,0 +1,133 @@
+"""
+Jobs API - Cloning, bulk line item writes and sparse fieldsets
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def _line_items(full: dict) -> list:
+    return [item for room in full["rooms"] for item in room["line_items"]] + full["unassigned_line_items"]
+
+
+async def test_clone_starts_at_version_one(client, job_id):
+    for name in ("Renamed", "Renamed again"):
+        assert (await client.patch(f"/api/jobs/{job_id}", json={"name": name})).status_code == 200
+    source = (await client.get(f"/api/jobs/{job_id}")).json()
+    assert source["version"] > 1
+    
+    response = await client.post(f"/api/jobs/{job_id}/clone")
+    assert response.status_code == 201
+    clone = response.json()
+    assert clone["id"] != job_id
+    assert clone["name"] == "Renamed again (copy)"
+    assert clone["status"] == "draft"
+    assert clone["version"] == 1
+    assert clone["archived_at"] is None
+    assert clone["is_template"] is False
+
+
+async def test_clone_copies_rooms_and_line_items(client, job_id):
+    source = (await client.get(f"/api/jobs/{job_id}/full")).json()
+    clone_id = (await client.post(f"/api/jobs/{job_id}/clone", json={"width_scale": 1.5})).json()["id"]
+    clone = (await client.get(f"/api/jobs/{clone_id}/full")).json()
+    
+    assert [room["name"] for room in clone["rooms"]] == [room["name"] for room in source["rooms"]]
+    assert [room["dimensions"]["width"] for room in clone["rooms"]] == [12, 12]
+    clone_room_ids = {room["id"] for room in clone["rooms"]}
+    for room in clone["rooms"]:
+        assert all(item["room_id"] == room["id"] for item in room["line_items"])
+    assert clone_room_ids.isdisjoint(room["id"] for room in source["rooms"])
+    assert len(_line_items(clone)) == len(_line_items(source)) == 9
+    assert clone["bom"]["grand_total"] == source["bom"]["grand_total"]
+
+
+async def test_clone_options(client, job_id):
+    response = await client.post(f"/api/jobs/{job_id}/save-as-template", json={
+        "name": "Bath template", "include_line_items": False
+    })
+    template = response.json()
+    assert (template["name"], template["is_template"]) == ("Bath template", True)
+    full = (await client.get(f"/api/jobs/{template['id']}/full")).json()
+    assert len(full["rooms"]) == 2
+    assert _line_items(full) == []
+    
+    repriced_id = (await client.post(f"/api/jobs/{job_id}/clone", json={"reprice": True})).json()["id"]
+    repriced = _line_items((await client.get(f"/api/jobs/{repriced_id}/full")).json())
+    for item in repriced:
+        assert item["unit_price"] == (4.5 if item["product_id"] else item["unit_price"])
+        assert item["extended_price"] == pytest.approx(item["qty"] * item["unit_price"])
+
+
+async def test_clone_missing_job(client):
+    assert (await client.post("/api/jobs/999/clone")).status_code == 404
+
+
+def _calculator_result(*lines) -> dict:
+    return {
+        "calculator_type": "thinset_mortar",
+        "inputs": {"area_sqft": 40},
+        "line_items": [
+            {"sku": sku, "name": name, "qty": qty, "unit": "bag", "category": "mortar"}
+            for sku, name, qty in lines
+        ],
+        "summary": {},
+        "formulas_used": [],
+    }
+
+
+async def test_bulk_line_items_resolve_skus_and_replace(client, job_id):
+    room_id = (await client.get(f"/api/jobs/{job_id}/full")).json()["rooms"][0]["id"]
+    url = f"/api/jobs/{job_id}/line-items:bulk"
+    
+    response = await client.post(url, params={"room_id": room_id}, json=_calculator_result(
+        ("MORT-1", "Thinset", 2), ("NOPE-9", "Unknown", 1), (None, "Water", 1),
+    ))
+    assert response.status_code == 201
+    result = response.json()
+    assert result["replaced"] == 0
+    assert result["unresolved_skus"] == ["NOPE-9"]
+    thinset, unknown, water = result["created"]
+    assert thinset["is_mapped"] and thinset["product_id"] == 2
+    assert (thinset["unit_price"], thinset["extended_price"]) == (25.0, 50.0)
+    assert not unknown["is_mapped"] and unknown["product_id"] is None
+    assert water["unit_price"] == 0.0
+    
+    # Re-running the calculator for the room swaps out its previous lines only
+    response = await client.post(url, params={"room_id": room_id}, json=_calculator_result(("MORT-1", "Thinset", 3)))
+    result = response.json()
+    assert (result["replaced"], len(result["created"])) == (3, 1)
+    full = (await client.get(f"/api/jobs/{job_id}/full")).json()
+    room = next(room for room in full["rooms"] if room["id"] == room_id)
+    assert sorted(item["name"] for item in room["line_items"]) == \
+        ["Item 0", "Item 1", "Item 2", "Item 3", "Thinset"]
+
+
+async def test_resolve_skus_prefers_lowest_id(client, job_id):
+    for price in (30.0, 35.0):
+        await client.post("/api/products", json={"name": "Thinset", "sku": "MORT-1", "our_price": price})
+    response = await client.post(f"/api/jobs/{job_id}/line-items:bulk", json=_calculator_result(("MORT-1", "Thinset", 1)))
+    assert response.json()["created"][0]["product_id"] == 2
+
+
+async def test_bulk_line_items_validation(client, job_id):
+    url = f"/api/jobs/{job_id}/line-items:bulk"
+    other_job = {"job_id": job_id + 1, "name": "X", "qty": 1, "unit": "each", "unit_price": 1.0}
+    assert (await client.post(url, json=[other_job])).status_code == 400
+    missing_product = {"job_id": job_id, "name": "X", "qty": 1, "unit": "each", "unit_price": 1.0, "product_id": 999}
+    assert (await client.post(url, json=[missing_product])).status_code == 404
+    assert (await client.post(url, params={"room_id": 999}, json=_calculator_result())).status_code == 404
+
+
+async def test_sparse_fields(client, job_id):
+    response = await client.get("/api/jobs", params={"fields": "name,id"})
+    assert response.status_code == 200
+    assert response.json() == [{"id": job_id, "name": "Bath Job"}]
+    
+    rooms = (await client.get("/api/rooms", params={"job_id": job_id, "fields": "name"})).json()
+    assert rooms == [{"name": "Room 0"}, {"name": "Room 1"}]
+
+
+@pytest.mark.parametrize("fields", [",", " , ", "id,bogus"])
+async def test_sparse_fields_rejects_bad_selection(client, fields):
+    assert (await client.get("/api/jobs", params={"fields": fields})).status_code == 400
@@ -0,0 +1,74 @@
+"""
+Delta sync - Compaction, tombstones and archived jobs
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def _token(client) -> int:
+    return (await client.get("/api/sync")).json()["next_token"]
+
+
+async def test_full_sync_returns_current_rows(client, job_id):
+    changes = (await client.get("/api/sync")).json()
+    assert [job["id"] for job in changes["upserts"]["jobs"]] == [job_id]
+    assert len(changes["upserts"]["rooms"]) == 2
+    assert len(changes["upserts"]["line_items"]) == 9
+    assert changes["has_more"] is False
+
+
+async def test_changes_are_compacted_per_row(client, job_id):
+    since = await _token(client)
+    for name in ("First", "Second", "Third"):
+        await client.patch(f"/api/jobs/{job_id}", json={"name": name})
+    
+    changes = (await client.get("/api/sync", params={"since": since})).json()
+    assert [(job["id"], job["name"]) for job in changes["upserts"]["jobs"]] == [(job_id, "Third")]
+    assert changes["next_token"] > since
+    
+    # Nothing new after the returned token
+    again = (await client.get("/api/sync", params={"since": changes["next_token"]})).json()
+    assert again["upserts"]["jobs"] == []
+
+
+async def test_paging(client, job_id):
+    changes = (await client.get("/api/sync", params={"limit": 5})).json()
+    assert changes["has_more"] is True
+    rest = (await client.get("/api/sync", params={"since": changes["next_token"], "limit": 5000})).json()
+    assert rest["has_more"] is False
+
+
+async def test_deletes_send_tombstones(client, job_id):
+    rooms = (await client.get("/api/rooms", params={"job_id": job_id})).json()
+    since = await _token(client)
+    
+    assert (await client.delete(f"/api/rooms/{rooms[0]['id']}")).status_code == 204
+    changes = (await client.get("/api/sync", params={"since": since})).json()
+    assert changes["tombstones"]["rooms"] == [rooms[0]["id"]]
+    assert rooms[0]["id"] not in [room["id"] for room in changes["upserts"]["rooms"]]
+    
+    since = changes["next_token"]
+    assert (await client.delete(f"/api/jobs/{job_id}")).status_code == 204
+    changes = (await client.get("/api/sync", params={"since": since})).json()
+    assert changes["tombstones"]["jobs"] == [job_id]
+    assert changes["upserts"]["jobs"] == []
+
+
+async def test_archiving_sends_no_tombstones(client, job_id):
+    await client.patch(f"/api/jobs/{job_id}", json={"status": "completed"})
+    since = await _token(client)
+    
+    assert (await client.post("/api/jobs/archive", params={"older_than_days": 0})).json()["archived"] == 1
+    changes = (await client.get("/api/sync", params={"since": since})).json()
+    assert changes["tombstones"] == {key: [] for key in changes["tombstones"]}
+    assert [job["id"] for job in changes["upserts"]["jobs"]] == [job_id]
+    assert changes["upserts"]["jobs"][0]["archived_at"] is not None
+    
+    # Deleting the archived job tombstones the rows clients still hold
+    since = changes["next_token"]
+    await client.delete(f"/api/jobs/{job_id}")
+    changes = (await client.get("/api/sync", params={"since": since})).json()
+    assert changes["tombstones"]["jobs"] == [job_id]
+    assert len(changes["tombstones"]["rooms"]) == 2
+    assert len(changes["tombstones"]["line_items"]) == 9
@@ -0,0 +1,60 @@
+"""
+Tile layout and sweep - Request bounds checked before any layout work
+"""
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.schemas import MAX_SWEEP_SCENARIOS, SweepRange, TileSweepRequest
+
+pytestmark = pytest.mark.anyio
+
+
+async def _room_id(client, job_id: int) -> int:
+    return (await client.get("/api/rooms", params={"job_id": job_id})).json()[0]["id"]
+
+
+def test_sweep_range_count():
+    assert SweepRange(start=6, stop=24, step=6).count == 4
+    assert SweepRange(start=0.1, stop=0.3, step=0.1).count == 3
+    assert SweepRange(start=24, stop=6, step=6).count == 0
+
+
+def test_sweep_caps_scenarios_without_building_ranges():
+    with pytest.raises(ValidationError, match="more than"):
+        SweepRange(start=1, stop=1e12, step=1e-6)
+    with pytest.raises(ValidationError, match="scenarios"):
+        # Each axis is under the cap, their product is not
+        TileSweepRequest(
+            tile_lengths_in=SweepRange(start=1, stop=1000, step=1),
+            tile_widths_in=SweepRange(start=1, stop=1000, step=1),
+        )
+    request = TileSweepRequest(tile_lengths_in=SweepRange(start=6, stop=24, step=6), patterns=["straight", "offset"])
+    assert request.scenario_count == 4 * 4 * 2 <= MAX_SWEEP_SCENARIOS
+
+
+async def test_sweep_endpoint(client, job_id):
+    url = f"/api/rooms/{await _room_id(client, job_id)}/tile-sweep"
+    
+    response = await client.post(url, json={"tile_lengths_in": {"start": 1, "stop": 1e9, "step": 1e-3}})
+    assert response.status_code == 422
+    assert (await client.post(url, json={})).status_code == 422
+    
+    response = await client.post(url, json={
+        "tile_lengths_in": {"start": 12, "stop": 24, "step": 12}, "price_per_sqft": 4.0, "refine_top": 1
+    })
+    assert response.status_code == 200
+    result = response.json()
+    assert result["scenario_count"] == 4
+    assert len(result["scenarios"]) == 4
+
+
+async def test_tile_layout_caps_tile_count(client, job_id):
+    url = f"/api/rooms/{await _room_id(client, job_id)}/tile-layout"
+    
+    response = await client.post(url, json={"tile_length_in": 12, "tile_width_in": 12})
+    assert response.status_code == 200
+    assert response.json()["tiles_needed"] >= 40
+    
+    response = await client.post(url, json={"tile_length_in": 0.01, "tile_width_in": 0.01})
+    assert response.status_code == 422
+    assert "max" in response.json()["detail"]